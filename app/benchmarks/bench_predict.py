@@ -0,0 +1,73 @@
+"""Benchmark comparing the latency of Keras predict against
+the traced inference function used by the serving path for a
+range of batch sizes
+
+Usage (from the app directory):
+
+    python -m benchmarks.bench_predict --inputs 16 --outputs 4 --repeat 50
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Callable
+
+import numpy as np
+
+from src.logic.tensor import TracedNetwork
+
+
+BATCH_SIZES = [1, 8, 32, 100, 1000, 10000]
+
+
+def build_network(inputs: int, outputs: int):
+    from tensorflow import keras
+
+    network = keras.Sequential([
+        keras.layers.InputLayer(input_shape=(inputs,)),
+        keras.layers.Dense(64, activation='relu'),
+        keras.layers.Dense(64, activation='relu'),
+        keras.layers.Dense(outputs)
+    ])
+    network.compile(optimizer='adam', loss='mse')
+    return network
+
+
+def measure(func: Callable, inputs: np.ndarray, repeat: int) -> dict:
+    func(inputs)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(inputs)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {'p50_ms': statistics.median(timings), 'p99_ms': timings[int(len(timings) * 0.99) - 1]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark predict latency')
+    parser.add_argument('--inputs', type=int, default=16)
+    parser.add_argument('--outputs', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    network = build_network(args.inputs, args.outputs)
+    # disable the predict fallback so that the traced
+    # function is measured for every batch size
+    traced = TracedNetwork(network, args.inputs, max_direct_batch=max(BATCH_SIZES))
+
+    report = []
+    for batch_size in BATCH_SIZES:
+        inputs = np.random.rand(batch_size, args.inputs).astype(np.float32)
+        predict = measure(network.predict, inputs, args.repeat)
+        direct = measure(traced.predict, inputs, args.repeat)
+        report.append({'batch_size': batch_size,
+                       'predict': predict,
+                       'traced': direct,
+                       'speedup': predict['p50_ms'] / direct['p50_ms']})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
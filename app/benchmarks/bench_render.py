@@ -0,0 +1,67 @@
+"""Benchmark comparing the legacy output formatting path
+(nested loops, jsonable_encoder and JSONResponse) against the
+vectorized output rendering layer
+
+Usage (from the app directory):
+
+    python -m benchmarks.bench_render --rows 100000 --columns 4
+"""
+
+import argparse
+import json
+import time
+from typing import Callable
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder as je
+from fastapi.responses import JSONResponse
+
+from src.logic.render import render_output, RenderedJSONResponse, ROWS_ORIENT, COLUMNS_ORIENT
+
+
+def legacy_render(results: np.ndarray, columns: list) -> bytes:
+    formatted_results = []
+    for result_set in results.tolist():
+        subset = {}
+        for k, v in zip(columns, result_set):
+            subset[k] = v
+        formatted_results.append(subset)
+    content = {'http_code': 200, 'output': formatted_results}
+    return JSONResponse(status_code=200, content=je(content)).body
+
+
+def timeit(func: Callable, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = func()
+        timings.append(time.perf_counter() - start)
+    return {'best_ms': min(timings) * 1000, 'mean_ms': sum(timings) / len(timings) * 1000, 'bytes': len(body)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark output rendering')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--columns', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = np.random.rand(args.rows, args.columns).astype(np.float32)
+    columns = ['output_{}'.format(i) for i in range(args.columns)]
+
+    report = {
+        'rows': args.rows,
+        'columns': args.columns,
+        'legacy': timeit(lambda: legacy_render(results, columns), args.repeat),
+        'rows_orient': timeit(lambda: RenderedJSONResponse(content=render_output(results, columns, ROWS_ORIENT)).body,
+                              args.repeat),
+        'columns_orient': timeit(lambda: RenderedJSONResponse(content=render_output(results, columns, COLUMNS_ORIENT)).body,
+                                 args.repeat)
+    }
+    for name in ['rows_orient', 'columns_orient']:
+        report[name]['speedup'] = report['legacy']['best_ms'] / report[name]['best_ms']
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark measuring the time taken to import the API
+application in a fresh interpreter, along with any heavy
+dependencies loaded at import time. Exits with a non-zero
+status code if the import time exceeds --max-seconds or if
+any of the --forbid modules are imported, meaning that it
+can be used to catch cold start regressions
+
+Usage (from the app directory):
+
+    python -m benchmarks.bench_startup --runs 5 --max-seconds 2
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+HEAVY_MODULES = ['tensorflow', 'boto3', 'botocore', 'pandas', 'h5py', 'pyarrow']
+
+CHILD_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import src.app
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'modules': [m for m in %r if m in sys.modules]}))
+'''
+
+
+def measure(cwd: str) -> dict:
+    # disable warm-up so that background imports do
+    # not skew the measurement
+    env = dict(os.environ, WARMUP_ENABLED='false', METADATA_INVALIDATION_ENABLED='false')
+    output = subprocess.run([sys.executable, '-c', CHILD_SCRIPT % HEAVY_MODULES],
+                            cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark API import time')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=None)
+    parser.add_argument('--forbid', nargs='*', default=['tensorflow', 'boto3', 'pandas'])
+    args = parser.parse_args()
+
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = [measure(cwd) for _ in range(args.runs)]
+    timings = [r['seconds'] for r in results]
+    loaded = sorted({m for r in results for m in r['modules']})
+
+    report = {'runs': args.runs,
+              'best_s': min(timings),
+              'median_s': statistics.median(timings),
+              'max_s': max(timings),
+              'heavy_modules_loaded': loaded}
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if args.max_seconds is not None and report['median_s'] > args.max_seconds:
+        failures.append('median import time {:.2f}s exceeds {:.2f}s'.format(report['median_s'], args.max_seconds))
+    forbidden = [m for m in loaded if m in args.forbid]
+    if forbidden:
+        failures.append('heavy modules imported at startup: {}'.format(', '.join(forbidden)))
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,44 @@
 """Module containing codebase for cognito wrapper API"""
 
+import asyncio
 import logging
 
 from fastapi import FastAPI, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from src.utils import json_response_with_message
-from src.routers import models, tensor, jobs
+from src.routers import models, tensor, jobs, stats
+from src.executors import shutdown_executors
+from src.services.rabbitmq import close_publishers
+from src.logic.metadata import start_invalidation_listener, stop_invalidation_listener
+from src.logic.access import ACCESS_RECORDER
+from src.logic.cache import MODEL_CACHE
+from src.logic.metadata import MODEL_META_CACHE, JOB_META_CACHE
+from src.logic.batching import BATCHER
+from src.logic.serving import MODEL_LOADS
+from src.persistence.postgres import get_pool
+from src.metrics import MetricsMiddleware, register_stats, render_metrics
+from src.warmup import start_warmup, prewarm_models, get_readiness
+from src.config import PG_CREDENTIALS, WARMUP_ENABLED, PREWARM_ENABLED, METRICS_ENABLED
 
 LOGGER = logging.getLogger(__name__)
 APP = FastAPI(title='Tensor Trigger API', version='0.1.0')
 
+if METRICS_ENABLED:
+    APP.add_middleware(MetricsMiddleware)
+    register_stats({'model_cache': MODEL_CACHE.stats,
+                    'model_metadata_cache': MODEL_META_CACHE.stats,
+                    'job_metadata_cache': JOB_META_CACHE.stats,
+                    'model_loads': MODEL_LOADS.stats,
+                    'batching': BATCHER.stats,
+                    'postgres_pool': lambda: get_pool(PG_CREDENTIALS).stats()})
+
+# background tasks started on startup. the event loop only keeps
+# weak references to tasks, meaning that tasks are referenced here
+# until completed
+BACKGROUND_TASKS = set()
+
 
 @APP.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request, exc):
@@ -20,6 +47,35 @@ async def http_exception_handler(request, exc):
     return JSONResponse(status_code=exc.status_code, content=content)
 
 
+@APP.on_event('startup')
+async def startup_handler():
+    """Startup handler used to start listening for
+    metadata invalidations sent by other replicas, to
+    import heavy dependencies and to pre-warm frequently
+    accessed models in the background"""
+
+    start_invalidation_listener(PG_CREDENTIALS)
+    ACCESS_RECORDER.start(PG_CREDENTIALS)
+    if WARMUP_ENABLED:
+        start_warmup()
+    if PREWARM_ENABLED:
+        task = asyncio.ensure_future(prewarm_models())
+        BACKGROUND_TASKS.add(task)
+        task.add_done_callback(BACKGROUND_TASKS.discard)
+
+
+@APP.on_event('shutdown')
+def shutdown_handler():
+    """Shutdown handler used to drain executors
+    used to run blocking work and close broker
+    connections"""
+
+    stop_invalidation_listener()
+    ACCESS_RECORDER.stop()
+    shutdown_executors()
+    close_publishers()
+
+
 @APP.get('/health_check', summary='Health check endpoint')
 async def health_handler() -> JSONResponse:
     """API handler used to serve health
@@ -31,6 +87,41 @@ async def health_handler() -> JSONResponse:
     LOGGER.debug('received request for health check endpoint')
     return json_response_with_message(status.HTTP_200_OK, 'Service running')
 
+
+@APP.get('/ready', summary='Readiness endpoint')
+async def readiness_handler() -> JSONResponse:
+    """API handler used to serve readiness response.
+    The service is only reported as ready once heavy
+    dependencies have been imported and frequently
+    accessed models have been pre-warmed
+
+    Returns:
+        JSONResponse: JSON response
+    """
+
+    LOGGER.debug('received request for readiness endpoint')
+    checks = get_readiness()
+    if all(checks.values()):
+        content = {'http_code': status.HTTP_200_OK, 'message': 'Service ready', 'checks': checks}
+        return JSONResponse(status_code=status.HTTP_200_OK, content=content)
+
+    content = {'http_code': status.HTTP_503_SERVICE_UNAVAILABLE, 'message': 'Service warming up', 'checks': checks}
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=content)
+
+
+@APP.get('/metrics', summary='Prometheus metrics endpoint')
+async def metrics_handler() -> Response:
+    """API handler used to serve metrics in the
+    prometheus text format
+
+    Returns:
+        Response: prometheus metrics
+    """
+
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
 APP.include_router(models.ROUTER, prefix='/models')
 APP.include_router(jobs.ROUTER, prefix='/jobs')
-APP.include_router(tensor.ROUTER, prefix='/tensor')
\ No newline at end of file
+APP.include_router(tensor.ROUTER, prefix='/tensor')
+APP.include_router(stats.ROUTER, prefix='/stats')
\ No newline at end of file
@@ -64,17 +64,65 @@ POSTGRES_PORT = override_value('POSTGRES_PORT', 5432)
 POSTGRES_DB = override_value('POSTGRES_DB', 'tensor_trigger')
 POSTGRES_USER = override_value('POSTGRES_USER', 'tensor_trigger')
 POSTGRES_PASSWORD = override_value('POSTGRES_PASSWORD', '', secret=True)
+POSTGRES_POOL_MIN_SIZE = override_value('POSTGRES_POOL_MIN_SIZE', 1)
+POSTGRES_POOL_MAX_SIZE = override_value('POSTGRES_POOL_MAX_SIZE', 16)
+POSTGRES_POOL_TIMEOUT = override_value('POSTGRES_POOL_TIMEOUT', 30.0)
+POSTGRES_POOL_MAX_IDLE = override_value('POSTGRES_POOL_MAX_IDLE', 300.0)
+POSTGRES_POOL_HEALTH_CHECK_INTERVAL = override_value('POSTGRES_POOL_HEALTH_CHECK_INTERVAL', 30.0)
 
 PG_CREDENTIALS = PostgresCredentials(**{
     'PG_HOST': POSTGRES_HOST,
     'PG_DATABASE': POSTGRES_DB,
     'PG_PORT': POSTGRES_PORT,
     'PG_USER': POSTGRES_USER,
-    'PG_PASSWORD': POSTGRES_PASSWORD
+    'PG_PASSWORD': POSTGRES_PASSWORD,
+    'PG_POOL_MIN_SIZE': POSTGRES_POOL_MIN_SIZE,
+    'PG_POOL_MAX_SIZE': POSTGRES_POOL_MAX_SIZE,
+    'PG_POOL_TIMEOUT': POSTGRES_POOL_TIMEOUT,
+    'PG_POOL_MAX_IDLE': POSTGRES_POOL_MAX_IDLE,
+    'PG_POOL_HEALTH_CHECK_INTERVAL': POSTGRES_POOL_HEALTH_CHECK_INTERVAL
 })
 
 MESSAGE_BROKER_URL = override_value('MESSAGE_BROKER_URL', '', secret=True)
 
 JOB_EXCHANGE_NAME = override_value('JOB_EXCHANGE_NAME', 'exch_tensor_trigger')
 JOB_EXCHANGE_TYPE = override_value('JOB_EXCHANGE_TYPE', 'direct')
-JOB_ROUTING_KEY = override_value('JOB_ROUTING_KEY', 'tensor-trigger_async_jobs')
\ No newline at end of file
+JOB_ROUTING_KEY = override_value('JOB_ROUTING_KEY', 'tensor-trigger_async_jobs')
+
+MODEL_CACHE_MAX_ENTRIES = override_value('MODEL_CACHE_MAX_ENTRIES', 32)
+MODEL_CACHE_MAX_BYTES = override_value('MODEL_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+
+BATCHING_ENABLED = override_value('BATCHING_ENABLED', True)
+BATCH_MAX_SIZE = override_value('BATCH_MAX_SIZE', 32)
+BATCH_MAX_WAIT_US = override_value('BATCH_MAX_WAIT_US', 1000)
+
+COMPUTE_CONCURRENCY = override_value('COMPUTE_CONCURRENCY', 4)
+POSTGRES_CONCURRENCY = override_value('POSTGRES_CONCURRENCY', 16)
+S3_CONCURRENCY = override_value('S3_CONCURRENCY', 16)
+BROKER_CONCURRENCY = override_value('BROKER_CONCURRENCY', 4)
+
+SCHEMA_CACHE_MAX_ENTRIES = override_value('SCHEMA_CACHE_MAX_ENTRIES', 1024)
+
+S3_MULTIPART_PART_SIZE = override_value('S3_MULTIPART_PART_SIZE', 8 * 1024 * 1024)
+UPLOAD_MAX_FIELD_BYTES = override_value('UPLOAD_MAX_FIELD_BYTES', 1024 * 1024)
+UPLOAD_MAX_HEADER_BYTES = override_value('UPLOAD_MAX_HEADER_BYTES', 64 * 1024)
+
+JOB_RESULTS_DEFAULT_LIMIT = override_value('JOB_RESULTS_DEFAULT_LIMIT', 10000)
+JOB_RESULTS_MAX_LIMIT = override_value('JOB_RESULTS_MAX_LIMIT', 100000)
+
+METADATA_CACHE_TTL = override_value('METADATA_CACHE_TTL', 300.0)
+METADATA_CACHE_MAX_ENTRIES = override_value('METADATA_CACHE_MAX_ENTRIES', 4096)
+METADATA_INVALIDATION_CHANNEL = override_value('METADATA_INVALIDATION_CHANNEL', 'tensor_trigger_invalidations')
+METADATA_INVALIDATION_ENABLED = override_value('METADATA_INVALIDATION_ENABLED', True)
+
+WARMUP_ENABLED = override_value('WARMUP_ENABLED', True)
+
+SERVING_FORMAT = override_value('SERVING_FORMAT', 'savedmodel')
+DIRECT_CALL_MAX_BATCH = override_value('DIRECT_CALL_MAX_BATCH', 1024)
+PREWARM_ENABLED = override_value('PREWARM_ENABLED', True)
+PREWARM_MAX_MODELS = override_value('PREWARM_MAX_MODELS', 8)
+PREWARM_MAX_BYTES = override_value('PREWARM_MAX_BYTES', MODEL_CACHE_MAX_BYTES // 2)
+PREWARM_ACCESS_FLUSH_INTERVAL = override_value('PREWARM_ACCESS_FLUSH_INTERVAL', 30.0)
+
+METRICS_ENABLED = override_value('METRICS_ENABLED', True)
+METRICS_MODEL_LABEL = override_value('METRICS_MODEL_LABEL', True)
@@ -0,0 +1,63 @@
+"""Module containing bounded executors used to run blocking
+work off the asyncio event loop"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Callable
+
+from src.config import COMPUTE_CONCURRENCY, POSTGRES_CONCURRENCY, \
+    S3_CONCURRENCY, BROKER_CONCURRENCY
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Stage(Enum):
+    COMPUTE = 'compute'
+    POSTGRES = 'postgres'
+    S3 = 's3'
+    BROKER = 'broker'
+
+
+STAGE_CONCURRENCY = {
+    Stage.COMPUTE: COMPUTE_CONCURRENCY,
+    Stage.POSTGRES: POSTGRES_CONCURRENCY,
+    Stage.S3: S3_CONCURRENCY,
+    Stage.BROKER: BROKER_CONCURRENCY
+}
+
+# each stage receives a dedicated pool so that slow S3 or
+# postgres calls cannot starve inference (and vice versa).
+# tensorflow releases the GIL during inference, so threads
+# are sufficient for the compute stage and allow the loaded
+# model cache to be shared
+EXECUTORS = {stage: ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tt-' + stage.value)
+             for stage, workers in STAGE_CONCURRENCY.items()}
+
+
+async def run_in_stage(stage: Stage, func: Callable, *args, **kwargs) -> Any:
+    """Function used to run blocking function on
+    the executor of a given stage. The event loop is
+    free to serve other requests until the function
+    completes
+
+    Args:
+        stage (Stage): stage used to select executor
+        func (Callable): blocking function to execute
+
+    Returns:
+        Any: return value of function
+    """
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(EXECUTORS[stage], functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executors():
+    """Function used to shutdown all stage executors"""
+
+    for stage, executor in EXECUTORS.items():
+        LOGGER.debug('shutting down executor for stage %s', stage.value)
+        executor.shutdown(wait=True)
@@ -0,0 +1,110 @@
+"""Module containing code used to record how frequently
+models are accessed. Accesses are counted in memory and
+flushed to postgres periodically, meaning that requests do
+not pay for a database write. Access counts are used to
+select the models that are pre-warmed on startup"""
+
+import logging
+import threading
+from collections import Counter
+from typing import Union
+from uuid import UUID
+
+from src.config import PREWARM_ACCESS_FLUSH_INTERVAL
+from src.persistence.postgres import PostgresCredentials, record_model_accesses
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AccessRecorder:
+    """Thread safe counter of model accesses that is
+    periodically flushed to postgres
+
+    Arguments:
+        interval: float interval (in seconds) between flushes
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.flushed = 0
+
+    def record(self, model_id: UUID):
+        """Function used to record a single access of
+        a model
+
+        Args:
+            model_id (UUID): ID of model
+        """
+
+        with self._lock:
+            self._counts[str(model_id)] += 1
+
+    def flush(self, creds: PostgresCredentials):
+        """Function used to write pending access counts
+        to postgres. Counts are restored if the write fails
+        so that they are retried on the next flush
+
+        Args:
+            creds (PostgresCredentials): postgres credentials
+        """
+
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return
+
+        try:
+            record_model_accesses(creds, counts)
+            self.flushed += sum(counts.values())
+        except Exception:
+            LOGGER.exception('unable to record access counts of %s models', len(counts))
+            with self._lock:
+                self._counts.update(counts)
+
+    def _run(self, creds: PostgresCredentials):
+        while not self._stop_event.wait(self.interval):
+            self.flush(creds)
+        self.flush(creds)
+
+    def start(self, creds: PostgresCredentials) -> Union[threading.Thread, None]:
+        """Function used to start background thread used
+        to flush access counts
+
+        Args:
+            creds (PostgresCredentials): postgres credentials
+
+        Returns:
+            Union[threading.Thread, None]: flush thread if
+                recording is enabled else None
+        """
+
+        if self.interval <= 0:
+            return None
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(creds,), name='model-access-recorder', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 5.0):
+        """Function used to stop the flush thread. Pending
+        access counts are flushed before the thread exits
+
+        Args:
+            timeout (float): time to wait for final flush
+        """
+
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+ACCESS_RECORDER = AccessRecorder(PREWARM_ACCESS_FLUSH_INTERVAL)
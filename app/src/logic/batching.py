@@ -0,0 +1,186 @@
+"""Module containing dynamic micro-batching scheduler used
+to group concurrent single vector inference requests"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Set, Union
+
+import numpy as np
+
+from src.config import BATCH_MAX_SIZE, BATCH_MAX_WAIT_US
+from src.logic.tensor import _format_output_vector
+from src.executors import run_in_stage, Stage
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class BatchSizeHistogram:
+    """Histogram used to track the distribution of
+    executed batch sizes. Buckets are powers of two
+    up to the maximum batch size
+
+    Arguments:
+        max_batch_size: int largest possible batch size
+    """
+
+    def __init__(self, max_batch_size: int):
+        self.buckets = []
+        bound = 1
+        while bound < max_batch_size:
+            self.buckets.append(bound)
+            bound *= 2
+        self.buckets.append(max_batch_size)
+
+        self._counts = [0] * len(self.buckets)
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+
+    def observe(self, batch_size: int):
+        with self._lock:
+            self.batches += 1
+            self.requests += batch_size
+            for i, bound in enumerate(self.buckets):
+                if batch_size <= bound:
+                    self._counts[i] += 1
+                    break
+
+    def stats(self) -> dict:
+        """Function used to generate histogram statistics
+
+        Returns:
+            dict: dict containing count of batches per
+                bucket and mean batch size
+        """
+
+        with self._lock:
+            mean = self.requests / self.batches if self.batches else 0
+            return {'batches': self.batches,
+                    'requests': self.requests,
+                    'mean_batch_size': mean,
+                    'histogram': {'le_' + str(b): c for b, c in zip(self.buckets, self._counts)}}
+
+
+class MicroBatcher:
+    """Scheduler used to collect concurrent inference
+    requests for the same model and execute them as a
+    single prediction. A batch is executed once either
+    the maximum batch size is reached or the oldest
+    request has waited for the maximum wait time
+
+    Arguments:
+        max_batch_size: int maximum number of rows per batch
+        max_wait_us: int maximum time (in microseconds)
+            a request waits for a batch to fill
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_us: int):
+        self.max_batch_size = max_batch_size
+        self.max_wait_us = max_wait_us
+        self.histogram = BatchSizeHistogram(max_batch_size)
+
+        self._pending: Dict[Any, List[tuple]] = {}
+        self._timers: Dict[Any, asyncio.TimerHandle] = {}
+        # the event loop only keeps weak references to tasks, meaning
+        # that running batches are referenced until completed
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, key: Any, network: Any, inputs: np.ndarray) -> np.ndarray:
+        """Function used to submit input rows for prediction.
+        The returned coroutine completes once the batch
+        containing the inputs has been executed
+
+        Args:
+            key (Any): key of model, typically model ID and version
+            network (Any): loaded tensorflow model
+            inputs (np.ndarray): 2 dimensional input array
+
+        Returns:
+            np.ndarray: model outputs for provided inputs
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        pending = self._pending.setdefault(key, [])
+        pending.append((inputs, future))
+        if sum(len(x) for x, _ in pending) >= self.max_batch_size:
+            self._flush(key, network)
+        elif len(pending) == 1:
+            # first request for batch starts the wait timer
+            self._timers[key] = loop.call_later(self.max_wait_us / 1e6, self._flush, key, network)
+        return await future
+
+    def _flush(self, key: Any, network: Any):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        pending = self._pending.pop(key, [])
+        if pending:
+            task = asyncio.ensure_future(self._run_batch(network, pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, network: Any, pending: List[tuple]):
+        batch = np.vstack([x for x, _ in pending])
+        self.histogram.observe(len(batch))
+        try:
+            results = await run_in_stage(Stage.COMPUTE, network.predict, batch)
+        except Exception as exc:
+            LOGGER.exception('unable to run batch of size %s', len(batch))
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        # split outputs back into the slices belonging
+        # to each of the waiting requests
+        offset = 0
+        for inputs, future in pending:
+            if not future.done():
+                future.set_result(results[offset:offset + len(inputs)])
+            offset += len(inputs)
+
+    def stats(self) -> dict:
+        """Function used to generate batching statistics
+
+        Returns:
+            dict: dict containing batch size histogram
+        """
+
+        stats = self.histogram.stats()
+        stats.update({'max_batch_size': self.max_batch_size,
+                      'max_wait_us': self.max_wait_us})
+        return stats
+
+
+BATCHER = MicroBatcher(BATCH_MAX_SIZE, BATCH_MAX_WAIT_US)
+
+
+async def run_model_microbatched(key: Any,
+                                 network: Any,
+                                 inputs: np.ndarray,
+                                 output_schema: Dict[str, str]) -> Union[dict, None]:
+    """Function used to run loaded model against a
+    single input vector via the micro-batching scheduler
+
+    Args:
+        key (Any): key of model used to group requests
+        network (Any): loaded tensorflow model
+        inputs (np.ndarray): input vector cast to the
+            format required by the model schema
+
+    Returns:
+        Union[dict, None]: formatted model output or None
+    """
+
+    try:
+        results = await BATCHER.submit(key, network, inputs)
+
+        formatted_results = _format_output_vector(results.tolist(), output_schema)
+        return formatted_results[0] if results.shape[0] > 0 else None
+    except Exception:
+        LOGGER.exception('unable to run model with input vector %s', inputs)
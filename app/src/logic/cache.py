@@ -0,0 +1,142 @@
+"""Module containing in-process cache used to store
+deserialized tensorflow models"""
+
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Any, Union
+from uuid import UUID
+
+from src.config import MODEL_CACHE_MAX_ENTRIES, MODEL_CACHE_MAX_BYTES
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+CacheEntry = namedtuple('CacheEntry', ['network', 'size'])
+
+
+class ModelCache:
+    """LRU cache used to store loaded tensorflow models
+    keyed by model ID and model version. Entries are evicted
+    in least recently used order once either the maximum
+    number of entries or the memory budget is exceeded
+
+    Arguments:
+        max_entries: int maximum number of models to store
+        max_bytes: int memory budget (in bytes) of all
+            cached models
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(model_id: UUID, version: int) -> tuple:
+        return str(model_id), version
+
+    def get(self, model_id: UUID, version: int) -> Union[Any, None]:
+        """Function used to retrieve model from cache.
+        Retrieved models are moved to the end of the LRU
+        queue
+
+        Args:
+            model_id (UUID): ID of model
+            version (int): version of model
+
+        Returns:
+            Union[Any, None]: loaded model if cached else None
+        """
+
+        key = self._key(model_id, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry.network
+
+    def put(self, model_id: UUID, version: int, network: Any, size: int):
+        """Function used to insert model into cache. Any
+        older versions of the same model are dropped, and
+        models are evicted until the cache fits the budget
+
+        Args:
+            model_id (UUID): ID of model
+            version (int): version of model
+            network (Any): loaded tensorflow model
+            size (int): estimated size of model in bytes
+        """
+
+        if size > self.max_bytes:
+            LOGGER.warning('unable to cache model %s: size %s exceeds memory budget %s',
+                           model_id, size, self.max_bytes)
+            return
+
+        key = self._key(model_id, version)
+        with self._lock:
+            self._remove_model(str(model_id))
+            self._entries[key] = CacheEntry(network=network, size=size)
+            self._size += size
+
+            # evict least recently used models until both the
+            # entry limit and memory budget are satisfied
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+                self.evictions += 1
+                LOGGER.debug('evicted model %s from model cache', evicted_key)
+
+    def invalidate(self, model_id: UUID):
+        """Function used to remove all versions of a
+        given model from the cache
+
+        Args:
+            model_id (UUID): ID of model
+        """
+
+        with self._lock:
+            self._remove_model(str(model_id))
+
+    def _remove_model(self, model_id: str):
+        for key in [k for k in self._entries if k[0] == model_id]:
+            self._size -= self._entries.pop(key).size
+
+    def clear(self):
+        """Function used to remove all models from cache"""
+
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        """Function used to generate cache statistics
+
+        Returns:
+            dict: dict containing hit/miss counters and
+                current cache usage
+        """
+
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'entries': len(self._entries),
+                    'size': self._size,
+                    'max_entries': self.max_entries,
+                    'max_bytes': self.max_bytes}
+
+
+MODEL_CACHE = ModelCache(MODEL_CACHE_MAX_ENTRIES, MODEL_CACHE_MAX_BYTES)
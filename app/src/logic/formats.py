@@ -0,0 +1,169 @@
+"""Module containing codecs used to decode batch inputs
+from and encode batch outputs to columnar and binary formats"""
+
+import io
+import logging
+from typing import List
+
+import numpy as np
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+JSON_CONTENT_TYPE = 'application/json'
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+NPY_CONTENT_TYPE = 'application/x-npy'
+ARROW_CONTENT_TYPE = 'application/vnd.apache.arrow.stream'
+
+BINARY_CONTENT_TYPES = [NPY_CONTENT_TYPE, ARROW_CONTENT_TYPE]
+
+
+class UnsupportedFormatException(Exception):
+    """Exception raised when a format is requested
+    that is not supported by the current environment"""
+
+
+def get_content_type(header: str) -> str:
+    """Function used to extract the media type from
+    a content type header, stripping any parameters
+
+    Args:
+        header (str): value of content type header
+
+    Returns:
+        str: lower case media type
+    """
+
+    return (header or JSON_CONTENT_TYPE).split(';')[0].strip().lower()
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        LOGGER.error('unable to import pyarrow: arrow format is not supported')
+        raise UnsupportedFormatException(ARROW_CONTENT_TYPE)
+
+
+def decode_npy(body: bytes) -> np.ndarray:
+    """Function used to decode .npy file into a
+    2 dimensional array. Object arrays are rejected
+
+    Args:
+        body (bytes): contents of .npy file
+
+    Returns:
+        np.ndarray: decoded array
+    """
+
+    array = np.load(io.BytesIO(body), allow_pickle=False)
+    if array.ndim != 2:
+        raise ValueError('expected 2 dimensional array, got {} dimensions'.format(array.ndim))
+    return array
+
+
+def encode_npy(results: np.ndarray) -> bytes:
+    """Function used to encode array as .npy file
+    containing little-endian float32 values
+
+    Args:
+        results (np.ndarray): array to encode
+
+    Returns:
+        bytes: contents of .npy file
+    """
+
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(results, dtype='<f4'), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def decode_npz(body: bytes) -> np.ndarray:
+    """Function used to decode .npz file containing
+    a single array named output
+
+    Args:
+        body (bytes): contents of .npz file
+
+    Returns:
+        np.ndarray: decoded array
+    """
+
+    with np.load(io.BytesIO(body), allow_pickle=False) as npz:
+        return npz['output']
+
+
+def decode_arrow(body: bytes, columns: List[str] = None) -> np.ndarray:
+    """Function used to decode Arrow IPC stream into
+    a 2 dimensional array with columns in the given
+    order. Columns are read in stream order if no
+    columns are given
+
+    Args:
+        body (bytes): Arrow IPC stream
+        columns (List[str], optional): ordered column names
+
+    Returns:
+        np.ndarray: decoded array
+    """
+
+    pyarrow = _import_pyarrow()
+    table = pyarrow.ipc.open_stream(pyarrow.py_buffer(body)).read_all()
+    return _table_to_array(table, columns)
+
+
+def decode_parquet(body: bytes, columns: List[str] = None) -> np.ndarray:
+    """Function used to decode Parquet file into a
+    2 dimensional array with columns in the given
+    order. Columns are read in file order if no columns
+    are given
+
+    Args:
+        body (bytes): contents of Parquet file
+        columns (List[str], optional): ordered column names
+
+    Returns:
+        np.ndarray: decoded array
+    """
+
+    pyarrow = _import_pyarrow()
+    table = pyarrow.parquet.read_table(pyarrow.BufferReader(body))
+    return _table_to_array(table, columns)
+
+
+def _table_to_array(table, columns: List[str] = None) -> np.ndarray:
+    columns = columns if columns is not None else table.column_names
+    missing = [c for c in columns if c not in table.column_names]
+    if missing:
+        raise ValueError('missing columns {}'.format(missing))
+
+    array = np.empty((table.num_rows, len(columns)), dtype=np.float32)
+    for i, column in enumerate(columns):
+        array[:, i] = table.column(column).to_numpy()
+    return array
+
+
+def encode_arrow(results: np.ndarray, columns: List[str]) -> bytes:
+    """Function used to encode array as Arrow IPC
+    stream with one float32 column per output
+
+    Args:
+        results (np.ndarray): array to encode
+        columns (List[str]): ordered column names
+
+    Returns:
+        bytes: Arrow IPC stream
+    """
+
+    pyarrow = _import_pyarrow()
+    results = np.asarray(results, dtype=np.float32)
+    table = pyarrow.Table.from_arrays([pyarrow.array(results[:, i]) for i in range(len(columns))],
+                                      names=columns)
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,254 @@
+"""Module containing cache used to store model and job
+metadata retrieved from postgres. Entries expire after a
+fixed TTL and are invalidated explicitly when models are
+changed, including by other API replicas and the worker
+via postgres LISTEN/NOTIFY"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple, Union
+from uuid import UUID
+
+from src.config import METADATA_CACHE_TTL, METADATA_CACHE_MAX_ENTRIES, \
+    METADATA_INVALIDATION_CHANNEL, METADATA_INVALIDATION_ENABLED
+from src.persistence.postgres import PostgresCredentials, get_user_model, \
+    get_user_job, notify_channel, listen_on_channel
+from src.logic.cache import MODEL_CACHE
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+# jobs are only cached once they have completed or failed,
+# since the job state is updated by the worker
+TERMINAL_JOB_STATES = [2, 3]
+
+
+class MetadataCache:
+    """LRU cache with a fixed TTL used to store metadata
+    rows keyed by (user ID, ID). Entries can additionally be
+    invalidated by ID for all users
+
+    Arguments:
+        ttl: float time to live of entries in seconds
+        max_entries: int maximum number of entries
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # incremented on every invalidation. used to discard
+        # entries read from postgres before an invalidation
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, uid: str, key: UUID) -> Union[Any, None]:
+        """Function used to retrieve entry from cache.
+        Expired entries are removed
+
+        Args:
+            uid (str): user ID
+            key (UUID): ID of model or job
+
+        Returns:
+            Union[Any, None]: cached entry if present else None
+        """
+
+        cache_key = (uid, str(key))
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[cache_key]
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(cache_key)
+            return entry[0]
+
+    def put(self, uid: str, key: UUID, value: Any, generation: int):
+        """Function used to insert entry into cache. The
+        entry is discarded if any invalidation has occurred
+        since the given generation
+
+        Args:
+            uid (str): user ID
+            key (UUID): ID of model or job
+            value (Any): entry to cache
+            generation (int): generation of cache when the
+                entry was read
+        """
+
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[(uid, str(key))] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end((uid, str(key)))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: UUID):
+        """Function used to remove all entries with the
+        given ID from cache
+
+        Args:
+            key (UUID): ID of model or job
+        """
+
+        key = str(key)
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[1] == key]:
+                del self._entries[cache_key]
+            self.generation += 1
+            self.invalidations += 1
+
+    def clear(self):
+        """Function used to remove all entries from cache"""
+
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self) -> dict:
+        """Function used to generate cache statistics
+
+        Returns:
+            dict: dict containing hit/miss counters and size
+        """
+
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'invalidations': self.invalidations,
+                    'entries': len(self._entries),
+                    'ttl': self.ttl}
+
+
+MODEL_META_CACHE = MetadataCache(METADATA_CACHE_TTL, METADATA_CACHE_MAX_ENTRIES)
+JOB_META_CACHE = MetadataCache(METADATA_CACHE_TTL, METADATA_CACHE_MAX_ENTRIES)
+
+
+def get_cached_user_model(creds: PostgresCredentials, uid: str, model_id: UUID) -> Union[NamedTuple, None]:
+    """Function used to retrieve model metadata via
+    the metadata cache. Missing models are not cached
+
+    Args:
+        creds (PostgresCredentials): postgres credentials
+        uid (str): user ID
+        model_id (UUID): ID of model
+
+    Returns:
+        Union[NamedTuple, None]: model metadata if found else None
+    """
+
+    model = MODEL_META_CACHE.get(uid, model_id)
+    if model is None:
+        generation = MODEL_META_CACHE.generation
+        model = get_user_model(creds, uid, model_id)
+        if model is not None:
+            MODEL_META_CACHE.put(uid, model_id, model, generation)
+    return model
+
+
+def get_cached_user_job(creds: PostgresCredentials, uid: str, job_id: UUID) -> Union[NamedTuple, None]:
+    """Function used to retrieve job metadata via the
+    metadata cache. Only completed or failed jobs are
+    cached
+
+    Args:
+        creds (PostgresCredentials): postgres credentials
+        uid (str): user ID
+        job_id (UUID): ID of job
+
+    Returns:
+        Union[NamedTuple, None]: job metadata if found else None
+    """
+
+    job = JOB_META_CACHE.get(uid, job_id)
+    if job is None:
+        generation = JOB_META_CACHE.generation
+        job = get_user_job(creds, uid, job_id)
+        if job is not None and job.job_state in TERMINAL_JOB_STATES:
+            JOB_META_CACHE.put(uid, job_id, job, generation)
+    return job
+
+
+def invalidate_model(creds: PostgresCredentials, model_id: UUID, broadcast: bool = METADATA_INVALIDATION_ENABLED):
+    """Function used to invalidate cached metadata and
+    loaded copies of a model. The invalidation is broadcast
+    to all other API replicas if enabled
+
+    Args:
+        creds (PostgresCredentials): postgres credentials
+        model_id (UUID): ID of model
+        broadcast (bool): notify other replicas if True
+    """
+
+    MODEL_META_CACHE.invalidate(model_id)
+    MODEL_CACHE.invalidate(model_id)
+    if broadcast:
+        try:
+            notify_channel(creds, METADATA_INVALIDATION_CHANNEL, 'model:{}'.format(model_id))
+        except Exception:
+            LOGGER.exception('unable to broadcast invalidation of model %s', model_id)
+
+
+def handle_invalidation(payload: str):
+    """Function used to handle invalidation notifications
+    sent by other API replicas or the worker. Payloads are
+    of the form model:<model_id> or job:<job_id>
+
+    Args:
+        payload (str): notification payload
+    """
+
+    kind, _, key = payload.partition(':')
+    LOGGER.debug('received invalidation for %s %s', kind, key)
+    if kind == 'model':
+        MODEL_META_CACHE.invalidate(key)
+        MODEL_CACHE.invalidate(key)
+    elif kind == 'job':
+        JOB_META_CACHE.invalidate(key)
+    else:
+        LOGGER.warning('received invalid invalidation payload %s', payload)
+
+
+LISTENER_STOP_EVENT = threading.Event()
+
+def start_invalidation_listener(creds: PostgresCredentials) -> Union[threading.Thread, None]:
+    """Function used to start background thread used to
+    listen for invalidation notifications
+
+    Args:
+        creds (PostgresCredentials): postgres credentials
+
+    Returns:
+        Union[threading.Thread, None]: listener thread if
+            invalidation is enabled else None
+    """
+
+    if not METADATA_INVALIDATION_ENABLED:
+        return None
+
+    LISTENER_STOP_EVENT.clear()
+    thread = threading.Thread(target=listen_on_channel,
+                              args=(creds, METADATA_INVALIDATION_CHANNEL, handle_invalidation, LISTENER_STOP_EVENT),
+                              name='metadata-invalidation-listener',
+                              daemon=True)
+    thread.start()
+    return thread
+
+
+def stop_invalidation_listener():
+    """Function used to stop invalidation listener"""
+
+    LISTENER_STOP_EVENT.set()
@@ -0,0 +1,122 @@
+"""Module containing output rendering layer used to serialize
+model outputs straight to JSON bytes"""
+
+import logging
+from typing import Any, Dict, List
+
+import numpy as np
+import orjson
+from fastapi.responses import Response
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+ROWS_ORIENT = 'rows'
+COLUMNS_ORIENT = 'columns'
+ALLOWED_ORIENTS = [ROWS_ORIENT, COLUMNS_ORIENT]
+
+
+class RenderedJSONResponse(Response):
+    """Response class used to return JSON bodies that
+    have already been serialized to bytes. Unlike the
+    JSONResponse class, the content is not re-encoded"""
+
+    media_type = 'application/json'
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def dumps(content: Any) -> bytes:
+    """Function used to serialize content to JSON bytes.
+    Numpy arrays are serialized natively, meaning that no
+    python objects are generated per element
+
+    Args:
+        content (Any): content to serialize
+
+    Returns:
+        bytes: JSON encoded content
+    """
+
+    return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+def format_rows(results: np.ndarray, columns: List[str]) -> List[dict]:
+    """Function used to format model outputs as a
+    list of dicts mapping column names to values
+
+    Args:
+        results (np.ndarray): 2 dimensional model outputs
+        columns (List[str]): ordered output column names
+
+    Returns:
+        List[dict]: row oriented outputs
+    """
+
+    return [dict(zip(columns, row)) for row in np.asarray(results).tolist()]
+
+
+def format_columns(results: np.ndarray, columns: List[str]) -> Dict[str, np.ndarray]:
+    """Function used to format model outputs as a dict
+    mapping column names to contiguous arrays of values
+
+    Args:
+        results (np.ndarray): 2 dimensional model outputs
+        columns (List[str]): ordered output column names
+
+    Returns:
+        Dict[str, np.ndarray]: column oriented outputs
+    """
+
+    # transpose into contiguous memory so that each column
+    # can be serialized directly from the underlying buffer
+    transposed = np.ascontiguousarray(np.asarray(results).T)
+    return {column: transposed[i] for i, column in enumerate(columns)}
+
+
+def render_output(results: np.ndarray,
+                  columns: List[str],
+                  orient: str = ROWS_ORIENT,
+                  http_code: int = 200,
+                  key: str = 'output',
+                  extra: Dict[str, Any] = None) -> bytes:
+    """Function used to render model outputs into a
+    complete JSON response body
+
+    Args:
+        results (np.ndarray): 2 dimensional model outputs
+        columns (List[str]): ordered output column names
+        orient (str): rows or columns
+        http_code (int): HTTP code included in body
+        key (str): key of outputs in response body
+        extra (Dict[str, Any], optional): additional
+            values included in body
+
+    Returns:
+        bytes: JSON encoded response body
+    """
+
+    if orient == COLUMNS_ORIENT:
+        output = format_columns(results, columns)
+    else:
+        output = format_rows(results, columns)
+    return dumps({'http_code': http_code, **(extra or {}), key: output})
+
+
+def render_ndjson(results: np.ndarray, columns: List[str]) -> bytes:
+    """Function used to render model outputs as newline
+    delimited JSON, with one object per row
+
+    Args:
+        results (np.ndarray): 2 dimensional model outputs
+        columns (List[str]): ordered output column names
+
+    Returns:
+        bytes: newline delimited JSON
+    """
+
+    return b''.join(dumps(row) + b'\n' for row in format_rows(results, columns))
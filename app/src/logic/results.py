@@ -0,0 +1,183 @@
+"""Module containing code used to read async job results
+from the object store. Results are stored as a sequence of
+independently encoded blocks (newline delimited JSON, .npz,
+Parquet or Arrow) alongside an index of the blocks and their
+byte offsets, meaning that ranges of rows can be read
+without downloading the full output"""
+
+import logging
+from typing import Iterator, List, Union
+from uuid import UUID
+
+import numpy as np
+import orjson
+
+from src.persistence.s3 import retrieve_s3_file, retrieve_s3_range, open_s3_stream
+from src.logic.formats import decode_npz, decode_parquet, decode_arrow
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+OUTPUT_DATA_PATH = '/tensor-trigger/output-data'
+OUTPUT_INDEX_PATH = '/tensor-trigger/output-index'
+
+BLOCK_DECODERS = {
+    'npz': decode_npz,
+    'parquet': decode_parquet,
+    'arrow': decode_arrow
+}
+
+
+def get_results_index(job_id: UUID) -> Union[dict, None]:
+    """Function used to retrieve index of job results.
+    Jobs completed before results were indexed do not
+    have an index, in which case None is returned
+
+    Args:
+        job_id (UUID): ID of job
+
+    Returns:
+        Union[dict, None]: index of result blocks or None
+    """
+
+    from botocore.exceptions import ClientError
+
+    try:
+        data = retrieve_s3_file(OUTPUT_INDEX_PATH + str(job_id))
+    except ClientError as err:
+        if err.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey'):
+            LOGGER.debug('no results index found for job %s', job_id)
+            return None
+        raise
+    return orjson.loads(data.getvalue())
+
+
+def parse_ndjson(data: bytes, width: int) -> np.ndarray:
+    """Function used to parse block of newline delimited
+    JSON arrays into a 2 dimensional array
+
+    Args:
+        data (bytes): newline delimited JSON
+        width (int): number of outputs per row
+
+    Returns:
+        np.ndarray: parsed rows
+    """
+
+    data = data.rstrip(b'\n')
+    if not data:
+        return np.empty((0, width), dtype=np.float32)
+    rows = orjson.loads(b'[' + data.replace(b'\n', b',') + b']')
+    return np.asarray(rows, dtype=np.float32).reshape(-1, width)
+
+
+def decode_block(data: bytes, output_format: str, width: int) -> np.ndarray:
+    """Function used to decode a single block of
+    job results
+
+    Args:
+        data (bytes): encoded block
+        output_format (str): format of block
+        width (int): number of outputs per row
+
+    Returns:
+        np.ndarray: array of shape (rows, width)
+    """
+
+    if output_format == 'ndjson':
+        return parse_ndjson(data, width)
+    decoder = BLOCK_DECODERS.get(output_format)
+    if decoder is None:
+        raise ValueError('invalid output format {}'.format(output_format))
+    return np.asarray(decoder(data), dtype=np.float32).reshape(-1, width)
+
+
+def _get_blocks(index: dict, offset: int, limit: int) -> List[dict]:
+    end = offset + limit
+    return [b for b in index['blocks'] if b['start'] < end and b['start'] + b['rows'] > offset]
+
+
+def read_result_rows(job_id: UUID, index: Union[dict, None], offset: int, limit: int, width: int) -> np.ndarray:
+    """Function used to read a range of rows from the
+    results of a job. Only the byte range containing the
+    requested rows is downloaded if the results are indexed
+
+    Args:
+        job_id (UUID): ID of job
+        index (Union[dict, None]): index of result blocks
+        offset (int): first row to read
+        limit (int): maximum number of rows to read
+        width (int): number of outputs per row
+
+    Returns:
+        np.ndarray: array of shape (rows, width)
+    """
+
+    if index is None:
+        return read_legacy_results(job_id, width)[offset:offset + limit]
+
+    blocks = _get_blocks(index, offset, limit)
+    if not blocks:
+        return np.empty((0, width), dtype=np.float32)
+
+    # adjacent blocks are retrieved with a single range
+    # request and split using the lengths in the index
+    first, last = blocks[0], blocks[-1]
+    data = retrieve_s3_range(OUTPUT_DATA_PATH + str(job_id), first['offset'], last['offset'] + last['length'] - 1)
+    output_format = index.get('format', 'ndjson')
+    arrays = []
+    for block in blocks:
+        start = block['offset'] - first['offset']
+        arrays.append(decode_block(data[start:start + block['length']], output_format, width))
+
+    skip = offset - first['start']
+    return np.concatenate(arrays)[skip:skip + limit]
+
+
+def iter_result_blocks(job_id: UUID, index: dict, offset: int, width: int) -> Iterator[np.ndarray]:
+    """Function used to iterate over decoded blocks of
+    job results starting at the block containing the given
+    row. Data is streamed from the object store as the
+    blocks are consumed
+
+    Args:
+        job_id (UUID): ID of job
+        index (dict): index of result blocks
+        offset (int): first row to read
+        width (int): number of outputs per row
+
+    Returns:
+        Iterator[np.ndarray]: iterator of decoded blocks,
+            with rows before the offset removed
+    """
+
+    blocks = _get_blocks(index, offset, index['rows'])
+    if not blocks:
+        return
+
+    output_format = index.get('format', 'ndjson')
+    stream = open_s3_stream(OUTPUT_DATA_PATH + str(job_id), blocks[0]['offset'])
+    try:
+        for block in blocks:
+            results = decode_block(stream.read(block['length']), output_format, width)
+            yield results[max(offset - block['start'], 0):]
+    finally:
+        stream.close()
+
+
+def read_legacy_results(job_id: UUID, width: int) -> np.ndarray:
+    """Function used to read results of jobs that were
+    stored as a single JSON document
+
+    Args:
+        job_id (UUID): ID of job
+        width (int): number of outputs per row
+
+    Returns:
+        np.ndarray: array of shape (rows, width)
+    """
+
+    data = retrieve_s3_file(OUTPUT_DATA_PATH + str(job_id))
+    results = orjson.loads(data.getvalue()).get('output', [])
+    return np.asarray(results, dtype=np.float32).reshape(-1, width)
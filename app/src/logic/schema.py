@@ -0,0 +1,202 @@
+"""Module containing compiled model schemas used to validate
+and cast batches of input vectors"""
+
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from src.config import SCHEMA_CACHE_MAX_ENTRIES
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+RowError = namedtuple('RowError', ['row', 'columns'])
+
+
+class CompiledSchema:
+    """Schema compiled into an ordered column list and
+    a mask of integer columns. Batches of input vectors
+    are cast into a single float32 array in column order
+    and validated with array operations, meaning that valid
+    batches are not inspected field by field. As with single
+    vector validation, integer columns must be finite but
+    are not required to be integral
+
+    Arguments:
+        schema: Dict[str, dict] model schema mapping column
+            names to var_type and index
+    """
+
+    def __init__(self, schema: Dict[str, dict]):
+        # sort schema by index to ensure that data values are
+        # inserted in correct order into model
+        items = sorted(schema.items(), key=lambda item: item[1]['index'])
+        self.columns = [name for name, _ in items]
+        self.var_types = [item['var_type'].upper() for _, item in items]
+        self._int_columns = np.array([var_type == 'INT' for var_type in self.var_types])
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def compile_vector(self, row: Dict[str, Any]) -> Tuple[np.ndarray, List[RowError]]:
+        """Function used to validate and cast a single input
+        vector into a float32 array of shape (1, columns).
+        Invalid vectors are handled by the batch path in
+        order to generate row errors
+
+        Args:
+            row (Dict[str, Any]): input vector
+
+        Returns:
+            Tuple[np.ndarray, List[RowError]]: array and list
+                of invalid rows
+        """
+
+        try:
+            values = np.array([[row[column] for column in self.columns]], dtype=np.float64)
+        except (KeyError, TypeError, ValueError):
+            return self.compile_batch([row])
+
+        if not np.isfinite(values[:, self._int_columns]).all():
+            return self.compile_batch([row])
+        return values.astype(np.float32), []
+
+    def compile_batch(self, rows: List[Dict[str, Any]], max_errors: int = 100) -> Tuple[np.ndarray, List[RowError]]:
+        """Function used to validate and cast a batch of
+        input vectors into a single contiguous float32 array
+
+        Args:
+            rows (List[Dict[str, Any]]): input vectors
+            max_errors (int): maximum number of row errors
+                to report
+
+        Returns:
+            Tuple[np.ndarray, List[RowError]]: array of shape
+                (rows, columns) and list of invalid rows. the
+                array should be discarded if errors are returned
+        """
+
+        import pandas as pd
+
+        frame = pd.DataFrame.from_records(rows, columns=self.columns)
+        values = frame.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        return self._validate(values, max_errors, self._get_missing(rows, values))
+
+    def _get_missing(self, rows: List[Dict[str, Any]], values: np.ndarray) -> np.ndarray:
+        # missing and non numeric values are coerced to NaN, but NaN
+        # is also a valid FLOAT input. only NaN cells are checked
+        # against the raw rows, meaning valid batches are not
+        # inspected field by field
+        missing = np.zeros(values.shape, dtype=bool)
+        for row, column in zip(*np.nonzero(np.isnan(values))):
+            value = rows[row].get(self.columns[column])
+            try:
+                missing[row, column] = value is None or not np.isnan(float(value))
+            except (TypeError, ValueError):
+                missing[row, column] = True
+        return missing
+
+    def compile_columns(self, columns: Dict[str, Any], max_errors: int = 100) -> Tuple[np.ndarray, List[RowError]]:
+        """Function used to validate and cast column oriented
+        input data (column name mapped to array of values)
+        into a single contiguous float32 array
+
+        Args:
+            columns (Dict[str, Any]): column oriented input data
+            max_errors (int): maximum number of row errors
+                to report
+
+        Returns:
+            Tuple[np.ndarray, List[RowError]]: array of shape
+                (rows, columns) and list of invalid rows
+        """
+
+        missing = [column for column in self.columns if column not in columns]
+        if missing:
+            raise ValueError('missing columns {}'.format(missing))
+
+        lengths = {len(columns[column]) for column in self.columns}
+        if len(lengths) > 1:
+            raise ValueError('columns must have equal length')
+
+        values = np.empty((lengths.pop() if lengths else 0, len(self.columns)), dtype=np.float64)
+        for i, column in enumerate(self.columns):
+            values[:, i] = np.asarray(columns[column], dtype=np.float64)
+        return self._validate(values, max_errors)
+
+    def compile_array(self, array: np.ndarray, max_errors: int = 100) -> Tuple[np.ndarray, List[RowError]]:
+        """Function used to validate and cast 2 dimensional
+        array with columns in schema order
+
+        Args:
+            array (np.ndarray): input array
+            max_errors (int): maximum number of row errors
+                to report
+
+        Returns:
+            Tuple[np.ndarray, List[RowError]]: array of shape
+                (rows, columns) and list of invalid rows
+        """
+
+        if array.ndim != 2 or array.shape[1] != len(self.columns):
+            raise ValueError('expected array of shape (n, {}), got {}'.format(len(self.columns), array.shape))
+        if not np.issubdtype(array.dtype, np.number):
+            raise ValueError('expected numeric array, got {}'.format(array.dtype))
+        return self._validate(array.astype(np.float64, copy=False), max_errors)
+
+    def _validate(self,
+                  values: np.ndarray,
+                  max_errors: int,
+                  invalid: np.ndarray = None) -> Tuple[np.ndarray, List[RowError]]:
+        # NaN is accepted in FLOAT columns, matching single vector
+        # validation. integer columns require finite values
+        if invalid is None:
+            invalid = np.zeros(values.shape, dtype=bool)
+        if self._int_columns.any():
+            invalid[:, self._int_columns] |= ~np.isfinite(values[:, self._int_columns])
+
+        errors = []
+        for row in np.flatnonzero(invalid.any(axis=1))[:max_errors]:
+            columns = [self.columns[i] for i in np.flatnonzero(invalid[row])]
+            errors.append(RowError(row=int(row), columns=columns))
+        return np.ascontiguousarray(values, dtype=np.float32), errors
+
+
+SCHEMA_CACHE = OrderedDict()
+SCHEMA_CACHE_LOCK = threading.Lock()
+
+
+def get_compiled_schema(model_id: UUID, version: int, name: str, schema: Dict[str, dict]) -> CompiledSchema:
+    """Function used to retrieve compiled schema of a
+    model. Schemas are compiled on first use and cached
+    per model version
+
+    Args:
+        model_id (UUID): ID of model
+        version (int): version of model
+        name (str): name of schema i.e. input_schema or
+            output_schema
+        schema (Dict[str, dict]): raw model schema
+
+    Returns:
+        CompiledSchema: compiled schema
+    """
+
+    key = (str(model_id), version, name)
+    with SCHEMA_CACHE_LOCK:
+        compiled = SCHEMA_CACHE.get(key)
+        if compiled is not None:
+            SCHEMA_CACHE.move_to_end(key)
+            return compiled
+
+    compiled = CompiledSchema(schema)
+    with SCHEMA_CACHE_LOCK:
+        SCHEMA_CACHE[key] = compiled
+        while len(SCHEMA_CACHE) > SCHEMA_CACHE_MAX_ENTRIES:
+            SCHEMA_CACHE.popitem(last=False)
+    return compiled
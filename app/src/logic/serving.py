@@ -0,0 +1,363 @@
+"""Module containing code used to convert uploaded Keras models
+into optimized serving artifacts (SavedModel or TFLite) and to
+load them for inference. Serving artifacts are loaded without
+rebuilding the Keras model in python, reducing load time, memory
+usage and inference overhead"""
+
+import asyncio
+import functools
+import io
+import logging
+import os
+import tarfile
+import tempfile
+import threading
+from typing import BinaryIO, NamedTuple, Union
+from uuid import UUID
+
+import numpy as np
+
+from src.config import SERVING_FORMAT
+from src.executors import run_in_stage, Stage
+from src.metrics import observe_stage, S3_FETCH_STAGE
+from src.logic.tensor import load_network, trace_network, get_network_size
+from src.logic.cache import MODEL_CACHE
+from src.logic.access import ACCESS_RECORDER
+from src.logic.singleflight import SingleFlight
+from src.persistence.s3 import retrieve_s3_file, retrieve_s3_file_with_metadata, upload_s3_file, \
+    delete_s3_file, MODEL_VERSION_METADATA
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+SAVEDMODEL_FORMAT = 'savedmodel'
+TFLITE_FORMAT = 'tflite'
+SERVING_FORMATS = [SAVEDMODEL_FORMAT, TFLITE_FORMAT]
+
+SERVING_EXTENSIONS = {
+    SAVEDMODEL_FORMAT: 'savedmodel.tar',
+    TFLITE_FORMAT: 'tflite'
+}
+
+# name of the input of exported signatures. loaded signatures
+# only accept inputs as keyword arguments
+SERVING_INPUT_NAME = 'inputs'
+
+
+def get_serving_path(model_id: UUID, version: int, serving_format: str) -> str:
+    """Function used to generate S3 path of serving
+    artifact for a given model version
+
+    Args:
+        model_id (UUID): ID of model
+        version (int): version of model
+        serving_format (str): savedmodel or tflite
+
+    Returns:
+        str: S3 path of serving artifact
+    """
+
+    return '/tensor-trigger/serving/{}/{}.{}'.format(model_id, version, SERVING_EXTENSIONS[serving_format])
+
+
+class SavedModelNetwork:
+    """Wrapper around the concrete inference signature of
+    a SavedModel, exposing the predict interface of a Keras
+    model
+
+    Arguments:
+        loaded: SavedModel loaded via tf.saved_model.load
+    """
+
+    def __init__(self, loaded):
+        self._loaded = loaded
+        self._signature = loaded.signatures['serving_default']
+        self.nbytes = sum(int(np.prod(v.shape)) * v.dtype.size for v in loaded.variables)
+
+    def predict(self, inputs: np.ndarray) -> np.ndarray:
+        import tensorflow as tf
+
+        outputs = self._signature(**{SERVING_INPUT_NAME: tf.constant(inputs, dtype=tf.float32)})
+        return next(iter(outputs.values())).numpy()
+
+
+class TFLiteNetwork:
+    """Wrapper around a TFLite interpreter, exposing the
+    predict interface of a Keras model. Interpreters are not
+    thread safe, so calls are serialized
+
+    Arguments:
+        content: bytes TFLite flatbuffer
+    """
+
+    def __init__(self, content: bytes):
+        import tensorflow as tf
+
+        self._interpreter = tf.lite.Interpreter(model_content=content)
+        self._input = self._interpreter.get_input_details()[0]['index']
+        self._output = self._interpreter.get_output_details()[0]['index']
+        self._batch_size = None
+        self._lock = threading.Lock()
+        self.nbytes = len(content)
+
+    def predict(self, inputs: np.ndarray) -> np.ndarray:
+        inputs = np.ascontiguousarray(inputs, dtype=np.float32)
+        with self._lock:
+            # input tensors are only resized when the
+            # batch size changes between calls
+            if inputs.shape[0] != self._batch_size:
+                self._interpreter.resize_tensor_input(self._input, inputs.shape)
+                self._interpreter.allocate_tensors()
+                self._batch_size = inputs.shape[0]
+            self._interpreter.set_tensor(self._input, inputs)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output).copy()
+
+
+def convert_network(network, serving_format: str) -> bytes:
+    """Function used to convert loaded Keras model into
+    a serving artifact. SavedModels are exported with a
+    concrete float32 signature matching the model input
+    shape and packed into a tar archive
+
+    Args:
+        network: loaded Keras model
+        serving_format (str): savedmodel or tflite
+
+    Returns:
+        bytes: serving artifact
+    """
+
+    import tensorflow as tf
+
+    spec = tf.TensorSpec([None, *network.input_shape[1:]], tf.float32, name=SERVING_INPUT_NAME)
+    signature = tf.function(lambda inputs: {'outputs': network(inputs, training=False)}, input_signature=[spec])
+
+    if serving_format == TFLITE_FORMAT:
+        converter = tf.lite.TFLiteConverter.from_concrete_functions([signature.get_concrete_function()])
+        return converter.convert()
+
+    if serving_format == SAVEDMODEL_FORMAT:
+        with tempfile.TemporaryDirectory() as directory:
+            tf.saved_model.save(network, directory, signatures=signature.get_concrete_function())
+            buffer = io.BytesIO()
+            with tarfile.open(fileobj=buffer, mode='w') as archive:
+                archive.add(directory, arcname='.')
+            return buffer.getvalue()
+
+    raise ValueError('invalid serving format {}'.format(serving_format))
+
+
+def load_serving_network(content: Union[bytes, io.BytesIO], serving_format: str):
+    """Function used to load serving artifact
+
+    Args:
+        content (Union[bytes, io.BytesIO]): serving artifact
+        serving_format (str): savedmodel or tflite
+
+    Returns:
+        SavedModelNetwork or TFLiteNetwork
+    """
+
+    if isinstance(content, io.BytesIO):
+        content = content.getvalue()
+
+    if serving_format == TFLITE_FORMAT:
+        return TFLiteNetwork(content)
+
+    if serving_format == SAVEDMODEL_FORMAT:
+        import tensorflow as tf
+
+        with tempfile.TemporaryDirectory() as directory:
+            with tarfile.open(fileobj=io.BytesIO(content), mode='r') as archive:
+                for member in archive.getmembers():
+                    # archives are generated by the API, but reject any
+                    # member that would be extracted outside the directory
+                    path = os.path.realpath(os.path.join(directory, member.name))
+                    if not path.startswith(os.path.realpath(directory)):
+                        raise ValueError('invalid path {} in serving artifact'.format(member.name))
+                archive.extractall(directory)
+            # variables are read into memory on load, meaning that
+            # the directory can be removed once loaded
+            return SavedModelNetwork(tf.saved_model.load(directory))
+
+    raise ValueError('invalid serving format {}'.format(serving_format))
+
+
+def is_serving_enabled() -> bool:
+    return SERVING_FORMAT in SERVING_FORMATS
+
+
+async def get_serving_network(model_id: UUID, version: int):
+    """Function used to load the serving artifact of a
+    given model version. None is returned if serving
+    artifacts are disabled, or if no artifact has been
+    generated for the version
+
+    Args:
+        model_id (UUID): ID of model
+        version (int): version of model
+
+    Returns:
+        loaded serving network or None
+    """
+
+    if not is_serving_enabled():
+        return None
+
+    from botocore.exceptions import ClientError
+
+    with observe_stage(S3_FETCH_STAGE, model_id):
+        try:
+            content = await run_in_stage(Stage.S3, retrieve_s3_file, get_serving_path(model_id, version, SERVING_FORMAT))
+        except ClientError as err:
+            # missing artifacts are expected, and are
+            # not counted as failed fetches
+            if err.response.get('Error', {}).get('Code') not in ('404', 'NoSuchKey'):
+                raise
+            content = None
+    if content is None:
+        return None
+
+    try:
+        return await run_in_stage(Stage.COMPUTE, load_serving_network, content, SERVING_FORMAT)
+    except Exception:
+        LOGGER.exception('unable to load serving artifact of model %s version %s', model_id, version)
+    return None
+
+
+async def build_serving_artifact(model_id: UUID, version: int, model_file: BinaryIO) -> bool:
+    """Function used to convert a model version into a
+    serving artifact and upload it to S3. The serving
+    artifact of the previous version is removed
+
+    Args:
+        model_id (UUID): ID of model
+        version (int): version of model
+        model_file (BinaryIO): HD5 file of the model, which is
+            closed once loaded. A separate copy of the model is
+            loaded for conversion, since networks used for
+            inference are traced concurrently
+
+    Returns:
+        bool: True if artifact was generated else False
+    """
+
+    try:
+        with model_file:
+            model_file.seek(0)
+            network = await run_in_stage(Stage.COMPUTE, load_network, model_file)
+        artifact = await run_in_stage(Stage.COMPUTE, convert_network, network, SERVING_FORMAT)
+        path = get_serving_path(model_id, version, SERVING_FORMAT)
+        await run_in_stage(Stage.S3, upload_s3_file, io.BytesIO(artifact), path)
+        LOGGER.info('generated %s serving artifact for model %s version %s (%s bytes)',
+                    SERVING_FORMAT, model_id, version, len(artifact))
+    except Exception:
+        LOGGER.exception('unable to generate serving artifact for model %s version %s', model_id, version)
+        return False
+
+    if version > 1:
+        await delete_serving_artifact(model_id, version - 1)
+    return True
+
+
+async def delete_serving_artifact(model_id: UUID, version: int):
+    """Function used to delete the serving artifact of
+    a model version, if present
+
+    Args:
+        model_id (UUID): ID of model
+        version (int): version of model
+    """
+
+    if not is_serving_enabled():
+        return
+    try:
+        await run_in_stage(Stage.S3, delete_s3_file, get_serving_path(model_id, version, SERVING_FORMAT))
+    except Exception:
+        LOGGER.exception('unable to delete serving artifact of model %s version %s', model_id, version)
+
+
+CONVERSION_TASKS = {}
+
+
+def schedule_serving_conversion(model_id: UUID, version: int, model_file: BinaryIO):
+    """Function used to generate serving artifact of a
+    model version in the background. Conversions already
+    in progress for the same version are not repeated.
+    Must be called from the event loop
+
+    Args:
+        model_id (UUID): ID of model
+        version (int): version of model
+        model_file (BinaryIO): HD5 file of the model. The
+            conversion takes ownership of the file and closes it
+    """
+
+    key = (str(model_id), version)
+    if not is_serving_enabled() or key in CONVERSION_TASKS:
+        model_file.close()
+        return
+
+    task = asyncio.ensure_future(build_serving_artifact(model_id, version, model_file))
+    CONVERSION_TASKS[key] = task
+    task.add_done_callback(lambda _: CONVERSION_TASKS.pop(key, None))
+
+
+MODEL_LOADS = SingleFlight('model load')
+
+
+async def _load_model_version(model_meta: NamedTuple):
+    # serving artifacts are preferred over the hd5 file of the model
+    network = await get_serving_network(model_meta.model_id, model_meta.version)
+    if network is None:
+        # retrieve hd5 file from s3 storage and load tensorflow model
+        with observe_stage(S3_FETCH_STAGE, model_meta.model_id):
+            s3_data, metadata = await run_in_stage(Stage.S3, retrieve_s3_file_with_metadata,
+                                                   '/tensor-trigger/' + str(model_meta.model_id))
+        # retrained models are uploaded before the version is incremented,
+        # meaning that the file can belong to another version. files are only
+        # converted if labelled with the version (or unlabelled, if uploaded
+        # before files were labelled)
+        file_version = metadata.get(MODEL_VERSION_METADATA)
+        if file_version is None or file_version == str(model_meta.version):
+            schedule_serving_conversion(model_meta.model_id, model_meta.version, io.BytesIO(s3_data.getvalue()))
+        else:
+            LOGGER.info('not converting model %s version %s: file belongs to version %s',
+                        model_meta.model_id, model_meta.version, file_version)
+        network = await run_in_stage(Stage.COMPUTE, load_network, s3_data)
+        network = await run_in_stage(Stage.COMPUTE, trace_network, network, model_meta.input_shape)
+    MODEL_CACHE.put(model_meta.model_id,
+                    model_meta.version,
+                    network,
+                    get_network_size(network, model_meta.size))
+    return network
+
+
+async def get_network(model_meta: NamedTuple, record_access: bool = True):
+    """Function used to retrieve loaded tensorflow
+    model from the model cache. Models are downloaded
+    from S3 and inserted into the cache on cache miss.
+    The serving artifact of the model is preferred if
+    present, and is otherwise generated in the background.
+    Concurrent cache misses for the same model version
+    share a single download and load
+
+    Args:
+        model_meta (NamedTuple): model metadata from postgres
+        record_access (bool): count call as an access of the
+            model if True
+
+    Returns:
+        loaded tensorflow model
+    """
+
+    if record_access:
+        ACCESS_RECORDER.record(model_meta.model_id)
+    network = MODEL_CACHE.get(model_meta.model_id, model_meta.version)
+    if network is None:
+        LOGGER.debug('model cache miss for model %s version %s', model_meta.model_id, model_meta.version)
+        key = (str(model_meta.model_id), model_meta.version)
+        network = await MODEL_LOADS.do(key, functools.partial(_load_model_version, model_meta))
+    return network
@@ -0,0 +1,99 @@
+"""Module containing code used to coalesce concurrent
+calls of expensive operations (e.g. model loads) for the
+same key into a single call, the result of which is shared
+between all callers"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Class used to ensure that only one call per key is
+    in flight at any time. Callers arriving while a call is
+    in flight await the result of the existing call instead
+    of starting a new one. Exceptions raised by the call are
+    propagated to all callers. The call runs in a separate
+    task, meaning that it is not cancelled if the caller that
+    started it is cancelled. Must be used from the event loop
+
+    Arguments:
+        name: str name of operation used in log messages
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+        self._calls = {}
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.duration_total = 0.0
+        self.duration_max = 0.0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Function used to run a call for a given key, or
+        to wait for the result of the call already in flight
+
+        Args:
+            key (Hashable): key used to coalesce calls
+            func (Callable[[], Awaitable[Any]]): coroutine
+                function run if no call is in flight
+
+        Returns:
+            Any: result of call
+        """
+
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(key, func))
+            # retrieve exception even if all callers have been
+            # cancelled, preventing unretrieved exception warnings
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._calls[key] = task
+        else:
+            self.coalesced += 1
+            LOGGER.debug('waiting for in-flight %s of %s', self.name, key)
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.perf_counter()
+        try:
+            return await func()
+        except BaseException:
+            self.failures += 1
+            raise
+        finally:
+            # remove call before waiters are woken up, meaning
+            # that any later caller starts a fresh call
+            self._calls.pop(key, None)
+            duration = time.perf_counter() - start
+            with self._lock:
+                self.calls += 1
+                self.duration_total += duration
+                self.duration_max = max(self.duration_max, duration)
+            LOGGER.info('completed %s of %s in %.3fs', self.name, key, duration)
+
+    def stats(self) -> dict:
+        """Function used to generate statistics of
+        coalesced calls
+
+        Returns:
+            dict: dict containing call counters and timings
+        """
+
+        with self._lock:
+            return {'calls': self.calls,
+                    'coalesced': self.coalesced,
+                    'failures': self.failures,
+                    'in_flight': len(self._calls),
+                    'duration_total': self.duration_total,
+                    'duration_max': self.duration_max,
+                    'duration_mean': self.duration_total / self.calls if self.calls else 0}
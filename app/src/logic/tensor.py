@@ -2,22 +2,29 @@
 
 import logging
 import io
-from typing import Dict, Any, Union, List
+import csv
+from typing import Dict, Union, List
 from collections import namedtuple
 
-import h5py
 import numpy as np
-import pandas as pd
-from tensorflow.keras.models import load_model
+
+from src.models.models import ALLOWED_TYPES
+from src.config import DIRECT_CALL_MAX_BATCH
 
 
 LOGGER = logging.getLogger(__name__)
 
 
-ALLOWED_TYPES = [
-    'INT',
-    'FLOAT'
-]
+def import_tensorflow():
+    """Function used to import tensorflow. Tensorflow
+    takes several seconds to import, and is therefore only
+    imported on first use (or during warm-up) rather than
+    when the API starts
+    """
+
+    import h5py
+    from tensorflow.keras.models import load_model
+    return h5py, load_model
 
 
 def is_valid_model_schema(schema: Dict[str, str]) -> bool:
@@ -33,40 +40,6 @@ def is_valid_model_schema(schema: Dict[str, str]) -> bool:
     return all(s.upper() in ALLOWED_TYPES for s in schema.values())
 
 
-TYPE_CONVERTORS = {
-    'INT': lambda x: int(x),
-    'FLOAT': lambda x: float(x)
-}
-
-def validate_data_point(data: Dict[str, Any], schema: Dict[str, str]) -> bool:
-    """Function used to validate input data
-    against a given schema
-
-    Args:
-        data (Dict[str, Any]): [description]
-        schema (Dict[str, str]): [description]
-
-    Returns:
-        bool: [description]
-    """
-
-    for key, item in schema.items():
-        if key not in data:
-            return False
-        # get convertor based on data type
-        # and attempt to cast to specified
-        # type. Return false if data point
-        # cannot be verified
-        var_type = item.get('var_type')
-        convertor = TYPE_CONVERTORS.get(var_type.upper())
-        try:
-            convertor(data[key])
-        except Exception:
-            LOGGER.exception('unable to cast value %s to type %s', data[key], var_type)
-            return False
-    return True
-
-
 def _get_expected_input_shape(model) -> int:
     """Function used to extract the expected
     input shape from a tensorflow model
@@ -115,8 +88,7 @@ def validate_upload_content(content: io.BytesIO, schema: Dict[str, str]):
     """
 
     try:
-        with h5py.File(content, 'r') as h5file:
-            model = load_model(h5file)
+        model = load_network(content)
         # determine expected input length from model and
         # raise exception is schema does not fit expected
         # length
@@ -140,141 +112,158 @@ def validate_upload_content(content: io.BytesIO, schema: Dict[str, str]):
         raise
 
 
-def _format_input_vector(input_vector: Dict[str, str], schema: Dict[str, dict]) -> np.ndarray:
-    """Function used to format input vector
-    into required shape and size
+def _format_output_vector(results: np.ndarray, output_schema: Dict[str, str]) -> List[dict]:
+    """Function used to format output vectors
+    into required format
+
+    Args:
+        results (np.ndarray): [description]
+        output_schema (Dict[str, str]): [description]
+
+    Returns:
+        List[dict]: [description]
+    """
+
+    # outputs are named in index order, matching batch outputs
+    keys = [name for name, _ in sorted(output_schema.items(), key=lambda item: item[1]['index'])]
+    return [dict(zip(keys, result_set)) for result_set in results]
+
+
+def load_network(model_file: io.BytesIO):
+    """Function used to load tensorflow model
+    from HD5 file contents
 
     Args:
-        input (Dict[str, str]): [description]
+        model_file (io.BytesIO): file content
 
     Returns:
-        np.ndarray: [description]
+        tensorflow model loaded from file
     """
 
-    flattened_schema = [{'name': k, 'var_type': v['var_type'], 'index': v['index']}
-                         for k, v in schema.items()]
-    # sort schema by index to ensure that data values are inserted in
-    # correct order into model
-    sorted_schema = sorted(flattened_schema, key=lambda row: row['index'])
+    h5py, load_model = import_tensorflow()
+    with h5py.File(model_file, 'r') as h5file:
+        return load_model(h5file)
+
+
+class TracedNetwork:
+    """Wrapper around a loaded Keras model used to run small
+    batches through a traced tf.function with a fixed input
+    signature, avoiding the per-call overhead of predict
+    (tf.data pipeline and callbacks). The function is traced
+    once when the wrapper is created. Batches larger than
+    max_direct_batch are run via predict, which splits the
+    inputs into smaller batches
+
+    Arguments:
+        network: loaded Keras model
+        input_shape: int number of model inputs
+        max_direct_batch: int largest batch run via the
+            traced function
+    """
 
-    # construct sorted input vector
-    sorted_input_vector = []
-    for item in sorted_schema:
-        var_name = item['name']
-        sorted_input_vector.append(input_vector[var_name])
+    def __init__(self, network, input_shape: int, max_direct_batch: int):
+        import tensorflow as tf
 
-    # transform into array and reshape to be 2 dimensional
-    array = np.array(sorted_input_vector)
-    return array.reshape(-1, len(schema.keys()))
+        self.network = network
+        self.max_direct_batch = max_direct_batch
+        spec = tf.TensorSpec([None, input_shape], tf.float32)
+        self._function = tf.function(lambda inputs: network(inputs, training=False), input_signature=[spec])
+        self._function.get_concrete_function()
 
+    def predict(self, inputs: np.ndarray) -> np.ndarray:
+        if len(inputs) > self.max_direct_batch:
+            return self.network.predict(inputs)
+        return self._function(np.asarray(inputs, dtype=np.float32)).numpy()
 
-def _format_output_vector(results: np.ndarray, output_schema: Dict[str, str]) -> List[dict]:
-    """Function used to format output vectors
-    into required format
+    def get_weights(self) -> List[np.ndarray]:
+        return self.network.get_weights()
+
+
+def trace_network(network, input_shape: Union[int, None] = None, max_direct_batch: int = DIRECT_CALL_MAX_BATCH):
+    """Function used to wrap loaded Keras model in a
+    traced inference function. The input shape stored with
+    the model metadata is used if provided, and is otherwise
+    read from the model
 
     Args:
-        results (np.ndarray): [description]
-        output_schema (Dict[str, str]): [description]
+        network: loaded Keras model
+        input_shape (Union[int, None]): number of model inputs
+        max_direct_batch (int): largest batch run via the
+            traced function
 
     Returns:
-        List[dict]: [description]
+        TracedNetwork: wrapped model
     """
 
-    formatted_results = []
-    for result_set in results:
-        subset = {}
-        for k, v in zip(output_schema.keys(), result_set):
-            subset[k] = v
-        formatted_results.append(subset)
-    return formatted_results
+    if input_shape is None:
+        input_shape = _get_expected_input_shape(network)
+    return TracedNetwork(network, input_shape, max_direct_batch)
 
 
-def run_model(model_file: io.BytesIO,
-              input_vector: Dict[str, float],
-              input_schema: Dict[str, dict],
-              output_schema: Dict[str, str]) -> Union[float, None]:
-    """Function used to run model via model
-    file
+def get_network_size(network, default: int = 0) -> int:
+    """Function used to estimate the in-memory
+    size of a loaded tensorflow model
 
     Args:
-        model_file (io.BytesIO): file content
+        network: loaded tensorflow model
+        default (int): size returned if weights cannot
+            be inspected
 
     Returns:
-        float: [description]
+        int: estimated size of model weights in bytes
     """
 
     try:
-        with h5py.File(model_file, 'r') as h5file:
-            network = load_model(h5file)
-        # get run results from model. note that
-        # the input vector is cast to the format
-        # required by the model schema
-        input_vector = _format_input_vector(input_vector, input_schema)
-        results = network.predict(input_vector)
-
-        formatted_results = _format_output_vector(results.tolist(), output_schema)
-        print(formatted_results)
-        return formatted_results[0] if results.shape[0] > 0 else None
+        # serving networks report their size directly
+        if hasattr(network, 'nbytes'):
+            return network.nbytes
+        return sum(w.nbytes for w in network.get_weights())
     except Exception:
-        LOGGER.exception('unable to run model with input vector %s', input_vector)
+        LOGGER.exception('unable to determine size of model')
+    return default
 
 
-def _format_input_vector_batch(input_vectors: Dict[str, str], schema: Dict[str, dict]) -> np.ndarray:
-    """Function used to format input vector
-    into required shape and size
+def run_model(network,
+              inputs: np.ndarray,
+              output_schema: Dict[str, str]) -> Union[float, None]:
+    """Function used to run loaded model
+    against a single input vector
 
     Args:
-        input (Dict[str, str]): [description]
+        network: loaded tensorflow model
+        inputs (np.ndarray): input vector cast to the
+            format required by the model schema
 
     Returns:
-        np.ndarray: [description]
+        float: [description]
     """
 
-    flattened_schema = [{'name': k, 'var_type': v['var_type'], 'index': v['index']}
-                         for k, v in schema.items()]
-    # sort schema by index to ensure that data values are inserted in
-    # correct order into model
-    sorted_schema = sorted(flattened_schema, key=lambda row: row['index'])
-
-    def sort_input_vector(v: dict) -> dict:
-        # construct sorted input vector
-        sorted_input_vector = []
-        for item in sorted_schema:
-            var_name = item['name']
-            sorted_input_vector.append(v[var_name])
-        return sorted_input_vector
-
-    batch = [sort_input_vector(v) for v in input_vectors]
-    # transform into array and reshape to be 2 dimensional
-    array = np.array(batch)
-    return array.reshape(-1, len(schema.keys()))
-
-
-def run_model_batched(model_file: io.BytesIO,
-                      input_vectors: Dict[str, float],
-                      input_schema: Dict[str, dict],
-                      output_schema: Dict[str, dict]) -> Union[float, None]:
-    """Function used to run model via model
-    file
+    try:
+        results = network.predict(inputs)
+
+        formatted_results = _format_output_vector(results.tolist(), output_schema)
+        return formatted_results[0] if results.shape[0] > 0 else None
+    except Exception:
+        LOGGER.exception('unable to run model with input vector %s', inputs)
+
+
+def run_model_batched(network, inputs: np.ndarray) -> Union[np.ndarray, None]:
+    """Function used to run loaded model
+    against a batch of input vectors
 
     Args:
-        model_file (io.BytesIO): file content
+        network: loaded tensorflow model
+        inputs (np.ndarray): input vectors cast to the
+            format required by the model schema
 
     Returns:
-        float: [description]
+        Union[np.ndarray, None]: array of model outputs
+            else None
     """
 
     try:
-        with h5py.File(model_file, 'r') as h5file:
-            network = load_model(h5file)
-        # get run results from model. note that
-        # the input vector is cast to the format
-        # required by the model schema
-        input_vectors = _format_input_vector_batch(input_vectors, input_schema)
-        results = network.predict(input_vectors)
-
-        formatted_results = _format_output_vector(results.tolist(), output_schema)
-        return formatted_results if results.shape[0] > 0 else None
+        results = network.predict(inputs)
+        return results if results.shape[0] > 0 else None
     except Exception:
         LOGGER.exception('unable to run model with input vectors')
 
@@ -292,6 +281,8 @@ def validate_csv_file(contents: io.BytesIO, schema: Dict[str, dict]) -> bool:
         bool: [description]
     """
 
+    import pandas as pd
+
     try:
         df = pd.read_csv(contents, header=0)
         # get columns from dataframe
@@ -303,4 +294,30 @@ def validate_csv_file(contents: io.BytesIO, schema: Dict[str, dict]) -> bool:
 
     except Exception:
         LOGGER.exception('unable to parse CSV file into dataframe')
-    return False
\ No newline at end of file
+    return False
+
+
+def validate_csv_header(header: bytes, schema: Dict[str, dict]) -> bool:
+    """Function used to validate the header row of
+    CSV input for batch processing. Used to validate
+    streamed uploads before the full file is received
+
+    Args:
+        header (bytes): first line of CSV file
+        schema (Dict[str, dict]): model schema to use
+            for validation
+
+    Returns:
+        bool: True if header matches schema else False
+    """
+
+    try:
+        cols = next(csv.reader([header.decode('utf-8-sig').rstrip('\r\n')]))
+        if any(key not in schema for key in cols):
+            return False
+
+        return len(cols) == len(schema)
+
+    except Exception:
+        LOGGER.exception('unable to parse CSV header')
+    return False
@@ -0,0 +1,131 @@
+"""Module containing code used to stream file uploads sent
+as multipart/form-data or raw request bodies"""
+
+import logging
+from typing import AsyncIterator, Dict
+
+from fastapi import Request
+from multipart.multipart import MultipartParser, parse_options_header
+
+from src.config import UPLOAD_MAX_FIELD_BYTES
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+MULTIPART_CONTENT_TYPE = 'multipart/form-data'
+
+
+class InvalidUploadException(Exception):
+    """Exception raised when an upload cannot
+    be parsed"""
+
+
+class StreamingUpload:
+    """Class used to stream the contents of a single file
+    from a request without buffering the request body. If the
+    request is sent as multipart/form-data, the contents of
+    the part with the given field name are streamed, and all
+    other (non-file) parts are collected into the fields dict.
+    Any other request body is streamed as is
+
+    Arguments:
+        request: Request FastAPI request instance
+        field_name: str name of multipart field containing
+            the file
+    """
+
+    def __init__(self, request: Request, field_name: str):
+        self.request = request
+        self.field_name = field_name
+        self.fields: Dict[str, str] = {}
+        self.size = 0
+
+        content_type, self._options = parse_options_header(request.headers.get('content-type', ''))
+        self.is_multipart = content_type.decode('latin-1').lower() == MULTIPART_CONTENT_TYPE
+
+        self._chunks = []
+        self._part_name = None
+        self._part_data = bytearray()
+        self._headers = {}
+        self._header_field = b''
+        self._header_value = b''
+        self._found = False
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Function used to iterate over the chunks
+        of the uploaded file as they are received
+
+        Returns:
+            AsyncIterator[bytes]: iterator of file chunks
+        """
+
+        if not self.is_multipart:
+            async for chunk in self.request.stream():
+                if chunk:
+                    self.size += len(chunk)
+                    yield chunk
+            return
+
+        boundary = self._options.get(b'boundary')
+        if not boundary:
+            raise InvalidUploadException('missing multipart boundary')
+
+        callbacks = {'on_part_begin': self._on_part_begin,
+                     'on_part_data': self._on_part_data,
+                     'on_part_end': self._on_part_end,
+                     'on_header_field': self._on_header_field,
+                     'on_header_value': self._on_header_value,
+                     'on_header_end': self._on_header_end,
+                     'on_headers_finished': self._on_headers_finished}
+        parser = MultipartParser(boundary, callbacks)
+        async for data in self.request.stream():
+            parser.write(data)
+            # yield file data parsed from the current request
+            # chunk before reading the next one
+            chunks, self._chunks = self._chunks, []
+            for chunk in chunks:
+                self.size += len(chunk)
+                yield chunk
+        parser.finalize()
+
+        if not self._found:
+            raise InvalidUploadException('missing multipart field {}'.format(self.field_name))
+
+    def _on_part_begin(self):
+        self._part_name = None
+        self._part_data.clear()
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b''
+        self._header_value = b''
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b'content-disposition', b''))
+        self._part_name = options.get(b'name', b'').decode('latin-1')
+        if self._part_name == self.field_name:
+            self._found = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._part_name == self.field_name:
+            self._chunks.append(data[start:end])
+        elif self._part_name is None:
+            return
+        elif len(self._part_data) + end - start <= UPLOAD_MAX_FIELD_BYTES:
+            self._part_data.extend(data[start:end])
+        else:
+            LOGGER.warning('discarding multipart field %s: size exceeds %s bytes', self._part_name, UPLOAD_MAX_FIELD_BYTES)
+            self._part_name = None
+
+    def _on_part_end(self):
+        if self._part_name is not None and self._part_name != self.field_name:
+            self.fields[self._part_name] = self._part_data.decode('utf-8')
+        self._part_data.clear()
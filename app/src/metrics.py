@@ -0,0 +1,202 @@
+"""Module containing prometheus metrics used to instrument
+the API. Requests are timed per route by an ASGI middleware,
+and the stages of inference requests (postgres lookup, S3
+fetch, model load, formatting, predict and serialization)
+are timed per route and model. Statistics already tracked
+by the caches and pools are exported at scrape time, meaning
+that they add no overhead to requests"""
+
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict
+
+from prometheus_client import Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from starlette.routing import Match
+
+from src.config import METRICS_MODEL_LABEL
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+LATENCY_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PAYLOAD_BUCKETS = tuple(2 ** i for i in range(6, 31, 2))
+
+REQUEST_LATENCY = Histogram('tensor_trigger_request_seconds',
+                            'Latency of HTTP requests',
+                            ['route', 'method', 'status'],
+                            buckets=LATENCY_BUCKETS)
+PAYLOAD_SIZE = Histogram('tensor_trigger_payload_bytes',
+                         'Size of HTTP request and response bodies',
+                         ['route', 'direction'],
+                         buckets=PAYLOAD_BUCKETS)
+STAGE_LATENCY = Histogram('tensor_trigger_stage_seconds',
+                          'Latency of request stages',
+                          ['route', 'model', 'stage'],
+                          buckets=LATENCY_BUCKETS)
+STAGE_ERRORS = Counter('tensor_trigger_stage_errors',
+                       'Number of request stages that raised an exception',
+                       ['route', 'model', 'stage'])
+
+# route template of the request being served. set by the
+# metrics middleware and read when stages are observed
+CURRENT_ROUTE = ContextVar('tensor_trigger_route', default='')
+
+# labelled histograms are cached, since resolving labels
+# is considerably slower than observing a value
+STAGE_CHILDREN = {}
+
+DB_LOOKUP_STAGE = 'db_lookup'
+S3_FETCH_STAGE = 's3_fetch'
+MODEL_LOAD_STAGE = 'model_load'
+INPUT_FORMAT_STAGE = 'input_format'
+PREDICT_STAGE = 'predict'
+OUTPUT_FORMAT_STAGE = 'output_format'
+SERIALIZATION_STAGE = 'serialization'
+
+
+class observe_stage:
+    """Context manager used to time a stage of the
+    current request. Stages that raise an exception
+    are counted as errors
+
+    Arguments:
+        stage: str name of stage
+        model: ID of model used by request
+    """
+
+    __slots__ = ('_labels', '_start')
+
+    def __init__(self, stage: str, model=None):
+        model = str(model) if METRICS_MODEL_LABEL and model is not None else ''
+        self._labels = (CURRENT_ROUTE.get(), model, stage)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        child = STAGE_CHILDREN.get(self._labels)
+        if child is None:
+            child = STAGE_CHILDREN[self._labels] = STAGE_LATENCY.labels(*self._labels)
+        child.observe(duration)
+        if exc_type is not None:
+            STAGE_ERRORS.labels(*self._labels).inc()
+        return False
+
+
+class MetricsMiddleware:
+    """ASGI middleware used to record latency, status and
+    payload sizes of HTTP requests. Requests are labelled
+    with the path template of the matching route, meaning
+    that IDs in paths do not create new label values
+
+    Arguments:
+        app: ASGI application
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _get_route(self, scope: dict) -> str:
+        router = scope['app'].router
+        for route in router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, 'path', '')
+        return 'unmatched'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        route = self._get_route(scope)
+        token = CURRENT_ROUTE.set(route)
+        start = time.perf_counter()
+        response = {'status': 500, 'size': 0}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            elif message['type'] == 'http.response.body':
+                response['size'] += len(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_LATENCY.labels(route, scope['method'], str(response['status'])).observe(time.perf_counter() - start)
+            for name, value in scope['headers']:
+                if name == b'content-length':
+                    PAYLOAD_SIZE.labels(route, 'request').observe(int(value))
+                    break
+            PAYLOAD_SIZE.labels(route, 'response').observe(response['size'])
+            CURRENT_ROUTE.reset(token)
+
+
+# statistics that only ever increase are exported as
+# counters. all other statistics are exported as gauges
+COUNTER_STATS = {'hits', 'misses', 'evictions', 'invalidations', 'calls', 'coalesced', 'failures',
+                 'acquired', 'timeouts', 'recycled', 'batches', 'requests', 'duration_total', 'wait_time_total'}
+
+
+class StatsCollector:
+    """Prometheus collector used to export the statistics
+    of caches, pools and schedulers at scrape time
+
+    Arguments:
+        sources: Dict[str, Callable[[], dict]] functions used
+            to generate statistics keyed by source name
+    """
+
+    def __init__(self, sources: Dict[str, Callable[[], dict]]):
+        self.sources = sources
+
+    def collect(self):
+        for source, get_stats in self.sources.items():
+            try:
+                stats = get_stats()
+            except Exception:
+                LOGGER.exception('unable to collect %s stats', source)
+                continue
+
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = 'tensor_trigger_{}_{}'.format(source, key)
+                if key in COUNTER_STATS:
+                    yield CounterMetricFamily(name, '{} {}'.format(source, key), value=value)
+                else:
+                    yield GaugeMetricFamily(name, '{} {}'.format(source, key), value=value)
+
+
+def register_stats(sources: Dict[str, Callable[[], dict]]) -> StatsCollector:
+    """Function used to export statistics via the
+    default prometheus registry
+
+    Args:
+        sources (Dict[str, Callable[[], dict]]): functions used
+            to generate statistics keyed by source name
+
+    Returns:
+        StatsCollector: registered collector
+    """
+
+    collector = StatsCollector(sources)
+    REGISTRY.register(collector)
+    return collector
+
+
+def render_metrics() -> tuple:
+    """Function used to render all metrics in the
+    prometheus text format
+
+    Returns:
+        tuple: rendered metrics and content type
+    """
+
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
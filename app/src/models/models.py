@@ -4,7 +4,11 @@ from typing import Dict, Literal
 
 from pydantic import BaseModel, validator
 
-from src.logic.tensor import ALLOWED_TYPES
+
+ALLOWED_TYPES = [
+    'INT',
+    'FLOAT'
+]
 
 
 class SchemaItem(BaseModel):
@@ -19,9 +23,13 @@ class ModelSchema(BaseModel):
     output_schema: Dict[str, SchemaItem]
 
 
-class ModelUploadRequest(BaseModel):
+class ModelMetadata(BaseModel):
 
     model_schema: ModelSchema
     model_name: str
     model_description: str
+
+
+class ModelUploadRequest(ModelMetadata):
+
     model_content: str
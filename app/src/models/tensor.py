@@ -10,6 +10,8 @@ class AsyncBatchProcessRequest(BaseModel):
 
     model_id: UUID
     input_data: str
+    # enables sampling profiler in worker
+    profile: bool = False
 
 
 class BatchProcessRequest(BaseModel):
@@ -18,6 +20,12 @@ class BatchProcessRequest(BaseModel):
     input_vectors: List[Dict[str, float]]
 
 
+class ColumnarBatchProcessRequest(BaseModel):
+
+    model_id: UUID
+    columns: Dict[str, list]
+
+
 class ProcessRequest(BaseModel):
 
     model_id: UUID
@@ -29,4 +37,6 @@ class TrainModelRequest(BaseModel):
     model_id: UUID
     epochs: int = 100
     input_vectors: List[Dict[str, float]]
-    output_vectors: List[Dict[str, float]]
\ No newline at end of file
+    output_vectors: List[Dict[str, float]]
+    # enables sampling profiler in worker
+    profile: bool = False
\ No newline at end of file
@@ -1,11 +1,16 @@
 import logging
 import json
+import select
+import threading
+import time
+from collections import deque
 from contextlib import contextmanager
 from enum import Enum
-from typing import NamedTuple, List, Union
+from typing import Callable, Dict, NamedTuple, List, Union
 from uuid import UUID, uuid4
 
 import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, quote_ident
 from psycopg2.extras import register_uuid, DictCursor, NamedTupleCursor
 from pydantic import BaseModel, SecretStr
 
@@ -27,6 +32,217 @@ class PostgresCredentials(BaseModel):
     PG_USER: str
     PG_PASSWORD: SecretStr
     PG_PORT: int = 5432
+    PG_POOL_MIN_SIZE: int = 1
+    PG_POOL_MAX_SIZE: int = 10
+    PG_POOL_TIMEOUT: float = 30.0
+    PG_POOL_MAX_IDLE: float = 300.0
+    PG_POOL_HEALTH_CHECK_INTERVAL: float = 30.0
+
+
+class PoolTimeoutError(Exception):
+    """Exception raised when no pooled connection
+    becomes available within the pool timeout"""
+
+
+class ConnectionPool:
+    """Thread safe pool of postgres connections. Connections
+    are health checked before being handed out if they have
+    been idle for longer than the health check interval, and
+    are recycled once idle for longer than the maximum idle time.
+    Callers block (up to the pool timeout) if all connections
+    are in use
+
+    Arguments:
+        credentials: PostgresCredentials connection and pool settings
+    """
+
+    def __init__(self, credentials: PostgresCredentials):
+        self.credentials = credentials
+        self.min_size = credentials.PG_POOL_MIN_SIZE
+        self.max_size = credentials.PG_POOL_MAX_SIZE
+
+        self._idle = deque()
+        self._condition = threading.Condition()
+        self._total = 0
+        self._in_use = 0
+
+        self.acquired = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+        for _ in range(self.min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._total += 1
+
+    def _connect(self):
+        connection = psycopg2.connect(
+            dbname=self.credentials.PG_DATABASE,
+            user=self.credentials.PG_USER,
+            host=self.credentials.PG_HOST,
+            password=self.credentials.PG_PASSWORD.get_secret_value(),
+            port=self.credentials.PG_PORT
+        )
+        register_uuid(conn_or_curs=connection)
+        return connection
+
+    def _is_healthy(self, connection, idle_time: float) -> bool:
+        if connection.closed:
+            return False
+        if idle_time < self.credentials.PG_POOL_HEALTH_CHECK_INTERVAL:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            LOGGER.warning('pooled postgres connection failed health check')
+            return False
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            LOGGER.exception('unable to close postgres connection')
+
+    def acquire(self):
+        """Function used to acquire connection from pool.
+        A new connection is opened if no idle connection is
+        available and the pool has not reached its max size
+
+        Returns:
+            psycopg2 connection
+        """
+
+        start = time.monotonic()
+        deadline = start + self.credentials.PG_POOL_TIMEOUT
+        with self._condition:
+            while not self._idle and self._total >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeoutError('no postgres connection available after {}s'.format(
+                        self.credentials.PG_POOL_TIMEOUT))
+                self._condition.wait(remaining)
+
+            if self._idle:
+                connection, last_used = self._idle.pop()
+            else:
+                connection, last_used = None, None
+                self._total += 1
+            self._in_use += 1
+
+            wait_time = time.monotonic() - start
+            self.acquired += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+        try:
+            if connection is not None:
+                idle_time = time.monotonic() - last_used
+                # recycle connections that have been idle for too long
+                # or that no longer respond to health checks
+                if idle_time > self.credentials.PG_POOL_MAX_IDLE or not self._is_healthy(connection, idle_time):
+                    self.recycled += 1
+                    self._discard(connection)
+                    connection = None
+
+            if connection is None:
+                connection = self._connect()
+            return connection
+        except Exception:
+            if connection is not None:
+                self._discard(connection)
+            # the slot was counted against the pool size, but no
+            # connection is handed out, meaning that it is released
+            with self._condition:
+                self._in_use -= 1
+                self._total -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, connection):
+        """Function used to return connection to pool. Any
+        open transaction is rolled back before the connection
+        is made available to other callers
+
+        Args:
+            connection: psycopg2 connection acquired from pool
+        """
+
+        healthy = not connection.closed
+        if healthy and connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                healthy = False
+
+        if not healthy:
+            self._discard(connection)
+
+        with self._condition:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._total -= 1
+            self._condition.notify()
+
+    def close(self):
+        """Function used to close all idle connections"""
+
+        with self._condition:
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._discard(connection)
+                self._total -= 1
+
+    def stats(self) -> dict:
+        """Function used to generate pool statistics
+
+        Returns:
+            dict: dict containing pool size, saturation
+                and wait time metrics
+        """
+
+        with self._condition:
+            return {'size': self._total,
+                    'in_use': self._in_use,
+                    'idle': len(self._idle),
+                    'max_size': self.max_size,
+                    'saturation': self._in_use / self.max_size if self.max_size else 0,
+                    'acquired': self.acquired,
+                    'timeouts': self.timeouts,
+                    'recycled': self.recycled,
+                    'wait_time_total': self.wait_time_total,
+                    'wait_time_max': self.wait_time_max,
+                    'wait_time_mean': self.wait_time_total / self.acquired if self.acquired else 0}
+
+
+POOLS = {}
+POOLS_LOCK = threading.Lock()
+
+def get_pool(credentials: PostgresCredentials) -> ConnectionPool:
+    """Function used to retrieve the shared connection
+    pool for a given set of credentials. Pools are
+    created on first use
+
+    Args:
+        credentials (PostgresCredentials): postgres credentials
+
+    Returns:
+        ConnectionPool: shared connection pool
+    """
+
+    key = (credentials.PG_HOST, credentials.PG_PORT, credentials.PG_DATABASE, credentials.PG_USER)
+    with POOLS_LOCK:
+        pool = POOLS.get(key)
+        if pool is None:
+            LOGGER.info('creating postgres connection pool for %s:%s/%s', *key[:3])
+            pool = POOLS[key] = ConnectionPool(credentials)
+    return pool
 
 
 @contextmanager
@@ -54,19 +270,79 @@ def get_cursor(credentials: PostgresCredentials, cursor_factory: CursorFactory =
 
 @contextmanager
 def get_connection(credentials: PostgresCredentials):
-    connection = psycopg2.connect(
-        dbname=credentials.PG_DATABASE,
-        user=credentials.PG_USER,
-        host=credentials.PG_HOST,
-        password=credentials.PG_PASSWORD.get_secret_value(),
-        port=credentials.PG_PORT
-    )
-    register_uuid(conn_or_curs=connection)
+    pool = get_pool(credentials)
+    connection = pool.acquire()
 
     try:
         yield connection
     finally:
-        connection.close()
+        pool.release(connection)
+
+
+def notify_channel(creds: PostgresCredentials, channel: str, payload: str):
+    """DB function used to send notification to all
+    listeners of a given channel
+
+    Args:
+        creds (PostgresCredentials): [description]
+        channel (str): name of channel
+        payload (str): notification payload
+    """
+
+    with get_cursor(creds) as db:
+        db.execute('SELECT pg_notify(%s, %s)', (channel, payload))
+
+
+def listen_on_channel(creds: PostgresCredentials,
+                      channel: str,
+                      callback: Callable[[str], None],
+                      stop_event: threading.Event,
+                      timeout: float = 1.0):
+    """Function used to listen for notifications on a given
+    channel until the stop event is set. A dedicated (unpooled)
+    connection is used, and the connection is re-established if
+    lost. Blocks the calling thread
+
+    Args:
+        creds (PostgresCredentials): [description]
+        channel (str): name of channel
+        callback (Callable[[str], None]): function called with
+            the payload of each notification
+        stop_event (threading.Event): event used to stop listener
+        timeout (float): interval used to check stop event
+    """
+
+    while not stop_event.is_set():
+        connection = None
+        try:
+            connection = psycopg2.connect(
+                dbname=creds.PG_DATABASE,
+                user=creds.PG_USER,
+                host=creds.PG_HOST,
+                password=creds.PG_PASSWORD.get_secret_value(),
+                port=creds.PG_PORT
+            )
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute('LISTEN {}'.format(quote_ident(channel, connection)))
+            LOGGER.info('listening for notifications on channel %s', channel)
+
+            while not stop_event.is_set():
+                if select.select([connection], [], [], timeout) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    notification = connection.notifies.pop(0)
+                    try:
+                        callback(notification.payload)
+                    except Exception:
+                        LOGGER.exception('unable to handle notification %s', notification.payload)
+        except Exception:
+            LOGGER.exception('lost connection while listening on channel %s', channel)
+            stop_event.wait(timeout)
+        finally:
+            if connection is not None and not connection.closed:
+                connection.close()
 
 
 def get_user_models(creds: PostgresCredentials, uid: str) -> List[NamedTuple]:
@@ -81,7 +357,7 @@ def get_user_models(creds: PostgresCredentials, uid: str) -> List[NamedTuple]:
     """
 
     with get_cursor(creds) as db:
-        db.execute('SELECT model_id,model_name,model_description,model_schema,size,created,input_shape,output_shape FROM models '
+        db.execute('SELECT model_id,model_name,model_description,model_schema,size,created,input_shape,output_shape,version FROM models '
                    'WHERE username=%s', (uid,))
         results = db.fetchall()
     return list(results) if results else []
@@ -101,11 +377,46 @@ def get_user_model(creds: PostgresCredentials, uid: str, model_id: UUID) -> Unio
     """
 
     with get_cursor(creds) as db:
-        db.execute('SELECT model_id,model_name,model_description,model_schema,size,created,input_shape,output_shape FROM models '
+        db.execute('SELECT model_id,model_name,model_description,model_schema,size,created,input_shape,output_shape,version FROM models '
                    'WHERE username=%s AND model_id=%s', (uid, model_id))
         result = db.fetchone()
     return result if result else None
 
+def get_hot_models(creds: PostgresCredentials, limit: int) -> List[NamedTuple]:
+    """DB function used to retrieve the most frequently
+    accessed models across all users, ordered by access
+    count and recency of access
+
+    Args:
+        creds (PostgresCredentials): [description]
+        limit (int): maximum number of models to return
+
+    Returns:
+        List[NamedTuple]: [description]
+    """
+
+    with get_cursor(creds) as db:
+        db.execute('SELECT model_id,username,model_schema,size,input_shape,output_shape,version,access_count FROM models '
+                   'WHERE access_count > 0 ORDER BY access_count DESC, last_accessed DESC NULLS LAST LIMIT %s', (limit,))
+        results = db.fetchall()
+    return list(results) if results else []
+
+
+def record_model_accesses(creds: PostgresCredentials, counts: Dict[UUID, int]):
+    """DB function used to increment the access counters
+    of a set of models in a single transaction
+
+    Args:
+        creds (PostgresCredentials): [description]
+        counts (Dict[UUID, int]): number of accesses per model
+    """
+
+    with get_cursor(creds) as db:
+        db.executemany('UPDATE models SET access_count = access_count + %s, '
+                       "last_accessed = (now() AT TIME ZONE 'UTC') WHERE model_id = %s",
+                       [(count, model_id) for model_id, count in counts.items()])
+
+
 def insert_user_model(creds: PostgresCredentials,
                       uid: str,
                       name: str,
@@ -113,7 +424,8 @@ def insert_user_model(creds: PostgresCredentials,
                       schema: dict,
                       size: int,
                       input_shape: int,
-                      output_shape: int) -> UUID:
+                      output_shape: int,
+                      model_id: UUID = None) -> UUID:
     """DB function used to insert new model into
     database
 
@@ -122,6 +434,7 @@ def insert_user_model(creds: PostgresCredentials,
         uid (str): [description]
         name (str): [description]
         description (str): [description]
+        model_id (UUID, optional): pre-generated model ID
 
     Returns:
         UUID: [description]
@@ -131,7 +444,7 @@ def insert_user_model(creds: PostgresCredentials,
         row.var_type = row.var_type.upper()
         return row.dict()
 
-    model_id = uuid4()
+    model_id = model_id or uuid4()
     # cast all data types to upper case before
     # storing in postgres database
     schema = {'input_schema': {k: format_schema_item(v) for k, v in schema.input_schema.items()},
@@ -143,7 +456,7 @@ def insert_user_model(creds: PostgresCredentials,
     return model_id
 
 
-def insert_async_job(creds: PostgresCredentials, model_id: UUID, upload_size: int) -> UUID:
+def insert_async_job(creds: PostgresCredentials, model_id: UUID, upload_size: int, job_id: UUID = None) -> UUID:
     """DB function used to insert new async
     job into database
 
@@ -151,12 +464,13 @@ def insert_async_job(creds: PostgresCredentials, model_id: UUID, upload_size: in
         creds (PostgresCredentials): [description]
         model_id (UUID): [description]
         upload_size (int): [description]
+        job_id (UUID, optional): pre-generated job ID
 
     Returns:
         UUID: [description]
     """
 
-    job_id = uuid4()
+    job_id = job_id or uuid4()
     with get_cursor(creds) as db:
         db.execute('INSERT INTO async_jobs(job_id,model_id,upload_size) VALUES(%s,%s,%s)',
                    (job_id, model_id, upload_size))
@@ -174,7 +488,7 @@ def get_user_jobs(creds: PostgresCredentials, uid: str) -> List[NamedTuple]:
     """
 
     with get_cursor(creds) as db:
-        db.execute('SELECT j.job_id,j.model_id,j.upload_size,j.created,j.last_updated,j.job_state '
+        db.execute('SELECT j.job_id,j.model_id,j.upload_size,j.created,j.last_updated,j.job_state,j.output_format '
                    'FROM async_jobs AS j '
                    'INNER JOIN models ON models.model_id = j.model_id '
                    'WHERE models.username = %s', (uid,))
@@ -193,7 +507,7 @@ def get_user_job(creds: PostgresCredentials, uid: str, job_id: UUID) -> List[Nam
     """
 
     with get_cursor(creds) as db:
-        db.execute('SELECT j.job_id,j.model_id,j.upload_size,j.created,j.last_updated,j.job_state '
+        db.execute('SELECT j.job_id,j.model_id,j.upload_size,j.created,j.last_updated,j.job_state,j.output_format '
                    'FROM async_jobs AS j '
                    'INNER JOIN models ON models.model_id = j.model_id '
                    'WHERE models.username = %s AND j.job_id = %s', (uid, job_id))
@@ -3,22 +3,45 @@ layer"""
 
 import logging
 import io
-
-import boto3
+import threading
+from typing import BinaryIO, Dict, Tuple
 
 from src.config import S3_REGION_NAME, S3_ACCESS_KEY_ID, S3_SECRET_ACCESS_KEY, \
-    S3_BUCKET_NAME
+    S3_BUCKET_NAME, S3_MULTIPART_PART_SIZE
 
 LOGGER = logging.getLogger(__name__)
 
-# generate new AWS client with credentials
-# and region to interface with S3
-CLIENT = boto3.client(
-    's3',
-    aws_access_key_id=S3_ACCESS_KEY_ID,
-    aws_secret_access_key=S3_SECRET_ACCESS_KEY,
-    region_name=S3_REGION_NAME
-)
+# user metadata key of model files containing the version
+# of the model that the file is served under
+MODEL_VERSION_METADATA = 'model-version'
+
+CLIENT = None
+CLIENT_LOCK = threading.Lock()
+
+
+def get_client():
+    """Function used to retrieve the shared S3 client.
+    boto3 is imported and the client is created on first
+    use (or during warm-up), since both are slow
+
+    Returns:
+        boto3 S3 client
+    """
+
+    global CLIENT
+    if CLIENT is None:
+        with CLIENT_LOCK:
+            if CLIENT is None:
+                import boto3
+                # generate new AWS client with credentials
+                # and region to interface with S3
+                CLIENT = boto3.client(
+                    's3',
+                    aws_access_key_id=S3_ACCESS_KEY_ID,
+                    aws_secret_access_key=S3_SECRET_ACCESS_KEY,
+                    region_name=S3_REGION_NAME
+                )
+    return CLIENT
 
 
 def retrieve_s3_file(path: str) -> io.BytesIO:
@@ -32,19 +55,84 @@ def retrieve_s3_file(path: str) -> io.BytesIO:
     # generate new instance of bytesIO and download
     # contents of s3 bucket into data stream
     content = io.BytesIO()
-    CLIENT.download_fileobj(S3_BUCKET_NAME, path, content)
+    get_client().download_fileobj(S3_BUCKET_NAME, path, content)
     return content
 
 
-def upload_s3_file(content: io.BytesIO, path: str):
+def retrieve_s3_range(path: str, start: int, end: int) -> bytes:
+    """Function used to retrieve a byte range of
+    a file from an S3 bucket
+
+    Args:
+        path (str): Path of S3 file
+        start (int): first byte of range
+        end (int): last byte of range (inclusive)
+
+    Returns:
+        bytes: contents of byte range
+    """
+
+    response = get_client().get_object(Bucket=S3_BUCKET_NAME, Key=path, Range='bytes={}-{}'.format(start, end))
+    return response['Body'].read()
+
+
+def open_s3_stream(path: str, start: int = 0) -> BinaryIO:
+    """Function used to open a streaming, file-like
+    handle on a file in an S3 bucket, starting at
+    the given byte offset. Data is only downloaded as
+    it is read from the stream
+
+    Args:
+        path (str): Path of S3 file
+        start (int): byte offset to start from
+
+    Returns:
+        BinaryIO: readable stream of file contents
+    """
+
+    if start > 0:
+        response = get_client().get_object(Bucket=S3_BUCKET_NAME, Key=path, Range='bytes={}-'.format(start))
+    else:
+        response = get_client().get_object(Bucket=S3_BUCKET_NAME, Key=path)
+    return response['Body']
+
+
+def retrieve_s3_file_with_metadata(path: str) -> Tuple[io.BytesIO, Dict[str, str]]:
+    """Function used to retrieve a file and its user
+    metadata from an S3 bucket. Both are read from a
+    single request, meaning that the metadata always
+    belongs to the returned contents
+
+    Args:
+        path (str): Path of S3 file
+
+    Returns:
+        Tuple[io.BytesIO, Dict[str, str]]: file contents
+            and user metadata
+    """
+
+    response = get_client().get_object(Bucket=S3_BUCKET_NAME, Key=path)
+    try:
+        content = io.BytesIO(response['Body'].read())
+    finally:
+        response['Body'].close()
+    return content, response.get('Metadata', {})
+
+
+def upload_s3_file(content: io.BytesIO, path: str, metadata: Dict[str, str] = None):
     """Function used to upload file to
     S3 bucket
 
+    Args:
+        metadata (Dict[str, str], optional): user
+            metadata stored with the file
+
     Returns:
         io.BytesIO: [description]
     """
 
-    CLIENT.upload_fileobj(content, S3_BUCKET_NAME, path)
+    extra_args = {'Metadata': metadata} if metadata else None
+    get_client().upload_fileobj(content, S3_BUCKET_NAME, path, ExtraArgs=extra_args)
 
 
 def delete_s3_file(path: str):
@@ -55,4 +143,75 @@ def delete_s3_file(path: str):
         path (str): Path of S3 file
     """
 
-    CLIENT.delete_object(Bucket=S3_BUCKET_NAME, Key=path)
\ No newline at end of file
+    get_client().delete_object(Bucket=S3_BUCKET_NAME, Key=path)
+
+
+class S3MultipartWriter:
+    """Writable file-like object used to stream data into
+    an S3 object via multipart upload. Data is buffered until
+    the part size is reached, meaning that memory usage is
+    bounded by the part size rather than the object size.
+    Objects smaller than a single part are uploaded with a
+    single put request
+
+    Arguments:
+        path: str key of S3 object
+        part_size: int size of upload parts in bytes. note
+            that S3 requires parts of at least 5MB
+    """
+
+    def __init__(self, path: str, part_size: int = S3_MULTIPART_PART_SIZE):
+        self.path = path
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        self.bytes_written = 0
+
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+
+    def write(self, data: bytes) -> int:
+        self._buffer.extend(data)
+        self.bytes_written += len(data)
+        if len(self._buffer) >= self.part_size:
+            self._upload_part()
+        return len(data)
+
+    def _upload_part(self):
+        if self._upload_id is None:
+            response = get_client().create_multipart_upload(Bucket=S3_BUCKET_NAME, Key=self.path)
+            self._upload_id = response['UploadId']
+
+        part_number = len(self._parts) + 1
+        response = get_client().upload_part(Bucket=S3_BUCKET_NAME,
+                                            Key=self.path,
+                                            UploadId=self._upload_id,
+                                            PartNumber=part_number,
+                                            Body=bytes(self._buffer))
+        self._parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+        self._buffer.clear()
+
+    def close(self):
+        """Function used to upload any remaining buffered
+        data and complete the upload"""
+
+        if self._upload_id is None:
+            get_client().put_object(Bucket=S3_BUCKET_NAME, Key=self.path, Body=bytes(self._buffer))
+        else:
+            if self._buffer:
+                self._upload_part()
+            get_client().complete_multipart_upload(Bucket=S3_BUCKET_NAME,
+                                                   Key=self.path,
+                                                   UploadId=self._upload_id,
+                                                   MultipartUpload={'Parts': self._parts})
+        self._buffer.clear()
+
+    def abort(self):
+        """Function used to abort upload and discard
+        any uploaded parts"""
+
+        if self._upload_id is not None:
+            try:
+                get_client().abort_multipart_upload(Bucket=S3_BUCKET_NAME, Key=self.path, UploadId=self._upload_id)
+            except Exception:
+                LOGGER.exception('unable to abort multipart upload for %s', self.path)
+        self._buffer.clear()
\ No newline at end of file
@@ -2,20 +2,30 @@
 trigger functionality"""
 
 import logging
-import json
+import threading
 from uuid import UUID
+from typing import AsyncIterator, List, NamedTuple, Tuple, Union
 
-from fastapi import APIRouter, Depends, status
+import numpy as np
+from fastapi import APIRouter, Depends, Request, status
 from fastapi.encoders import jsonable_encoder as je
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from src.utils import json_response_with_message, get_user, \
     generate_base64_file, Base64FileMetadata
-from src.persistence.postgres import get_user_jobs, get_user_job, \
-    get_user_model
+from src.persistence.postgres import get_user_jobs
+from src.logic.metadata import get_cached_user_model, get_cached_user_job
 from src.persistence.s3 import retrieve_s3_file
-from src.config import PG_CREDENTIALS
-from src.logic.tensor import _format_output_vector
+from src.config import PG_CREDENTIALS, JOB_RESULTS_DEFAULT_LIMIT, \
+    JOB_RESULTS_MAX_LIMIT
+from src.logic.render import render_output, render_ndjson, RenderedJSONResponse, \
+    ROWS_ORIENT, ALLOWED_ORIENTS
+from src.logic.schema import get_compiled_schema
+from src.logic.results import get_results_index, read_result_rows, \
+    iter_result_blocks, read_legacy_results
+from src.logic.formats import get_content_type, encode_npy, encode_arrow, \
+    NDJSON_CONTENT_TYPE, NPY_CONTENT_TYPE, BINARY_CONTENT_TYPES
+from src.executors import run_in_stage, Stage
 
 LOGGER = logging.getLogger(__name__)
 ROUTER = APIRouter()
@@ -31,7 +41,7 @@ async def get_models_handler(uid: str = Depends(get_user())) -> JSONResponse:
 
     LOGGER.debug('retrieving models for user %s', uid)
     # get all models from postgres database and convert to dict
-    jobs = [j._asdict() for j in get_user_jobs(PG_CREDENTIALS, uid)]
+    jobs = [j._asdict() for j in await run_in_stage(Stage.POSTGRES, get_user_jobs, PG_CREDENTIALS, uid)]
     content = {'http_code': status.HTTP_200_OK, 'jobs': jobs}
     return JSONResponse(status_code=status.HTTP_200_OK, content=je(content))
 
@@ -47,7 +57,7 @@ async def get_model_meta_handler(job_id: UUID, uid: str = Depends(get_user())) -
 
     LOGGER.debug('retrieving models for user %s', uid)
     # get all models from postgres database and convert to dict
-    job = get_user_job(PG_CREDENTIALS, uid, job_id)
+    job = await run_in_stage(Stage.POSTGRES, get_cached_user_job, PG_CREDENTIALS, uid, job_id)
     if job is None:
         LOGGER.error('unable to find job %s for user %s', job_id, uid)
         return json_response_with_message(status.HTTP_404_NOT_FOUND, 'Cannot find specified job')
@@ -67,48 +77,175 @@ async def get_model_content_handler(job_id: UUID, uid: str = Depends(get_user())
 
     LOGGER.debug('retrieving models for user %s', uid)
     # get all models from postgres database and convert to dict
-    job = get_user_job(PG_CREDENTIALS, uid, job_id)
+    job = await run_in_stage(Stage.POSTGRES, get_cached_user_job, PG_CREDENTIALS, uid, job_id)
     if job is None:
         LOGGER.error('unable to find job %s for user %s', job_id, uid)
         return json_response_with_message(status.HTTP_404_NOT_FOUND, 'Cannot find specified job')
 
-    s3_data = retrieve_s3_file('/tensor-trigger/input-data' + str(job.job_id))
+    s3_data = await run_in_stage(Stage.S3, retrieve_s3_file, '/tensor-trigger/input-data' + str(job.job_id))
     # generate metadata for file (including mime type) and convert to
     # base64 encoded format
     meta = Base64FileMetadata(file_size=0, mime_type='text/plain')
     content = {'http_code': status.HTTP_200_OK,
-               'job': generate_base64_file(s3_data, meta)}
+               'job': await run_in_stage(Stage.COMPUTE, generate_base64_file, s3_data, meta)}
     return JSONResponse(status_code=status.HTTP_200_OK, content=je(content))
 
 
-@ROUTER.get('/{job_id}/results')
-async def get_job_results_handler(job_id: UUID, uid: str = Depends(get_user())) -> JSONResponse:
-    """API handler used to retrieve models
-    for a given user
+async def _get_completed_job(uid: str, job_id: UUID) -> Tuple[Union[NamedTuple, None], Union[JSONResponse, None]]:
+    """Function used to retrieve the metadata of the
+    model of a completed job. An error response is
+    returned if the job cannot be found or is not complete
+
+    Args:
+        uid (str): user ID
+        job_id (UUID): ID of job
 
     Returns:
-        JSONResponse: [description]
+        Tuple[Union[NamedTuple, None], Union[JSONResponse, None]]:
+            model metadata and error response
     """
 
-    LOGGER.debug('retrieving models for user %s', uid)
-    # get all models from postgres database and convert to dict
-    job = get_user_job(PG_CREDENTIALS, uid, job_id)
+    job = await run_in_stage(Stage.POSTGRES, get_cached_user_job, PG_CREDENTIALS, uid, job_id)
     if job is None:
         LOGGER.error('unable to find job %s for user %s', job_id, uid)
-        return json_response_with_message(status.HTTP_404_NOT_FOUND, 'Cannot find specified job')
+        return None, json_response_with_message(status.HTTP_404_NOT_FOUND, 'Cannot find specified job')
 
     if job.job_state != 2:
         LOGGER.error('unable to retrieve job results for %s: invalid job state %s', job_id, job.job_state)
-        return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid job state')
+        return None, json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid job state')
 
-    meta = get_user_model(PG_CREDENTIALS, uid, job.model_id)
-    schema = meta.model_schema
+    meta = await run_in_stage(Stage.POSTGRES, get_cached_user_model, PG_CREDENTIALS, uid, job.model_id)
+    if meta is None:
+        LOGGER.error('unable to find model %s for job %s', job.model_id, job_id)
+        return None, json_response_with_message(status.HTTP_404_NOT_FOUND, 'Cannot find specified model')
+    return meta, None
 
-    s3_data = retrieve_s3_file('/tensor-trigger/output-data' + str(job.job_id))
-    results = json.loads(s3_data.getvalue().decode())
-    # generate metadata for file (including mime type) and convert to
-    # base64 encoded format
-    meta = Base64FileMetadata(file_size=0, mime_type='text/plain')
-    content = {'http_code': status.HTTP_200_OK,
-               'results': _format_output_vector(results.get('output', []), schema.get('output_schema'))}
-    return JSONResponse(status_code=status.HTTP_200_OK, content=je(content))
\ No newline at end of file
+
+def _get_output_columns(meta: NamedTuple) -> List[str]:
+    """Function used to retrieve output column names of
+    a model in schema index order, which is the order of
+    the outputs of the model
+
+    Args:
+        meta (NamedTuple): model metadata from postgres
+
+    Returns:
+        List[str]: ordered output column names
+    """
+
+    return get_compiled_schema(meta.model_id, meta.version, 'output_schema',
+                               meta.model_schema.get('output_schema')).columns
+
+
+@ROUTER.get('/{job_id}/results')
+async def get_job_results_handler(request: Request,
+                                  job_id: UUID,
+                                  orient: str = ROWS_ORIENT,
+                                  offset: int = 0,
+                                  limit: int = JOB_RESULTS_DEFAULT_LIMIT,
+                                  uid: str = Depends(get_user())) -> Response:
+    """API handler used to retrieve a page of results
+    of a given job. Only the byte range of the output
+    file containing the requested rows is downloaded.
+    Results are returned in NPY or Arrow IPC format if
+    requested via the Accept header, and are otherwise
+    transcoded to JSON in either rows or columns orientation,
+    along with the offset of the next page
+
+    Returns:
+        Response: [description]
+    """
+
+    if orient not in ALLOWED_ORIENTS:
+        return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid orient')
+
+    if offset < 0 or limit < 1 or limit > JOB_RESULTS_MAX_LIMIT:
+        return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid offset or limit')
+
+    LOGGER.debug('retrieving results of job %s for user %s', job_id, uid)
+    meta, error = await _get_completed_job(uid, job_id)
+    if error is not None:
+        return error
+
+    columns = _get_output_columns(meta)
+    index = await run_in_stage(Stage.S3, get_results_index, job_id)
+    results = await run_in_stage(Stage.S3, read_result_rows, job_id, index, offset, limit, len(columns))
+
+    # total number of rows is only known upfront for indexed
+    # results. legacy results are paged in memory
+    total_rows = index['rows'] if index is not None else None
+    next_offset = offset + len(results)
+    if len(results) < limit or (total_rows is not None and next_offset >= total_rows):
+        next_offset = None
+
+    accept = get_content_type(request.headers.get('accept', '').split(',')[0])
+    if accept in BINARY_CONTENT_TYPES:
+        headers = {'X-Total-Rows': str(total_rows if total_rows is not None else ''),
+                   'X-Next-Offset': str(next_offset if next_offset is not None else '')}
+        if accept == NPY_CONTENT_TYPE:
+            content = await run_in_stage(Stage.COMPUTE, encode_npy, results)
+        else:
+            content = await run_in_stage(Stage.COMPUTE, encode_arrow, results, columns)
+        return Response(content=content, media_type=accept, headers=headers)
+
+    extra = {'offset': offset, 'limit': limit, 'total_rows': total_rows, 'next_offset': next_offset}
+    content = await run_in_stage(Stage.COMPUTE, render_output, results, columns, orient,
+                                 status.HTTP_200_OK, 'results', extra)
+    return RenderedJSONResponse(status_code=status.HTTP_200_OK, content=content)
+
+
+@ROUTER.get('/{job_id}/results/stream')
+async def stream_job_results_handler(job_id: UUID, offset: int = 0, uid: str = Depends(get_user())) -> Response:
+    """API handler used to stream results of a given
+    job as newline delimited JSON, with one object per
+    row. Results are streamed from the object store as
+    they are consumed by the client
+
+    Returns:
+        Response: [description]
+    """
+
+    if offset < 0:
+        return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid offset')
+
+    LOGGER.debug('streaming results of job %s for user %s', job_id, uid)
+    meta, error = await _get_completed_job(uid, job_id)
+    if error is not None:
+        return error
+
+    columns = _get_output_columns(meta)
+    index = await run_in_stage(Stage.S3, get_results_index, job_id)
+    return StreamingResponse(_stream_job_results(job_id, index, offset, columns), media_type=NDJSON_CONTENT_TYPE)
+
+
+async def _stream_job_results(job_id: UUID, index: Union[dict, None], offset: int, columns: List[str]) -> AsyncIterator[bytes]:
+    if index is None:
+        results = await run_in_stage(Stage.S3, read_legacy_results, job_id, len(columns))
+        for start in range(offset, len(results), JOB_RESULTS_DEFAULT_LIMIT):
+            yield await run_in_stage(Stage.COMPUTE, render_ndjson, results[start:start + JOB_RESULTS_DEFAULT_LIMIT], columns)
+        return
+
+    blocks = iter_result_blocks(job_id, index, offset, len(columns))
+    # a read can still be running on the executor when the client
+    # disconnects, and the generator cannot be closed while it is
+    # executing. reads and close are therefore serialized
+    lock = threading.Lock()
+
+    def read_block() -> Union[np.ndarray, None]:
+        with lock:
+            return next(blocks, None)
+
+    def close_blocks():
+        with lock:
+            blocks.close()
+
+    try:
+        while True:
+            results = await run_in_stage(Stage.S3, read_block)
+            if results is None:
+                break
+            yield await run_in_stage(Stage.COMPUTE, render_ndjson, results, columns)
+    finally:
+        # close generator (and underlying S3 stream) if
+        # the client disconnects before all blocks are sent
+        await run_in_stage(Stage.S3, close_blocks)
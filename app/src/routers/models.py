@@ -2,21 +2,27 @@
 trigger functionality"""
 
 import logging
+import tempfile
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 from fastapi.encoders import jsonable_encoder as je
 from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 
 from src.utils import json_response_with_message, get_user, \
     generate_base64_file, Base64FileMetadata, parse_base64_file
-from src.persistence.postgres import get_user_model, get_user_models, \
+from src.persistence.postgres import get_user_models, \
     insert_user_model, delete_user_model
 from src.persistence.s3 import upload_s3_file, retrieve_s3_file, \
-    delete_s3_file
+    delete_s3_file, MODEL_VERSION_METADATA
 from src.config import PG_CREDENTIALS
-from src.models.models import ModelUploadRequest
+from src.models.models import ModelUploadRequest, ModelMetadata
 from src.logic.tensor import validate_upload_content
+from src.logic.metadata import get_cached_user_model, invalidate_model
+from src.logic.serving import schedule_serving_conversion, delete_serving_artifact
+from src.logic.uploads import StreamingUpload, InvalidUploadException
+from src.executors import run_in_stage, Stage
 
 
 LOGGER = logging.getLogger(__name__)
@@ -33,7 +39,7 @@ async def get_models_handler(uid: str = Depends(get_user())) -> JSONResponse:
 
     LOGGER.debug('retrieving models for user %s', uid)
     # get all models from postgres database and convert to dict
-    models = [m._asdict() for m in get_user_models(PG_CREDENTIALS, uid)]
+    models = [m._asdict() for m in await run_in_stage(Stage.POSTGRES, get_user_models, PG_CREDENTIALS, uid)]
     content = {'http_code': status.HTTP_200_OK,
                'models': models}
     return JSONResponse(status_code=status.HTTP_200_OK, content=je(content))
@@ -49,16 +55,16 @@ async def get_model_handler(model_id: UUID, uid: str = Depends(get_user())) -> J
     """
 
     LOGGER.debug('retrieving model %s for user %s', model_id, uid)
-    model_meta = get_user_model(PG_CREDENTIALS, uid, model_id)
+    model_meta = await run_in_stage(Stage.POSTGRES, get_cached_user_model, PG_CREDENTIALS, uid, model_id)
     if model_meta is None:
         return json_response_with_message(status.HTTP_404_NOT_FOUND, 'Cannot find specified model')
 
-    s3_data = retrieve_s3_file('/tensor-trigger/' + str(model_id))
+    s3_data = await run_in_stage(Stage.S3, retrieve_s3_file, '/tensor-trigger/' + str(model_id))
     # generate metadata for file (including mime type) and convert to
     # base64 encoded format
     meta = Base64FileMetadata(file_size=0, mime_type='application/octet-stream')
     content = {'http_code': status.HTTP_200_OK,
-               'model': generate_base64_file(s3_data, meta)}
+               'model': await run_in_stage(Stage.COMPUTE, generate_base64_file, s3_data, meta)}
     return JSONResponse(status_code=status.HTTP_200_OK, content=je(content))
 
 
@@ -72,7 +78,7 @@ async def get_model_meta_handler(model_id: UUID, uid: str = Depends(get_user()))
     """
 
     LOGGER.debug('retrieving model %s for user %s', model_id, uid)
-    model_meta = get_user_model(PG_CREDENTIALS, uid, model_id)
+    model_meta = await run_in_stage(Stage.POSTGRES, get_cached_user_model, PG_CREDENTIALS, uid, model_id)
     if model_meta is None:
         return json_response_with_message(status.HTTP_404_NOT_FOUND, 'Cannot find specified model')
 
@@ -93,24 +99,86 @@ async def new_model_handler(r: ModelUploadRequest, uid: str = Depends(get_user()
     LOGGER.debug('received request to upload new model for user %s', uid)
     # insert into postgres database and retrieve model ID
     try:
-        meta, bytes_data = parse_base64_file(r.model_content)
+        meta, bytes_data = await run_in_stage(Stage.COMPUTE, parse_base64_file, r.model_content)
         # try to parse uploaded content to tensorflow model
-        expected_shapes = validate_upload_content(bytes_data, r.model_schema)
+        expected_shapes = await run_in_stage(Stage.COMPUTE, validate_upload_content, bytes_data, r.model_schema)
         bytes_data.seek(0)
     except Exception:
         LOGGER.exception('unable to parse file')
         return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid model data')
 
-    model_id = insert_user_model(PG_CREDENTIALS,
-                                 uid,
-                                 r.model_name,
-                                 r.model_description,
-                                 r.model_schema,
-                                 meta.file_size,
-                                 expected_shapes.input_shape,
-                                 expected_shapes.output_shape)
+    model_id = await run_in_stage(Stage.POSTGRES,
+                                  insert_user_model,
+                                  PG_CREDENTIALS,
+                                  uid,
+                                  r.model_name,
+                                  r.model_description,
+                                  r.model_schema,
+                                  meta.file_size,
+                                  expected_shapes.input_shape,
+                                  expected_shapes.output_shape)
     # upload data to s3 bucket
-    upload_s3_file(bytes_data, '/tensor-trigger/' + str(model_id))
+    await run_in_stage(Stage.S3, upload_s3_file, bytes_data, '/tensor-trigger/' + str(model_id),
+                       {MODEL_VERSION_METADATA: '1'})
+    # generate optimized serving artifact in the background
+    schedule_serving_conversion(model_id, 1, bytes_data)
+    return json_response_with_message(status.HTTP_201_CREATED, 'Successfully created model')
+
+
+@ROUTER.post('/upload')
+async def upload_model_handler(request: Request, uid: str = Depends(get_user())) -> JSONResponse:
+    """API handler used to upload new model as
+    multipart/form-data (with metadata and model_content
+    fields) or as raw request body (with metadata passed
+    as JSON in the X-Model-Metadata header). The model file
+    is spooled to a temporary file rather than held in memory
+
+    Returns:
+        JSONResponse: [description]
+    """
+
+    LOGGER.debug('received request to stream new model for user %s', uid)
+    upload = StreamingUpload(request, 'model_content')
+    spool = tempfile.TemporaryFile()
+    try:
+        try:
+            async for chunk in upload.chunks():
+                spool.write(chunk)
+            metadata = ModelMetadata.parse_raw(upload.fields.get('metadata') or
+                                               request.headers.get('X-Model-Metadata', ''))
+        except (InvalidUploadException, ValidationError):
+            LOGGER.exception('unable to parse model upload')
+            return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid model upload')
+
+        try:
+            # try to parse uploaded content to tensorflow model
+            spool.seek(0)
+            expected_shapes = await run_in_stage(Stage.COMPUTE, validate_upload_content, spool, metadata.model_schema)
+            spool.seek(0)
+        except Exception:
+            LOGGER.exception('unable to parse file')
+            return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid model data')
+
+        model_id = await run_in_stage(Stage.POSTGRES,
+                                      insert_user_model,
+                                      PG_CREDENTIALS,
+                                      uid,
+                                      metadata.model_name,
+                                      metadata.model_description,
+                                      metadata.model_schema,
+                                      upload.size,
+                                      expected_shapes.input_shape,
+                                      expected_shapes.output_shape)
+        # upload data to s3 bucket
+        await run_in_stage(Stage.S3, upload_s3_file, spool, '/tensor-trigger/' + str(model_id),
+                           {MODEL_VERSION_METADATA: '1'})
+        # generate optimized serving artifact in the background. the
+        # spooled file is closed by the conversion once loaded
+        schedule_serving_conversion(model_id, 1, spool)
+        spool = None
+    finally:
+        if spool is not None:
+            spool.close()
     return json_response_with_message(status.HTTP_201_CREATED, 'Successfully created model')
 
 
@@ -127,13 +195,15 @@ async def delete_model_handler(model_id: UUID, uid: str = Depends(get_user())) -
     """
 
     LOGGER.debug('deleting model %s for user %s', model_id, uid)
-    model_meta = get_user_model(PG_CREDENTIALS, uid, model_id)
+    model_meta = await run_in_stage(Stage.POSTGRES, get_cached_user_model, PG_CREDENTIALS, uid, model_id)
     if model_meta is None:
         return json_response_with_message(status.HTTP_404_NOT_FOUND, 'Cannot find specified model')
 
     # delete model from S3 bucket and from postgres database
-    delete_s3_file('/tensor-trigger/' + str(model_id))
-    delete_user_model(PG_CREDENTIALS, uid, model_id)
+    await run_in_stage(Stage.S3, delete_s3_file, '/tensor-trigger/' + str(model_id))
+    await delete_serving_artifact(model_id, model_meta.version)
+    await run_in_stage(Stage.POSTGRES, delete_user_model, PG_CREDENTIALS, uid, model_id)
+    await run_in_stage(Stage.POSTGRES, invalidate_model, PG_CREDENTIALS, model_id)
 
     content = {'http_code': status.HTTP_200_OK,
                'message': 'Successfully deleted model'}
@@ -0,0 +1,89 @@
+"""Module containing API router for service
+statistics"""
+
+import logging
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from src.logic.cache import MODEL_CACHE
+from src.logic.batching import BATCHER
+from src.logic.metadata import MODEL_META_CACHE, JOB_META_CACHE
+from src.logic.serving import MODEL_LOADS
+from src.persistence.postgres import get_pool
+from src.config import PG_CREDENTIALS
+
+LOGGER = logging.getLogger(__name__)
+ROUTER = APIRouter()
+
+
+@ROUTER.get('/cache')
+async def get_cache_stats_handler() -> JSONResponse:
+    """API handler used to retrieve hit/miss
+    counters and usage of the model cache
+
+    Returns:
+        JSONResponse: JSON response containing cache stats
+    """
+
+    LOGGER.debug('received request for model cache stats')
+    content = {'http_code': status.HTTP_200_OK, 'stats': MODEL_CACHE.stats()}
+    return JSONResponse(status_code=status.HTTP_200_OK, content=content)
+
+
+@ROUTER.get('/metadata')
+async def get_metadata_stats_handler() -> JSONResponse:
+    """API handler used to retrieve hit/miss
+    counters of the model and job metadata caches
+
+    Returns:
+        JSONResponse: JSON response containing cache stats
+    """
+
+    LOGGER.debug('received request for metadata cache stats')
+    content = {'http_code': status.HTTP_200_OK,
+               'stats': {'models': MODEL_META_CACHE.stats(), 'jobs': JOB_META_CACHE.stats()}}
+    return JSONResponse(status_code=status.HTTP_200_OK, content=content)
+
+
+@ROUTER.get('/loads')
+async def get_load_stats_handler() -> JSONResponse:
+    """API handler used to retrieve counters and
+    timings of model loads, including the number of
+    concurrent loads coalesced into a single load
+
+    Returns:
+        JSONResponse: JSON response containing load stats
+    """
+
+    LOGGER.debug('received request for model load stats')
+    content = {'http_code': status.HTTP_200_OK, 'stats': MODEL_LOADS.stats()}
+    return JSONResponse(status_code=status.HTTP_200_OK, content=content)
+
+
+@ROUTER.get('/batching')
+async def get_batching_stats_handler() -> JSONResponse:
+    """API handler used to retrieve batch size
+    histogram of the micro-batching scheduler
+
+    Returns:
+        JSONResponse: JSON response containing batching stats
+    """
+
+    LOGGER.debug('received request for batching stats')
+    content = {'http_code': status.HTTP_200_OK, 'stats': BATCHER.stats()}
+    return JSONResponse(status_code=status.HTTP_200_OK, content=content)
+
+
+@ROUTER.get('/postgres')
+async def get_postgres_stats_handler() -> JSONResponse:
+    """API handler used to retrieve wait time and
+    saturation metrics of the postgres connection pool
+
+    Returns:
+        JSONResponse: JSON response containing pool stats
+    """
+
+    LOGGER.debug('received request for postgres pool stats')
+    content = {'http_code': status.HTTP_200_OK, 'stats': get_pool(PG_CREDENTIALS).stats()}
+    return JSONResponse(status_code=status.HTTP_200_OK, content=content)
@@ -3,27 +3,80 @@ trigger functionality"""
 
 import logging
 import json
+from typing import NamedTuple, List, Union
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, status
-from fastapi.responses import JSONResponse
+import numpy as np
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import JSONResponse, Response
+from pydantic import ValidationError
 from fastapi.encoders import jsonable_encoder as je
 
 from src.utils import get_user,json_response_with_message, parse_base64_file
-from src.persistence.postgres import get_user_model, insert_async_job
-from src.persistence.s3 import retrieve_s3_file, upload_s3_file
+from src.persistence.postgres import insert_async_job
+from src.persistence.s3 import upload_s3_file, S3MultipartWriter
 from src.config import PG_CREDENTIALS, MESSAGE_BROKER_URL, JOB_EXCHANGE_NAME, \
-    JOB_EXCHANGE_TYPE, JOB_ROUTING_KEY
-from src.logic.tensor import validate_data_point, run_model, \
-    run_model_batched, validate_csv_file
+    JOB_EXCHANGE_TYPE, JOB_ROUTING_KEY, BATCHING_ENABLED, UPLOAD_MAX_HEADER_BYTES
+from src.logic.tensor import run_model, run_model_batched, validate_csv_file, \
+    validate_csv_header
+from src.logic.schema import get_compiled_schema, CompiledSchema, RowError
+from src.logic.formats import get_content_type, decode_npy, encode_npy, \
+    decode_arrow, encode_arrow, UnsupportedFormatException, JSON_CONTENT_TYPE, \
+    NPY_CONTENT_TYPE, ARROW_CONTENT_TYPE, BINARY_CONTENT_TYPES
+from src.logic.render import render_output, RenderedJSONResponse, ROWS_ORIENT, \
+    COLUMNS_ORIENT, ALLOWED_ORIENTS
+from src.logic.metadata import get_cached_user_model
+from src.logic.serving import get_network
+from src.logic.batching import run_model_microbatched
+from src.logic.uploads import StreamingUpload, InvalidUploadException
 from src.models.tensor import ProcessRequest, BatchProcessRequest, \
-    AsyncBatchProcessRequest, TrainModelRequest
+    AsyncBatchProcessRequest, TrainModelRequest, ColumnarBatchProcessRequest
 from src.services.rabbitmq import write_to_exchange
+from src.executors import run_in_stage, Stage
+from src.metrics import observe_stage, DB_LOOKUP_STAGE, MODEL_LOAD_STAGE, INPUT_FORMAT_STAGE, \
+    PREDICT_STAGE, OUTPUT_FORMAT_STAGE, SERIALIZATION_STAGE
 
 
 LOGGER = logging.getLogger(__name__)
 ROUTER = APIRouter()
 
 
+def _get_schema(model_meta: NamedTuple, name: str):
+    """Function used to retrieve compiled schema
+    of a model
+
+    Args:
+        model_meta (NamedTuple): model metadata from postgres
+        name (str): name of schema (input_schema or output_schema)
+
+    Returns:
+        CompiledSchema: compiled schema
+    """
+
+    return get_compiled_schema(model_meta.model_id,
+                               model_meta.version,
+                               name,
+                               model_meta.model_schema.get(name))
+
+
+def _invalid_vectors_response(message: str, errors: List[RowError]) -> JSONResponse:
+    """Function used to generate 400 response
+    containing per row validation errors
+
+    Args:
+        message (str): response message
+        errors (List[RowError]): invalid rows
+
+    Returns:
+        JSONResponse: formatted JSONResponse instance
+    """
+
+    content = {'http_code': status.HTTP_400_BAD_REQUEST,
+               'message': message,
+               'errors': [e._asdict() for e in errors]}
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content=content)
+
+
 @ROUTER.post('/run')
 async def run_model_handler(r: ProcessRequest, uid: str = Depends(get_user())) -> JSONResponse:
     """API handler used to run model
@@ -40,67 +93,201 @@ async def run_model_handler(r: ProcessRequest, uid: str = Depends(get_user())) -
     LOGGER.debug('received request to run model for user %s', uid)
     # get model metadata from postgres server. return
     # 404 error code if model cannot be found
-    model_meta = get_user_model(PG_CREDENTIALS, uid, r.model_id)
+    with observe_stage(DB_LOOKUP_STAGE, r.model_id):
+        model_meta = await run_in_stage(Stage.POSTGRES, get_cached_user_model, PG_CREDENTIALS, uid, r.model_id)
     if model_meta is None:
         LOGGER.error('unable to retrieve model %s for user %s', r.model_id, uid)
         return json_response_with_message(status.HTTP_404_NOT_FOUND, 'Cannot find specified model')
 
     schema = model_meta.model_schema
-    # validate provided input vector against
-    # the schema registered against the model
-    if not validate_data_point(r.input_vector, schema.get('input_schema')):
+    # validate provided input vector against the schema
+    # registered against the model and cast to model format
+    with observe_stage(INPUT_FORMAT_STAGE, r.model_id):
+        inputs, errors = _get_schema(model_meta, 'input_schema').compile_vector(r.input_vector)
+    if errors:
         LOGGER.error('unable to validate data point %s against schema %s', r.input_vector, model_meta.model_schema)
-        return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid input vector')
+        return _invalid_vectors_response('Invalid input vector', errors)
+
+    # retrieve tensorflow model from cache (or s3 storage) and run
+    try:
+        with observe_stage(MODEL_LOAD_STAGE, r.model_id):
+            network = await get_network(model_meta)
+    except Exception:
+        LOGGER.exception('unable to load model %s', r.model_id)
+        return json_response_with_message(status.HTTP_500_INTERNAL_SERVER_ERROR, 'Internal server error')
 
-    # retrieve hd5 file from s3 storage and run tensorflow model
-    s3_data = retrieve_s3_file('/tensor-trigger/' + str(r.model_id))
-    results = run_model(s3_data, r.input_vector, schema.get('input_schema'), schema.get('output_schema'))
+    with observe_stage(PREDICT_STAGE, r.model_id):
+        if BATCHING_ENABLED:
+            # group concurrent requests for the same model into a single prediction
+            key = (str(model_meta.model_id), model_meta.version)
+            results = await run_model_microbatched(key, network, inputs, schema.get('output_schema'))
+        else:
+            results = await run_in_stage(Stage.COMPUTE, run_model, network, inputs, schema.get('output_schema'))
     if results is None:
         LOGGER.error('unable to run model %s', r.model_id)
         return json_response_with_message(status.HTTP_500_INTERNAL_SERVER_ERROR, 'Internal server error')
 
     content = {'http_code': status.HTTP_200_OK, 'output': results}
-    return JSONResponse(status_code=status.HTTP_200_OK, content=je(content))
+    with observe_stage(SERIALIZATION_STAGE, r.model_id):
+        return JSONResponse(status_code=status.HTTP_200_OK, content=je(content))
+
+
+def _decode_batch_inputs(content_type: str, payload, body: bytes, input_schema: CompiledSchema) -> tuple:
+    """Function used to decode batch inputs from the
+    request format into a single float32 array
+
+    Args:
+        content_type (str): media type of request
+        payload: parsed JSON request for JSON requests
+        body (bytes): raw request body for binary requests
+        input_schema (CompiledSchema): compiled input schema
+
+    Returns:
+        tuple: array of inputs and list of invalid rows
+    """
+
+    if content_type == NPY_CONTENT_TYPE:
+        return input_schema.compile_array(decode_npy(body))
+    if content_type == ARROW_CONTENT_TYPE:
+        return input_schema.compile_array(decode_arrow(body, input_schema.columns))
+    if isinstance(payload, ColumnarBatchProcessRequest):
+        return input_schema.compile_columns(payload.columns)
+    return input_schema.compile_batch(payload.input_vectors)
+
+
+def _encode_batch_outputs(content_type: str,
+                          payload,
+                          results: np.ndarray,
+                          model_meta: NamedTuple,
+                          orient: Union[str, None] = None) -> Response:
+    """Function used to encode batch outputs in the
+    format of the request
+
+    Args:
+        content_type (str): media type of request
+        payload: parsed JSON request for JSON requests
+        results (np.ndarray): model outputs
+        model_meta (NamedTuple): model metadata from postgres
+        orient (str, optional): orientation of JSON outputs
+
+    Returns:
+        Response: formatted response
+    """
+
+    output_schema = _get_schema(model_meta, 'output_schema')
+    if content_type == NPY_CONTENT_TYPE:
+        return Response(content=encode_npy(results), media_type=NPY_CONTENT_TYPE)
+    if content_type == ARROW_CONTENT_TYPE:
+        return Response(content=encode_arrow(results, output_schema.columns), media_type=ARROW_CONTENT_TYPE)
+
+    # JSON outputs are rendered straight to bytes in the orientation
+    # of the request unless explicitly overridden by the client
+    if orient is None:
+        orient = COLUMNS_ORIENT if isinstance(payload, ColumnarBatchProcessRequest) else ROWS_ORIENT
+    content = render_output(results, output_schema.columns, orient, status.HTTP_200_OK)
+    return RenderedJSONResponse(status_code=status.HTTP_200_OK, content=content)
 
 
 @ROUTER.post('/run/batch')
-async def batch_model_handler(r: BatchProcessRequest, uid: str = Depends(get_user())) -> JSONResponse:
+async def batch_model_handler(request: Request,
+                              model_id: Union[UUID, None] = None,
+                              orient: Union[str, None] = None,
+                              uid: str = Depends(get_user())) -> Response:
     """API handler used to handle batch processing
-    of model data
+    of model data. Input vectors are accepted in the
+    following formats, and results are returned in the
+    same format as the request
+
+        application/json: row oriented (input_vectors) or
+            column oriented (columns) request body
+        application/x-npy: .npy file of shape (rows, features)
+            with features in schema index order
+        application/vnd.apache.arrow.stream: Arrow IPC stream
+            with one column per feature
+
+    The model ID is read from the query string for
+    binary formats. JSON outputs can be returned in
+    rows or columns orientation via the orient parameter
 
     Args:
-        r (BatchProcessRequest): [description]
+        request (Request): FastAPI request instance
+        model_id (UUID, optional): ID of model for binary formats
+        orient (str, optional): rows or columns
         uid (str, optional): [description]. Defaults to Depends(get_user()).
 
     Returns:
-        JSONResponse: [description]
+        Response: [description]
     """
 
     LOGGER.debug('received request to batch process data for user %s', uid)
+    content_type = get_content_type(request.headers.get('content-type'))
+    body = await request.body()
+
+    payload = None
+    if content_type == JSON_CONTENT_TYPE:
+        try:
+            data = json.loads(body)
+            if 'columns' in data:
+                payload = ColumnarBatchProcessRequest(**data)
+            else:
+                payload = BatchProcessRequest(**data)
+        except (ValueError, TypeError, ValidationError):
+            LOGGER.exception('unable to parse batch request')
+            return json_response_with_message(status.HTTP_422_UNPROCESSABLE_ENTITY, 'Invalid request body')
+        model_id = payload.model_id
+
+    elif content_type not in BINARY_CONTENT_TYPES:
+        LOGGER.error('received batch request with unsupported content type %s', content_type)
+        return json_response_with_message(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, 'Unsupported content type')
+
+    if model_id is None:
+        return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Missing model ID')
+
+    if orient is not None and orient not in ALLOWED_ORIENTS:
+        return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid orient')
+
     # get model metadata from postgres server. return
     # 404 error code if model cannot be found
-    model_meta = get_user_model(PG_CREDENTIALS, uid, r.model_id)
+    with observe_stage(DB_LOOKUP_STAGE, model_id):
+        model_meta = await run_in_stage(Stage.POSTGRES, get_cached_user_model, PG_CREDENTIALS, uid, model_id)
     if model_meta is None:
-        LOGGER.error('unable to retrieve model %s for user %s', r.model_id, uid)
+        LOGGER.error('unable to retrieve model %s for user %s', model_id, uid)
         return json_response_with_message(status.HTTP_404_NOT_FOUND, 'Cannot find specified model')
 
     schema = model_meta.model_schema
-    # validate provided input vectors against
-    # the schema registered against the model
-    invalid_points = any(not validate_data_point(x, schema.get('input_schema')) for x in r.input_vectors)
-    if invalid_points:
+    # decode and validate provided input vectors against the
+    # schema registered against the model and cast to model format
+    input_schema = _get_schema(model_meta, 'input_schema')
+    try:
+        with observe_stage(INPUT_FORMAT_STAGE, model_id):
+            inputs, errors = await run_in_stage(Stage.COMPUTE, _decode_batch_inputs, content_type, payload, body, input_schema)
+    except UnsupportedFormatException:
+        return json_response_with_message(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, 'Unsupported content type')
+    except Exception:
+        LOGGER.exception('unable to decode input data')
+        return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid input data')
+
+    if errors:
         LOGGER.error('unable to validate data point(s) against schema %s', schema)
-        return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid input vector(s)')
+        return _invalid_vectors_response('Invalid input vector(s)', errors)
 
-    # retrieve hd5 file from s3 storage and run tensorflow model
-    s3_data = retrieve_s3_file('/tensor-trigger/' + str(r.model_id))
-    results = run_model_batched(s3_data, r.input_vectors, schema.get('input_schema'), schema.get('output_schema'))
+    # retrieve tensorflow model from cache (or s3 storage) and run
+    try:
+        with observe_stage(MODEL_LOAD_STAGE, model_id):
+            network = await get_network(model_meta)
+    except Exception:
+        LOGGER.exception('unable to load model %s', model_id)
+        return json_response_with_message(status.HTTP_500_INTERNAL_SERVER_ERROR, 'Internal server error')
+
+    with observe_stage(PREDICT_STAGE, model_id):
+        results = await run_in_stage(Stage.COMPUTE, run_model_batched, network, inputs)
     if results is None:
-        LOGGER.error('unable to run model %s', r.model_id)
+        LOGGER.error('unable to run model %s', model_id)
         return json_response_with_message(status.HTTP_500_INTERNAL_SERVER_ERROR, 'Internal server error')
 
-    content = {'http_code': status.HTTP_200_OK, 'output': results}
-    return JSONResponse(status_code=status.HTTP_200_OK, content=je(content))
+    # outputs are formatted and serialized in a single pass
+    with observe_stage(OUTPUT_FORMAT_STAGE, model_id):
+        return await run_in_stage(Stage.COMPUTE, _encode_batch_outputs, content_type, payload, results, model_meta, orient)
 
 
 @ROUTER.post('/run/async')
@@ -119,15 +306,15 @@ async def async_batch_model_handler(r: AsyncBatchProcessRequest, uid: str = Depe
     LOGGER.debug('received request to batch process data async for user %s', uid)
     # get model metadata from postgres server. return
     # 404 error code if model cannot be found
-    model_meta = get_user_model(PG_CREDENTIALS, uid, r.model_id)
+    model_meta = await run_in_stage(Stage.POSTGRES, get_cached_user_model, PG_CREDENTIALS, uid, r.model_id)
     if model_meta is None:
         LOGGER.error('unable to retrieve model %s for user %s', r.model_id, uid)
         return json_response_with_message(status.HTTP_404_NOT_FOUND, 'Cannot find specified model')
 
     schema = model_meta.model_schema
     try:
-        meta, bytes_data = parse_base64_file(r.input_data)
-        if not validate_csv_file(bytes_data, schema.get('input_schema')):
+        meta, bytes_data = await run_in_stage(Stage.COMPUTE, parse_base64_file, r.input_data)
+        if not await run_in_stage(Stage.COMPUTE, validate_csv_file, bytes_data, schema.get('input_schema')):
             LOGGER.error('CSV validation failed')
             raise ValueError
         bytes_data.seek(0)
@@ -136,8 +323,94 @@ async def async_batch_model_handler(r: AsyncBatchProcessRequest, uid: str = Depe
         return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid input data')
 
     # insert job into database and upload input data to s3
-    job_id = insert_async_job(PG_CREDENTIALS, r.model_id, meta.file_size)
-    upload_s3_file(bytes_data, '/tensor-trigger/input-data' + str(job_id))
+    job_id = await run_in_stage(Stage.POSTGRES, insert_async_job, PG_CREDENTIALS, r.model_id, meta.file_size)
+    await run_in_stage(Stage.S3, upload_s3_file, bytes_data, '/tensor-trigger/input-data' + str(job_id))
+    return await _queue_model_run(job_id, r.model_id, uid, r.profile)
+
+
+@ROUTER.post('/run/async/upload')
+async def async_upload_model_handler(request: Request,
+                                     model_id: UUID,
+                                     profile: bool = False,
+                                     uid: str = Depends(get_user())) -> JSONResponse:
+    """API handler used to handle batch processing of
+    model data uploaded as multipart/form-data (with an
+    input_data file field) or as raw CSV request body.
+    The CSV header is validated against the model schema
+    as soon as it is received, and the file is streamed to
+    S3 in parts, meaning that the upload is never held in
+    memory
+
+    Args:
+        request (Request): FastAPI request instance
+        model_id (UUID): ID of model
+        profile (bool): enables sampling profiler in worker
+        uid (str, optional): [description]. Defaults to Depends(get_user()).
+
+    Returns:
+        JSONResponse: [description]
+    """
+
+    LOGGER.debug('received request to stream batch data for user %s', uid)
+    model_meta = await run_in_stage(Stage.POSTGRES, get_cached_user_model, PG_CREDENTIALS, uid, model_id)
+    if model_meta is None:
+        LOGGER.error('unable to retrieve model %s for user %s', model_id, uid)
+        return json_response_with_message(status.HTTP_404_NOT_FOUND, 'Cannot find specified model')
+
+    # generate job ID upfront so that data can be streamed
+    # straight to its final location. the job is only inserted
+    # into the database once the upload has completed
+    job_id = uuid4()
+    upload = StreamingUpload(request, 'input_data')
+    writer = S3MultipartWriter('/tensor-trigger/input-data' + str(job_id))
+    input_schema = model_meta.model_schema.get('input_schema')
+    try:
+        header = bytearray()
+        async for chunk in upload.chunks():
+            if header is not None:
+                # buffer data until the complete header row has
+                # been received and validate against schema
+                header.extend(chunk)
+                end = header.find(b'\n')
+                if end < 0:
+                    if len(header) > UPLOAD_MAX_HEADER_BYTES:
+                        raise InvalidUploadException('CSV header exceeds {} bytes'.format(UPLOAD_MAX_HEADER_BYTES))
+                    continue
+                if not validate_csv_header(bytes(header[:end]), input_schema):
+                    raise InvalidUploadException('invalid CSV header')
+                chunk, header = bytes(header), None
+            await run_in_stage(Stage.S3, writer.write, chunk)
+
+        if header is not None:
+            raise InvalidUploadException('missing CSV input data')
+        await run_in_stage(Stage.S3, writer.close)
+    except InvalidUploadException:
+        LOGGER.exception('unable to validate streamed input data')
+        await run_in_stage(Stage.S3, writer.abort)
+        return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid input data')
+    except Exception:
+        LOGGER.exception('unable to upload streamed input data')
+        await run_in_stage(Stage.S3, writer.abort)
+        return json_response_with_message(status.HTTP_500_INTERNAL_SERVER_ERROR, 'Internal server error')
+
+    await run_in_stage(Stage.POSTGRES, insert_async_job, PG_CREDENTIALS, model_id, upload.size, job_id)
+    return await _queue_model_run(job_id, model_id, uid, profile)
+
+
+async def _queue_model_run(job_id: UUID, model_id: UUID, uid: str, profile: bool = False) -> JSONResponse:
+    """Function used to send model run event to the
+    message broker once input data has been uploaded
+
+    Args:
+        job_id (UUID): ID of job
+        model_id (UUID): ID of model
+        uid (str): user ID
+        profile (bool): enables sampling profiler in worker
+
+    Returns:
+        JSONResponse: [description]
+    """
+
     content = {'http_code': status.HTTP_201_CREATED,
                'message': 'Successfully queued job',
                'job_id': job_id}
@@ -145,12 +418,15 @@ async def async_batch_model_handler(r: AsyncBatchProcessRequest, uid: str = Depe
     # send event to RabbitMQ broker to trigger worker
     event = {'job_id': str(job_id),
              'event_type': 'model_run',
-             'event': {'model_id': str(r.model_id), 'user': uid}}
-    write_to_exchange(MESSAGE_BROKER_URL,
-                      JOB_EXCHANGE_NAME,
-                      json.dumps(event),
-                      JOB_EXCHANGE_TYPE,
-                      JOB_ROUTING_KEY)
+             'event': {'model_id': str(model_id), 'user': uid},
+             'profile': profile}
+    await run_in_stage(Stage.BROKER,
+                       write_to_exchange,
+                       MESSAGE_BROKER_URL,
+                       JOB_EXCHANGE_NAME,
+                       json.dumps(event),
+                       JOB_EXCHANGE_TYPE,
+                       JOB_ROUTING_KEY)
     return JSONResponse(status_code=status.HTTP_201_CREATED, content=je(content))
 
 
@@ -170,28 +446,29 @@ async def train_model_handler(r: TrainModelRequest, uid: str = Depends(get_user(
     LOGGER.debug('received request to batch process data async for user %s', uid)
     # get model metadata from postgres server. return
     # 404 error code if model cannot be found
-    meta = get_user_model(PG_CREDENTIALS, uid, r.model_id)
+    meta = await run_in_stage(Stage.POSTGRES, get_cached_user_model, PG_CREDENTIALS, uid, r.model_id)
     if meta is None:
         LOGGER.error('unable to retrieve model %s for user %s', r.model_id, uid)
         return json_response_with_message(status.HTTP_404_NOT_FOUND, 'Cannot find specified model')
 
-    schema = meta.model_schema
     # validate provided input vectors against
     # the schema registered against the model
-    invalid_input_points = any(not validate_data_point(x, schema.get('input_schema')) for x in r.input_vectors)
-    if invalid_input_points:
+    input_schema = _get_schema(meta, 'input_schema')
+    _, errors = await run_in_stage(Stage.COMPUTE, input_schema.compile_batch, r.input_vectors)
+    if errors:
         LOGGER.error('unable to validate data point(s) against schema %s', meta.model_schema)
-        return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid input vector(s)')
+        return _invalid_vectors_response('Invalid input vector(s)', errors)
 
     # validate provided output vectors against
     # the schema registered against the model
-    invalid_output_points = any(not validate_data_point(x, schema.get('output_schema')) for x in r.output_vectors)
-    if invalid_output_points:
+    output_schema = _get_schema(meta, 'output_schema')
+    _, errors = await run_in_stage(Stage.COMPUTE, output_schema.compile_batch, r.output_vectors)
+    if errors:
         LOGGER.error('unable to validate data point(s) against schema %s', meta.model_schema)
-        return json_response_with_message(status.HTTP_400_BAD_REQUEST, 'Invalid output vector(s)')
+        return _invalid_vectors_response('Invalid output vector(s)', errors)
 
     # insert job into database and generate new event
-    job_id = insert_async_job(PG_CREDENTIALS, r.model_id, 0)
+    job_id = await run_in_stage(Stage.POSTGRES, insert_async_job, PG_CREDENTIALS, r.model_id, 0)
     event = {'job_id': str(job_id),
              'event_type': 'model_train',
              'event': {
@@ -199,13 +476,16 @@ async def train_model_handler(r: TrainModelRequest, uid: str = Depends(get_user(
                  'user': uid,
                  'epochs': r.epochs,
                  'input_vectors': r.input_vectors,
-                 'output_vectors': r.output_vectors}}
+                 'output_vectors': r.output_vectors},
+             'profile': r.profile}
     # send event to RabbitMQ broker to trigger worker
-    write_to_exchange(MESSAGE_BROKER_URL,
-                      JOB_EXCHANGE_NAME,
-                      json.dumps(event),
-                      JOB_EXCHANGE_TYPE,
-                      JOB_ROUTING_KEY)
+    await run_in_stage(Stage.BROKER,
+                       write_to_exchange,
+                       MESSAGE_BROKER_URL,
+                       JOB_EXCHANGE_NAME,
+                       json.dumps(event),
+                       JOB_EXCHANGE_TYPE,
+                       JOB_ROUTING_KEY)
 
     content = {'http_code': status.HTTP_201_CREATED,
                'message': 'Successfully queued job',
@@ -1,10 +1,198 @@
 """Module containing RabbitMQ functionality"""
 
 import logging
+import threading
+from typing import Iterable, Tuple
 
 import pika
+from pika.exceptions import AMQPConnectionError, AMQPChannelError, \
+    StreamLostError
 
 LOGGER = logging.getLogger(__name__)
+RECONNECT_EXCEPTIONS = (AMQPConnectionError, AMQPChannelError, StreamLostError)
+
+
+class RabbitPublisher:
+    """Long-lived, thread safe publisher used to write messages
+    over a RabbitMQ exchange. The connection and channels are
+    reused between publishes and the exchange is only declared
+    once per connection. Single messages are published on a
+    channel with publisher confirms enabled, while bulk publishes
+    are written on a transactional channel so that the entire
+    batch is confirmed by the broker in a single round trip
+
+    Arguments:
+        message_broker_url: str Queue URL of message broker
+        exchange_name: str name of exchange
+        exchange_type: str type of exchange. exchange is not
+            declared if empty
+        durable: bool exchange is declared as durable
+        passive: bool exchange is declared passively
+        max_retries: int number of reconnection attempts
+            made before a publish fails
+    """
+
+    def __init__(self,
+                 message_broker_url: str,
+                 exchange_name: str,
+                 exchange_type: str = '',
+                 durable: bool = False,
+                 passive: bool = False,
+                 max_retries: int = 1):
+        self.message_broker_url = message_broker_url
+        self.exchange_name = exchange_name
+        self.exchange_type = exchange_type
+        self.durable = durable
+        self.passive = passive
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self._connection = None
+        self._confirm_channel = None
+        self._tx_channel = None
+
+    def _connect(self):
+        LOGGER.debug('opening new RabbitMQ publisher connection')
+        self._connection = pika.BlockingConnection(parameters=pika.URLParameters(self.message_broker_url))
+        self._confirm_channel = self._connection.channel()
+        if self.exchange_type != '':
+            LOGGER.debug('declaring new RabbitMQ exchange %s as type %s', self.exchange_name, self.exchange_type)
+            self._confirm_channel.exchange_declare(exchange=self.exchange_name,
+                                                   exchange_type=self.exchange_type,
+                                                   durable=self.durable,
+                                                   passive=self.passive)
+        self._confirm_channel.confirm_delivery()
+
+    def _get_confirm_channel(self):
+        if self._connection is None or self._connection.is_closed:
+            self._connect()
+        else:
+            # service heartbeats that were missed while idle
+            self._connection.process_data_events(time_limit=0)
+        return self._confirm_channel
+
+    def _get_tx_channel(self):
+        self._get_confirm_channel()
+        if self._tx_channel is None or self._tx_channel.is_closed:
+            self._tx_channel = self._connection.channel()
+            self._tx_channel.tx_select()
+        return self._tx_channel
+
+    def _reset(self):
+        try:
+            if self._connection is not None and self._connection.is_open:
+                self._connection.close()
+        except Exception:
+            LOGGER.exception('unable to close RabbitMQ connection')
+        finally:
+            self._connection = None
+            self._confirm_channel = None
+            self._tx_channel = None
+
+    def publish(self, payload: str, routing_key: str = '', persistent: bool = False):
+        """Function used to publish single message over
+        exchange. The function returns once the broker
+        has confirmed the message
+
+        Args:
+            payload (str): payload to send over RabbitMQ broker
+            routing_key (str): routing key of message
+            persistent (bool, optional): send messages are persistent.
+                Defaults to False.
+        """
+
+        properties = pika.BasicProperties(delivery_mode=2 if persistent else 1)
+        with self._lock:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    channel = self._get_confirm_channel()
+                    channel.basic_publish(exchange=self.exchange_name,
+                                          routing_key=routing_key,
+                                          body=payload,
+                                          properties=properties)
+                    return
+                except RECONNECT_EXCEPTIONS:
+                    self._reset()
+                    if attempt >= self.max_retries:
+                        LOGGER.exception('unable to publish message to RabbitMQ broker')
+                        raise
+                    LOGGER.warning('lost connection to RabbitMQ broker. reconnecting')
+
+    def publish_many(self, messages: Iterable[Tuple[str, str]], persistent: bool = False):
+        """Function used to publish batch of messages over
+        exchange. Messages are published in a single AMQP
+        transaction, which is retried as a whole if the
+        connection is lost before the commit
+
+        Args:
+            messages (Iterable[Tuple[str, str]]): iterable of
+                (payload, routing key) tuples
+            persistent (bool, optional): send messages are persistent.
+                Defaults to False.
+        """
+
+        messages = list(messages)
+        properties = pika.BasicProperties(delivery_mode=2 if persistent else 1)
+        with self._lock:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    channel = self._get_tx_channel()
+                    for payload, routing_key in messages:
+                        channel.basic_publish(exchange=self.exchange_name,
+                                              routing_key=routing_key,
+                                              body=payload,
+                                              properties=properties)
+                    channel.tx_commit()
+                    return
+                except RECONNECT_EXCEPTIONS:
+                    self._reset()
+                    if attempt >= self.max_retries:
+                        LOGGER.exception('unable to publish %s messages to RabbitMQ broker', len(messages))
+                        raise
+                    LOGGER.warning('lost connection to RabbitMQ broker. reconnecting')
+
+    def close(self):
+        """Function used to close publisher connection"""
+
+        with self._lock:
+            self._reset()
+
+
+PUBLISHERS = {}
+PUBLISHERS_LOCK = threading.Lock()
+
+def get_publisher(message_broker_url: str,
+                  exchange_name: str,
+                  exchange_type: str = '',
+                  durable: bool = False,
+                  passive: bool = False) -> RabbitPublisher:
+    """Function used to retrieve shared publisher
+    for a given exchange. Publishers are created
+    on first use
+
+    Returns:
+        RabbitPublisher: shared publisher instance
+    """
+
+    key = (message_broker_url, exchange_name, exchange_type, durable, passive)
+    with PUBLISHERS_LOCK:
+        publisher = PUBLISHERS.get(key)
+        if publisher is None:
+            publisher = PUBLISHERS[key] = RabbitPublisher(message_broker_url,
+                                                          exchange_name,
+                                                          exchange_type,
+                                                          durable,
+                                                          passive)
+    return publisher
+
+
+def close_publishers():
+    """Function used to close all shared publishers"""
+
+    with PUBLISHERS_LOCK:
+        for publisher in PUBLISHERS.values():
+            publisher.close()
+        PUBLISHERS.clear()
 
 
 def write_to_exchange(message_broker_url: str,
@@ -28,28 +216,29 @@ def write_to_exchange(message_broker_url: str,
     """
 
     LOGGER.debug('posting message %s over RabbitMQ server', payload)
-    channel, connection = None, None
-    try:
-        # generate new rabbitmq connection and declare exchange
-        connection = pika.BlockingConnection(parameters=pika.URLParameters(message_broker_url))
-        channel = connection.channel()
-        if exchange_type != '':
-            LOGGER.debug('declaring new RabbitMQ exchange %s as type %s', exchange_name, exchange_type)
-            channel.exchange_declare(exchange=exchange_name,
-                                     exchange_type=exchange_type,
-                                     durable=durable,
-                                     passive=passive)
-        # define message properties and send message over queue url
-        message_properties = pika.BasicProperties(delivery_mode=2 if persistent else 1)
-        channel.basic_publish(exchange=exchange_name,
-                              routing_key=routing_key,
-                              body=payload,
-                              properties=message_properties)
-    except pika.exceptions.AMQPConnectionError:
-        LOGGER.exception('unable to connect to RabbitMQ broker')
-        raise
-    finally:
-        if channel is not None:
-            channel.close()
-        if connection is not None:
-            connection.close()
\ No newline at end of file
+    publisher = get_publisher(message_broker_url, exchange_name, exchange_type, durable, passive)
+    publisher.publish(payload, routing_key, persistent)
+
+
+def write_many_to_exchange(message_broker_url: str,
+                           exchange_name: str,
+                           payloads: Iterable[str],
+                           exchange_type: str = '',
+                           routing_key: str = '',
+                           persistent: bool = False,
+                           durable: bool = False,
+                           passive: bool = False):
+    """Function used to write batch of messages over
+    specified RabbitMQ exchange
+
+    Args:
+        message_broker_url (str): Queue URL of message broker
+        exchange_name (str): name of exchange
+        payloads (Iterable[str]): payloads to send over RabbitMQ broker
+        exchange_type (str): type of exchange
+        persistent (bool, optional): send messages are persistent.
+            Defaults to False.
+    """
+
+    publisher = get_publisher(message_broker_url, exchange_name, exchange_type, durable, passive)
+    publisher.publish_many(((p, routing_key) for p in payloads), persistent)
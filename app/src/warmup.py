@@ -0,0 +1,138 @@
+"""Module containing background warm-up used to load heavy
+dependencies after the API has started serving requests, and
+to pre-warm the most frequently accessed models before the API
+reports itself as ready"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+
+from src.config import PG_CREDENTIALS, WARMUP_ENABLED, PREWARM_ENABLED, \
+    PREWARM_MAX_MODELS, PREWARM_MAX_BYTES, MODEL_CACHE_MAX_ENTRIES
+from src.executors import run_in_stage, Stage
+from src.logic.tensor import import_tensorflow, get_network_size
+from src.logic.serving import get_network
+from src.persistence.postgres import get_hot_models
+from src.persistence.s3 import get_client
+
+
+LOGGER = logging.getLogger(__name__)
+
+WARMUP_COMPLETE = threading.Event()
+PREWARM_COMPLETE = threading.Event()
+
+
+def _import_pandas():
+    import pandas
+    return pandas
+
+
+WARMUP_TASKS = [
+    ('tensorflow', import_tensorflow),
+    ('pandas', _import_pandas),
+    ('s3', get_client)
+]
+
+
+def warm_up():
+    """Function used to import heavy dependencies and
+    create clients ahead of first use, meaning that the
+    first requests do not pay the import cost. Failures
+    are logged and the dependency is loaded on first use
+    instead"""
+
+    start = time.perf_counter()
+    for name, task in WARMUP_TASKS:
+        task_start = time.perf_counter()
+        try:
+            task()
+            LOGGER.info('warmed up %s in %.2fs', name, time.perf_counter() - task_start)
+        except Exception:
+            LOGGER.exception('unable to warm up %s', name)
+
+    LOGGER.info('completed warm-up in %.2fs', time.perf_counter() - start)
+    WARMUP_COMPLETE.set()
+
+
+def start_warmup() -> threading.Thread:
+    """Function used to start warm-up in a background
+    thread
+
+    Returns:
+        threading.Thread: warm-up thread
+    """
+
+    thread = threading.Thread(target=warm_up, name='warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def _run_dummy_inference(network, input_shape: int):
+    # run a single row through the model so that any lazily
+    # allocated buffers and kernels are initialized
+    network.predict(np.zeros((1, input_shape), dtype=np.float32))
+
+
+async def prewarm_models(limit: int = PREWARM_MAX_MODELS, max_bytes: int = PREWARM_MAX_BYTES) -> int:
+    """Function used to load the most frequently accessed
+    models into the model cache and run a dummy inference
+    on each, meaning that the first requests after a deploy
+    do not pay for downloading, deserializing and tracing
+    the models. Models are loaded in order of access count
+    until the memory budget is exhausted. Failures are logged
+    and the model is loaded on first use instead
+
+    Args:
+        limit (int): maximum number of models to load
+        max_bytes (int): memory budget of pre-warmed models
+
+    Returns:
+        int: number of pre-warmed models
+    """
+
+    start = time.perf_counter()
+    loaded, used = 0, 0
+    try:
+        models = await run_in_stage(Stage.POSTGRES, get_hot_models, PG_CREDENTIALS, min(limit, MODEL_CACHE_MAX_ENTRIES))
+        for model_meta in models:
+            # the stored file size is used as an estimate of
+            # the model size before the model is loaded
+            if used + model_meta.size > max_bytes:
+                LOGGER.info('skipping pre-warm of model %s: memory budget of %s bytes exhausted',
+                            model_meta.model_id, max_bytes)
+                continue
+
+            model_start = time.perf_counter()
+            try:
+                network = await get_network(model_meta, record_access=False)
+                if model_meta.input_shape:
+                    await run_in_stage(Stage.COMPUTE, _run_dummy_inference, network, model_meta.input_shape)
+            except Exception:
+                LOGGER.exception('unable to pre-warm model %s', model_meta.model_id)
+                continue
+
+            used += get_network_size(network, model_meta.size)
+            loaded += 1
+            LOGGER.info('pre-warmed model %s in %.2fs', model_meta.model_id, time.perf_counter() - model_start)
+    except Exception:
+        LOGGER.exception('unable to retrieve models to pre-warm')
+    finally:
+        PREWARM_COMPLETE.set()
+
+    LOGGER.info('pre-warmed %s models (%s bytes) in %.2fs', loaded, used, time.perf_counter() - start)
+    return loaded
+
+
+def get_readiness() -> dict:
+    """Function used to determine the readiness of
+    each warm-up stage. Disabled stages are reported
+    as ready
+
+    Returns:
+        dict: dict containing readiness of each stage
+    """
+
+    return {'dependencies': not WARMUP_ENABLED or WARMUP_COMPLETE.is_set(),
+            'models': not PREWARM_ENABLED or PREWARM_COMPLETE.is_set()}
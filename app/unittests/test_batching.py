@@ -0,0 +1,61 @@
+import asyncio
+import gc
+import unittest
+
+import numpy as np
+
+from src.logic.batching import MicroBatcher
+
+
+class Network:
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, inputs: np.ndarray) -> np.ndarray:
+        self.batches.append(len(inputs))
+        return inputs * 2
+
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def test_concurrent_requests_batched(self):
+        batcher, network = MicroBatcher(max_batch_size=8, max_wait_us=10000), Network()
+
+        async def run():
+            inputs = [np.full((1, 2), i, dtype=np.float32) for i in range(3)]
+            return inputs, await asyncio.gather(*[batcher.submit('key', network, x) for x in inputs])
+
+        inputs, results = asyncio.run(run())
+        self.assertEqual(network.batches, [3])
+        for x, result in zip(inputs, results):
+            np.testing.assert_array_equal(result, x * 2)
+        self.assertEqual(batcher.stats()['batches'], 1)
+
+    def test_flushed_when_full(self):
+        batcher, network = MicroBatcher(max_batch_size=2, max_wait_us=10 ** 7), Network()
+
+        async def run():
+            inputs = np.ones((1, 2), dtype=np.float32)
+            return await asyncio.gather(*[batcher.submit('key', network, inputs) for _ in range(4)])
+
+        self.assertEqual(len(asyncio.run(run())), 4)
+        self.assertEqual(network.batches, [2, 2])
+
+    def test_running_batches_referenced(self):
+        batcher, network = MicroBatcher(max_batch_size=1, max_wait_us=10000), Network()
+
+        async def run():
+            request = asyncio.ensure_future(batcher.submit('key', network, np.ones((1, 2), dtype=np.float32)))
+            await asyncio.sleep(0)
+            # batch task is only referenced by the batcher
+            self.assertEqual(len(batcher._tasks), 1)
+            gc.collect()
+            return await request
+
+        np.testing.assert_array_equal(asyncio.run(run()), [[2, 2]])
+        self.assertEqual(len(batcher._tasks), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from src.executors import run_in_stage, Stage, EXECUTORS, STAGE_CONCURRENCY
+
+
+class TestRunInStage(unittest.TestCase):
+
+    def test_runs_on_stage_executor(self):
+        async def run():
+            return await run_in_stage(Stage.S3, lambda: threading.current_thread().name)
+
+        self.assertTrue(asyncio.run(run()).startswith('tt-s3'))
+
+    def test_arguments_and_errors(self):
+        def divide(a: int, b: int = 1) -> float:
+            return a / b
+
+        async def run():
+            result = await run_in_stage(Stage.COMPUTE, divide, 6, b=3)
+            with self.assertRaises(ZeroDivisionError):
+                await run_in_stage(Stage.COMPUTE, divide, 1, 0)
+            return result
+
+        self.assertEqual(asyncio.run(run()), 2)
+
+    def test_event_loop_not_blocked(self):
+        release = threading.Event()
+
+        async def run():
+            blocked = asyncio.ensure_future(run_in_stage(Stage.POSTGRES, release.wait, 5))
+            # event loop keeps serving other work while the stage is busy
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            elapsed = time.perf_counter() - start
+            release.set()
+            await blocked
+            return elapsed
+
+        self.assertLess(asyncio.run(run()), 1)
+
+    def test_executor_per_stage(self):
+        self.assertEqual(set(EXECUTORS), set(Stage))
+        for stage, executor in EXECUTORS.items():
+            self.assertEqual(executor._max_workers, STAGE_CONCURRENCY[stage])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import asyncio
+import io
+import threading
+import unittest
+from collections import namedtuple
+from unittest import mock
+from uuid import uuid4
+
+import numpy as np
+import orjson
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.routers import jobs
+from src.logic import results
+
+
+JobMeta = namedtuple('JobMeta', ['job_id', 'model_id', 'job_state'])
+ModelMeta = namedtuple('ModelMeta', ['model_id', 'version', 'model_schema'])
+
+SCHEMA = {'input_schema': {'x': {'var_type': 'FLOAT', 'index': 0}},
+          'output_schema': {'z': {'var_type': 'FLOAT', 'index': 1},
+                            'y': {'var_type': 'FLOAT', 'index': 0}}}
+
+# results are written in blocks of 4, 4 and 2 rows
+BLOCK_ROWS = [4, 4, 2]
+TOTAL_ROWS = sum(BLOCK_ROWS)
+
+
+def build_results() -> tuple:
+    data, blocks, start = b'', [], 0
+    for rows in BLOCK_ROWS:
+        block = b''.join(orjson.dumps([float(i), float(-i)]) + b'\n' for i in range(start, start + rows))
+        blocks.append({'start': start, 'rows': rows, 'offset': len(data), 'length': len(block)})
+        data += block
+        start += rows
+    return data, {'rows': TOTAL_ROWS, 'format': 'ndjson', 'blocks': blocks}
+
+
+class TestJobResults(unittest.TestCase):
+
+    def setUp(self):
+        self.job = JobMeta(uuid4(), uuid4(), 2)
+        self.data, self.index = build_results()
+        self.ranges = []
+
+        def retrieve_s3_range(path: str, start: int, end: int) -> bytes:
+            self.ranges.append((start, end))
+            return self.data[start:end + 1]
+
+        patches = [mock.patch.object(jobs, 'get_cached_user_job', return_value=self.job),
+                   mock.patch.object(jobs, 'get_cached_user_model',
+                                     return_value=ModelMeta(self.job.model_id, 1, SCHEMA)),
+                   mock.patch.object(results, 'retrieve_s3_file',
+                                     return_value=io.BytesIO(orjson.dumps(self.index))),
+                   mock.patch.object(results, 'retrieve_s3_range', retrieve_s3_range),
+                   mock.patch.object(results, 'open_s3_stream',
+                                     lambda path, start: io.BytesIO(self.data[start:]))]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        app = FastAPI()
+        app.include_router(jobs.ROUTER, prefix='/jobs')
+        self.client = TestClient(app)
+        self.client.headers['X-Authenticated-Userid'] = 'user'
+
+    def get_page(self, offset: int, limit: int) -> dict:
+        response = self.client.get('/jobs/{}/results'.format(self.job.job_id), params={'offset': offset, 'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_page_across_block_boundary(self):
+        page = self.get_page(3, 3)
+        self.assertEqual(page['results'], [{'y': 3.0, 'z': -3.0}, {'y': 4.0, 'z': -4.0}, {'y': 5.0, 'z': -5.0}])
+        self.assertEqual(page['total_rows'], TOTAL_ROWS)
+        self.assertEqual(page['next_offset'], 6)
+        # only the first two blocks are downloaded
+        self.assertEqual(self.ranges, [(0, self.index['blocks'][1]['offset'] + self.index['blocks'][1]['length'] - 1)])
+
+    def test_pages_cover_all_rows(self):
+        rows, offset = [], 0
+        while offset is not None:
+            page = self.get_page(offset, 3)
+            rows.extend(row['y'] for row in page['results'])
+            offset = page['next_offset']
+        self.assertEqual(rows, [float(i) for i in range(TOTAL_ROWS)])
+
+    def test_last_page(self):
+        page = self.get_page(8, 2)
+        self.assertEqual(len(page['results']), 2)
+        self.assertIsNone(page['next_offset'])
+
+        page = self.get_page(6, 10)
+        self.assertEqual(len(page['results']), 4)
+        self.assertIsNone(page['next_offset'])
+
+        page = self.get_page(TOTAL_ROWS, 10)
+        self.assertEqual(page['results'], [])
+        self.assertIsNone(page['next_offset'])
+
+    def test_columns_orient(self):
+        response = self.client.get('/jobs/{}/results'.format(self.job.job_id),
+                                   params={'offset': 1, 'limit': 2, 'orient': 'columns'})
+        self.assertEqual(response.json()['results'], {'y': [1.0, 2.0], 'z': [-1.0, -2.0]})
+
+    def test_invalid_job_state(self):
+        with mock.patch.object(jobs, 'get_cached_user_job', return_value=self.job._replace(job_state=1)):
+            response = self.client.get('/jobs/{}/results'.format(self.job.job_id))
+        self.assertEqual(response.status_code, 400)
+
+    def test_stream_results(self):
+        response = self.client.get('/jobs/{}/results/stream'.format(self.job.job_id), params={'offset': 5})
+        self.assertEqual(response.status_code, 200)
+        rows = [orjson.loads(line) for line in response.content.splitlines()]
+        self.assertEqual(rows, [{'y': float(i), 'z': float(-i)} for i in range(5, TOTAL_ROWS)])
+
+    def test_stream_closed_during_read(self):
+        started, release, closed = threading.Event(), threading.Event(), threading.Event()
+
+        def iter_result_blocks(*args):
+            try:
+                started.set()
+                release.wait(5)
+                yield np.zeros((1, 2), dtype=np.float32)
+            finally:
+                closed.set()
+
+        async def disconnect():
+            stream = jobs._stream_job_results(self.job.job_id, self.index, 0, ['y', 'z'])
+            task = asyncio.ensure_future(stream.__anext__())
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            # client disconnects while the block is still being read
+            task.cancel()
+            await asyncio.sleep(0.05)
+            release.set()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with mock.patch.object(jobs, 'iter_result_blocks', iter_result_blocks):
+            asyncio.run(disconnect())
+        self.assertTrue(closed.is_set())
+
+
+if __name__ == '__main__':
+    unittest.main()
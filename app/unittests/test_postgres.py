@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+
+import psycopg2
+
+from src.persistence.postgres import ConnectionPool, PostgresCredentials, PoolTimeoutError
+
+
+def get_credentials(**kwargs) -> PostgresCredentials:
+    return PostgresCredentials(PG_HOST='localhost', PG_DATABASE='test', PG_USER='test', PG_PASSWORD='test',
+                               PG_POOL_MIN_SIZE=0, PG_POOL_MAX_SIZE=2, PG_POOL_TIMEOUT=0.1, **kwargs)
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def test_connect_fails_then_recovers(self):
+        pool = ConnectionPool(get_credentials())
+        with mock.patch.object(pool, '_connect', side_effect=psycopg2.OperationalError):
+            # more failures than the pool size, e.g. during a database outage
+            for _ in range(pool.max_size * 3):
+                with self.assertRaises(psycopg2.OperationalError):
+                    pool.acquire()
+        stats = pool.stats()
+        self.assertEqual((stats['size'], stats['in_use'], stats['idle']), (0, 0, 0))
+
+        connection = mock.MagicMock(closed=False)
+        with mock.patch.object(pool, '_connect', return_value=connection):
+            self.assertIs(pool.acquire(), connection)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_reconnect_fails_after_health_check(self):
+        pool = ConnectionPool(get_credentials(PG_POOL_HEALTH_CHECK_INTERVAL=0))
+        broken = mock.MagicMock(closed=False)
+        broken.cursor.side_effect = psycopg2.OperationalError
+        with mock.patch.object(pool, '_connect', return_value=broken):
+            pool.release(pool.acquire())
+
+        with mock.patch.object(pool, '_connect', side_effect=psycopg2.OperationalError):
+            with self.assertRaises(psycopg2.OperationalError):
+                pool.acquire()
+        broken.close.assert_called_once()
+        stats = pool.stats()
+        self.assertEqual((stats['size'], stats['in_use'], stats['idle']), (0, 0, 0))
+
+        connection = mock.MagicMock(closed=False)
+        with mock.patch.object(pool, '_connect', return_value=connection):
+            self.assertIs(pool.acquire(), connection)
+
+    def test_timeout_when_exhausted(self):
+        pool = ConnectionPool(get_credentials())
+        with mock.patch.object(pool, '_connect', side_effect=lambda: mock.MagicMock(closed=False)):
+            connections = [pool.acquire() for _ in range(pool.max_size)]
+            with self.assertRaises(PoolTimeoutError):
+                pool.acquire()
+            pool.release(connections[0])
+            self.assertIs(pool.acquire(), connections[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from uuid import uuid4
+
+import numpy as np
+
+from src.logic.schema import CompiledSchema, RowError, get_compiled_schema
+
+
+SCHEMA = {'b': {'var_type': 'FLOAT', 'index': 1},
+          'c': {'var_type': 'INT', 'index': 2},
+          'a': {'var_type': 'FLOAT', 'index': 0}}
+
+
+class TestCompiledSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.schema = CompiledSchema(SCHEMA)
+
+    def test_columns_in_index_order(self):
+        self.assertEqual(self.schema.columns, ['a', 'b', 'c'])
+        self.assertEqual(self.schema.var_types, ['FLOAT', 'FLOAT', 'INT'])
+
+    def test_compile_vector_in_index_order(self):
+        values, errors = self.schema.compile_vector({'c': 3, 'a': 1.0, 'b': 2.0})
+        self.assertEqual(errors, [])
+        self.assertEqual(values.dtype, np.float32)
+        np.testing.assert_array_equal(values, [[1.0, 2.0, 3.0]])
+
+    def test_compile_batch_in_index_order(self):
+        values, errors = self.schema.compile_batch([{'c': 3, 'a': 1.0, 'b': 2.0},
+                                                    {'b': 5.0, 'c': 6, 'a': 4.0}])
+        self.assertEqual(errors, [])
+        np.testing.assert_array_equal(values, [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+    def test_nan_accepted_in_float_columns(self):
+        row = {'a': float('nan'), 'b': 2.0, 'c': 3}
+        values, errors = self.schema.compile_vector(row)
+        self.assertEqual(errors, [])
+        self.assertTrue(np.isnan(values[0, 0]))
+
+        values, errors = self.schema.compile_batch([row, {'a': 1.0, 'b': float('nan'), 'c': 3}])
+        self.assertEqual(errors, [])
+        self.assertTrue(np.isnan(values[0, 0]))
+        self.assertTrue(np.isnan(values[1, 1]))
+
+    def test_non_finite_rejected_in_int_columns(self):
+        for value in (float('nan'), float('inf')):
+            row = {'a': 1.0, 'b': 2.0, 'c': value}
+            self.assertEqual(self.schema.compile_vector(row)[1], [RowError(row=0, columns=['c'])])
+            self.assertEqual(self.schema.compile_batch([row])[1], [RowError(row=0, columns=['c'])])
+
+    def test_missing_and_non_numeric_rejected(self):
+        rows = [{'a': 1.0, 'b': 2.0, 'c': 3},
+                {'a': 1.0, 'c': 3},
+                {'a': 'abc', 'b': None, 'c': 3}]
+        _, errors = self.schema.compile_batch(rows)
+        self.assertEqual(errors, [RowError(row=1, columns=['b']), RowError(row=2, columns=['a', 'b'])])
+        self.assertEqual(self.schema.compile_vector(rows[1])[1], [RowError(row=0, columns=['b'])])
+
+    def test_max_errors(self):
+        _, errors = self.schema.compile_batch([{'a': 1.0}] * 10, max_errors=3)
+        self.assertEqual([e.row for e in errors], [0, 1, 2])
+
+    def test_compile_columns(self):
+        values, errors = self.schema.compile_columns({'c': [3, 6], 'b': [2.0, float('nan')], 'a': [1.0, 4.0]})
+        self.assertEqual(errors, [])
+        np.testing.assert_array_equal(values, [[1.0, 2.0, 3.0], [4.0, np.nan, 6.0]])
+
+        _, errors = self.schema.compile_columns({'a': [1.0], 'b': [2.0], 'c': [float('nan')]})
+        self.assertEqual(errors, [RowError(row=0, columns=['c'])])
+        with self.assertRaises(ValueError):
+            self.schema.compile_columns({'a': [1.0], 'b': [2.0]})
+        with self.assertRaises(ValueError):
+            self.schema.compile_columns({'a': [1.0], 'b': [2.0], 'c': [3, 4]})
+
+    def test_compile_array(self):
+        values, errors = self.schema.compile_array(np.array([[1.0, np.nan, 3.0], [4.0, 5.0, np.inf]]))
+        self.assertEqual(errors, [RowError(row=1, columns=['c'])])
+        self.assertEqual(values.shape, (2, 3))
+        with self.assertRaises(ValueError):
+            self.schema.compile_array(np.zeros((2, 2)))
+
+
+class TestGetCompiledSchema(unittest.TestCase):
+
+    def test_cached_by_model_and_version(self):
+        model_id = uuid4()
+        schema = get_compiled_schema(model_id, 1, 'input_schema', SCHEMA)
+        self.assertIs(get_compiled_schema(model_id, 1, 'input_schema', SCHEMA), schema)
+        self.assertIsNot(get_compiled_schema(model_id, 2, 'input_schema', SCHEMA), schema)
+        self.assertIsNot(get_compiled_schema(model_id, 1, 'output_schema', SCHEMA), schema)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import asyncio
+import importlib.util
+import io
+import os
+import tempfile
+import unittest
+from collections import namedtuple
+from unittest import mock
+from uuid import uuid4
+
+import numpy as np
+
+from src.logic import serving
+from src.logic.tensor import load_network
+
+
+HAS_TENSORFLOW = importlib.util.find_spec('tensorflow') is not None and importlib.util.find_spec('h5py') is not None
+
+
+class TestBuildServingArtifact(unittest.TestCase):
+
+    def test_converted_from_version_content(self):
+        model_id, loaded, uploaded = uuid4(), [], []
+
+        def load_network(model_file: io.BytesIO):
+            loaded.append(model_file.getvalue())
+            return object()
+
+        with mock.patch.object(serving, 'load_network', load_network), \
+                mock.patch.object(serving, 'convert_network', return_value=b'artifact'), \
+                mock.patch.object(serving, 'upload_s3_file', lambda content, path: uploaded.append(path)), \
+                mock.patch.object(serving, 'retrieve_s3_file') as retrieve_s3_file, \
+                mock.patch.object(serving, 'delete_s3_file'):
+            model_file = io.BytesIO(b'version 2')
+            self.assertTrue(asyncio.run(serving.build_serving_artifact(model_id, 2, model_file)))
+
+        retrieve_s3_file.assert_not_called()
+        self.assertEqual(loaded, [b'version 2'])
+        self.assertTrue(model_file.closed)
+        self.assertEqual(uploaded, [serving.get_serving_path(model_id, 2, serving.SERVING_FORMAT)])
+
+
+ModelMeta = namedtuple('ModelMeta', ['model_id', 'version', 'input_shape', 'size'])
+
+
+class TestLoadModelVersion(unittest.TestCase):
+
+    def load(self, metadata: dict) -> mock.Mock:
+        model_meta = ModelMeta(uuid4(), 2, 3, 0)
+
+        async def get_serving_network(model_id, version):
+            return None
+
+        with mock.patch.object(serving, 'get_serving_network', get_serving_network), \
+                mock.patch.object(serving, 'retrieve_s3_file_with_metadata',
+                                  return_value=(io.BytesIO(b'model'), metadata)), \
+                mock.patch.object(serving, 'load_network', return_value=object()), \
+                mock.patch.object(serving, 'trace_network', side_effect=lambda network, shape: network), \
+                mock.patch.object(serving, 'get_network_size', return_value=0), \
+                mock.patch.object(serving, 'schedule_serving_conversion') as schedule:
+            asyncio.run(serving._load_model_version(model_meta))
+        serving.MODEL_CACHE.invalidate(model_meta.model_id)
+        return schedule
+
+    def test_converted_if_labelled_with_version(self):
+        self.assertEqual(self.load({serving.MODEL_VERSION_METADATA: '2'}).call_count, 1)
+        # files uploaded before files were labelled
+        self.assertEqual(self.load({}).call_count, 1)
+
+    def test_not_converted_if_labelled_with_other_version(self):
+        # retrained model uploaded before the version was incremented
+        self.load({serving.MODEL_VERSION_METADATA: '3'}).assert_not_called()
+
+
+@unittest.skipUnless(HAS_TENSORFLOW, 'tensorflow not installed')
+class TestServingArtifacts(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        import tensorflow as tf
+
+        tf.random.set_seed(0)
+        network = tf.keras.Sequential([tf.keras.layers.InputLayer(input_shape=(3,)),
+                                       tf.keras.layers.Dense(4, activation='relu'),
+                                       tf.keras.layers.Dense(2)])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.h5')
+            network.save(path, save_format='h5')
+            with open(path, 'rb') as handle:
+                cls.content = handle.read()
+
+        cls.inputs = np.random.default_rng(0).random((5, 3), dtype=np.float32)
+        cls.expected = load_network(io.BytesIO(cls.content)).predict(cls.inputs)
+
+    def assert_round_trip(self, serving_format: str):
+        artifact = serving.convert_network(load_network(io.BytesIO(self.content)), serving_format)
+        network = serving.load_serving_network(artifact, serving_format)
+        # batch size changes between calls
+        for rows in (5, 1, 5):
+            np.testing.assert_allclose(network.predict(self.inputs[:rows]), self.expected[:rows], atol=1e-5)
+
+    def test_savedmodel_round_trip(self):
+        self.assert_round_trip(serving.SAVEDMODEL_FORMAT)
+
+    def test_tflite_round_trip(self):
+        self.assert_round_trip(serving.TFLITE_FORMAT)
+
+    def test_converted_from_spooled_file(self):
+        artifacts = []
+        spool = tempfile.TemporaryFile()
+        spool.write(self.content)
+
+        with mock.patch.object(serving, 'upload_s3_file', lambda content, path: artifacts.append(content)):
+            self.assertTrue(asyncio.run(serving.build_serving_artifact(uuid4(), 1, spool)))
+        self.assertTrue(spool.closed)
+
+        network = serving.load_serving_network(artifacts[0], serving.SERVING_FORMAT)
+        np.testing.assert_allclose(network.predict(self.inputs), self.expected, atol=1e-5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import asyncio
+import unittest
+
+from src.logic.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_calls_coalesced(self):
+        flight, calls = SingleFlight('test'), []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return object()
+
+        async def run():
+            return await asyncio.gather(*[flight.do('key', load) for _ in range(4)])
+
+        results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+        stats = flight.stats()
+        self.assertEqual((stats['calls'], stats['coalesced'], stats['in_flight']), (1, 3, 0))
+
+    def test_error_propagated(self):
+        flight = SingleFlight('test')
+
+        async def load():
+            await asyncio.sleep(0.01)
+            raise ValueError('load failed')
+
+        async def loaded():
+            return 'loaded'
+
+        async def run():
+            results = await asyncio.gather(*[flight.do('key', load) for _ in range(3)], return_exceptions=True)
+            # failed calls are not cached
+            return results, await flight.do('key', loaded)
+
+        results, retry = asyncio.run(run())
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(retry, 'loaded')
+        self.assertEqual(flight.stats()['failures'], 1)
+
+    def test_call_survives_cancelled_caller(self):
+        flight = SingleFlight('test')
+
+        async def load():
+            await asyncio.sleep(0.01)
+            return 'loaded'
+
+        async def run():
+            first = asyncio.ensure_future(flight.do('key', load))
+            second = asyncio.ensure_future(flight.do('key', load))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(run()), 'loaded')
+        self.assertEqual(flight.stats()['calls'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import unittest
+from collections import namedtuple
+from unittest import mock
+from uuid import uuid4
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.routers import tensor
+from src.logic.tensor import _format_output_vector
+
+
+ModelMeta = namedtuple('ModelMeta', ['model_id', 'version', 'model_schema'])
+
+SCHEMA = {'input_schema': {'x': {'var_type': 'FLOAT', 'index': 0},
+                           'n': {'var_type': 'INT', 'index': 1}},
+          'output_schema': {'z': {'var_type': 'FLOAT', 'index': 1},
+                            'y': {'var_type': 'FLOAT', 'index': 0}}}
+
+
+async def get_network(model_meta):
+    return object()
+
+
+class TestTensorRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.model_meta = ModelMeta(uuid4(), 1, SCHEMA)
+        self.inputs = []
+
+        def run_model(network, inputs, output_schema):
+            self.inputs.append(inputs)
+            return _format_output_vector(np.array([[1.0, 2.0]]), output_schema)[0]
+
+        def run_model_batched(network, inputs):
+            self.inputs.append(inputs)
+            return np.tile(np.array([[1.0, 2.0]], dtype=np.float32), (len(inputs), 1))
+
+        patches = [mock.patch.object(tensor, 'get_cached_user_model', return_value=self.model_meta),
+                   mock.patch.object(tensor, 'get_network', get_network),
+                   mock.patch.object(tensor, 'BATCHING_ENABLED', False),
+                   mock.patch.object(tensor, 'run_model', run_model),
+                   mock.patch.object(tensor, 'run_model_batched', run_model_batched)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        app = FastAPI()
+        app.include_router(tensor.ROUTER, prefix='/tensor')
+        self.client = TestClient(app)
+        self.client.headers['X-Authenticated-Userid'] = 'user'
+
+    def post(self, path: str, payload: dict):
+        # NaN is not valid strict JSON, and is sent as a bare literal
+        return self.client.post(path, data=json.dumps(payload), headers={'Content-Type': 'application/json'})
+
+    def test_nan_accepted_in_float_column(self):
+        model_id = str(self.model_meta.model_id)
+        response = self.post('/tensor/run', {'model_id': model_id, 'input_vector': {'x': float('nan'), 'n': 1}})
+        self.assertEqual(response.status_code, 200)
+
+        vectors = [{'x': float('nan'), 'n': 1}, {'x': 2.0, 'n': 2}]
+        response = self.post('/tensor/run/batch', {'model_id': model_id, 'input_vectors': vectors})
+        self.assertEqual(response.status_code, 200)
+
+        single, batch = self.inputs
+        self.assertTrue(np.isnan(single[0, 0]))
+        self.assertTrue(np.isnan(batch[0, 0]))
+
+    def test_nan_rejected_in_int_column(self):
+        model_id = str(self.model_meta.model_id)
+        response = self.post('/tensor/run', {'model_id': model_id, 'input_vector': {'x': 1.0, 'n': float('nan')}})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [{'row': 0, 'columns': ['n']}])
+
+        vectors = [{'x': 1.0, 'n': 1}, {'x': 2.0, 'n': float('nan')}]
+        response = self.post('/tensor/run/batch', {'model_id': model_id, 'input_vectors': vectors})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [{'row': 1, 'columns': ['n']}])
+        self.assertEqual(self.inputs, [])
+
+    def test_missing_value_rejected(self):
+        model_id = str(self.model_meta.model_id)
+        response = self.post('/tensor/run/batch', {'model_id': model_id, 'input_vectors': [{'n': 1}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [{'row': 0, 'columns': ['x']}])
+
+    def test_outputs_named_in_index_order(self):
+        model_id = str(self.model_meta.model_id)
+        response = self.post('/tensor/run', {'model_id': model_id, 'input_vector': {'x': 1.0, 'n': 1}})
+        self.assertEqual(response.json()['output'], {'y': 1.0, 'z': 2.0})
+
+        vectors = [{'x': 1.0, 'n': 1}]
+        response = self.post('/tensor/run/batch', {'model_id': model_id, 'input_vectors': vectors})
+        self.assertEqual(response.json()['output'], [{'y': 1.0, 'z': 2.0}])
+
+        response = self.client.post('/tensor/run/batch', params={'orient': 'columns'},
+                                    json={'model_id': model_id, 'input_vectors': vectors})
+        self.assertEqual(response.json()['output'], {'y': [1.0], 'z': [2.0]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,7 @@
+"""Package containing local stand-ins for boto3, psycopg2 and
+pika used by the end-to-end benchmarks. The directory is added
+to the front of PYTHONPATH of the benchmarked services, meaning
+that the stand-ins are imported in place of the real clients.
+Each stand-in only implements the subset of the client API used
+by the API and worker, and is backed by the local filesystem so
+that state is shared between the API and worker processes"""
@@ -0,0 +1,177 @@
+"""Stand-in for boto3 used by the benchmarks. Objects are
+stored as files below the directory set in BENCH_S3_ROOT, and
+a fixed latency (BENCH_S3_LATENCY_MS) can be added to every
+request to approximate a remote object store"""
+
+import hashlib
+import io
+import os
+import shutil
+import time
+import uuid
+from typing import BinaryIO
+from urllib.parse import quote
+
+from botocore.exceptions import ClientError
+
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class StreamingBody:
+    """File-like object returned as the body of
+    get_object responses
+
+    Arguments:
+        handle: BinaryIO open file
+        length: int number of bytes readable from file
+    """
+
+    def __init__(self, handle: BinaryIO, length: int):
+        self._handle = handle
+        self._remaining = length
+
+    def read(self, amt: int = None) -> bytes:
+        if amt is None or amt < 0 or amt > self._remaining:
+            amt = self._remaining
+        data = self._handle.read(amt)
+        self._remaining -= len(data)
+        return data
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE):
+        while True:
+            data = self.read(chunk_size)
+            if not data:
+                return
+            yield data
+
+    def close(self):
+        self._handle.close()
+
+
+class S3Client:
+    """Stand-in for the boto3 S3 client, implementing
+    the operations used by the API and worker
+
+    Arguments:
+        root: str directory used to store objects
+        latency: float latency (in seconds) added to requests
+    """
+
+    def __init__(self, root: str, latency: float = 0.0):
+        self.root = root
+        self.latency = latency
+
+    def _path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, bucket, quote(key, safe=''))
+
+    def _uploads(self, bucket: str, upload_id: str) -> str:
+        return os.path.join(self.root, bucket, '.uploads', upload_id)
+
+    def _wait(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _open(self, bucket: str, key: str, operation: str) -> BinaryIO:
+        try:
+            return open(self._path(bucket, key), 'rb')
+        except FileNotFoundError:
+            code = '404' if operation == 'HeadObject' else 'NoSuchKey'
+            raise ClientError({'Error': {'Code': code, 'Message': 'Not Found'}}, operation) from None
+
+    def _write(self, bucket: str, key: str, content: BinaryIO):
+        path = self._path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+        with open(tmp_path, 'wb') as handle:
+            shutil.copyfileobj(content, handle, CHUNK_SIZE)
+        # objects are replaced atomically, matching the
+        # visibility guarantees of S3
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _etag(stat: os.stat_result) -> str:
+        return '"{}"'.format(hashlib.md5('{}-{}'.format(stat.st_mtime_ns, stat.st_size).encode()).hexdigest())
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        self._wait()
+        with self._open(Bucket, Key, 'HeadObject') as handle:
+            stat = os.fstat(handle.fileno())
+        return {'ContentLength': stat.st_size, 'ETag': self._etag(stat)}
+
+    def get_object(self, Bucket: str, Key: str, Range: str = None, **kwargs) -> dict:
+        self._wait()
+        handle = self._open(Bucket, Key, 'GetObject')
+        stat = os.fstat(handle.fileno())
+        start, end = 0, stat.st_size - 1
+        if Range is not None:
+            first, _, last = Range.replace('bytes=', '').partition('-')
+            start = int(first)
+            end = min(int(last), end) if last else end
+        handle.seek(start)
+        length = max(end - start + 1, 0)
+        return {'Body': StreamingBody(handle, length), 'ContentLength': length, 'ETag': self._etag(stat)}
+
+    def download_fileobj(self, Bucket: str, Key: str, Fileobj: BinaryIO, **kwargs):
+        self._wait()
+        with self._open(Bucket, Key, 'GetObject') as handle:
+            shutil.copyfileobj(handle, Fileobj, CHUNK_SIZE)
+
+    def download_file(self, Bucket: str, Key: str, Filename: str, **kwargs):
+        with open(Filename, 'wb') as handle:
+            self.download_fileobj(Bucket, Key, handle)
+
+    def upload_fileobj(self, Fileobj: BinaryIO, Bucket: str, Key: str, **kwargs):
+        self._wait()
+        self._write(Bucket, Key, Fileobj)
+
+    def put_object(self, Bucket: str, Key: str, Body=b'', **kwargs) -> dict:
+        self._wait()
+        if isinstance(Body, (bytes, bytearray)):
+            Body = io.BytesIO(Body)
+        self._write(Bucket, Key, Body)
+        return {'ETag': self.head_object(Bucket, Key)['ETag']}
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        self._wait()
+        try:
+            os.remove(self._path(Bucket, Key))
+        except FileNotFoundError:
+            pass
+        return {}
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **kwargs) -> dict:
+        self._wait()
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._uploads(Bucket, upload_id))
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes, **kwargs) -> dict:
+        self._wait()
+        with open(os.path.join(self._uploads(Bucket, UploadId), '{:05d}'.format(PartNumber)), 'wb') as handle:
+            handle.write(Body)
+        return {'ETag': '"{}-{}"'.format(UploadId, PartNumber)}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict, **kwargs) -> dict:
+        self._wait()
+        directory = self._uploads(Bucket, UploadId)
+        path = self._path(Bucket, Key)
+        tmp_path = '{}.{}.tmp'.format(path, UploadId)
+        with open(tmp_path, 'wb') as output:
+            for part in sorted(MultipartUpload['Parts'], key=lambda p: p['PartNumber']):
+                with open(os.path.join(directory, '{:05d}'.format(part['PartNumber'])), 'rb') as handle:
+                    shutil.copyfileobj(handle, output, CHUNK_SIZE)
+        os.replace(tmp_path, path)
+        shutil.rmtree(directory, ignore_errors=True)
+        return {}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str, **kwargs) -> dict:
+        self._wait()
+        shutil.rmtree(self._uploads(Bucket, UploadId), ignore_errors=True)
+        return {}
+
+
+def client(service_name: str, **kwargs) -> S3Client:
+    if service_name != 's3':
+        raise ValueError('benchmark stand-in only supports s3 clients')
+    return S3Client(os.environ['BENCH_S3_ROOT'], float(os.environ.get('BENCH_S3_LATENCY_MS', 0)) / 1000)
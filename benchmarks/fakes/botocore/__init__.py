@@ -0,0 +1 @@
+"""Stand-in for botocore used by the benchmarks"""
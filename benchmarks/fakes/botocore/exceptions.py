@@ -0,0 +1,12 @@
+"""Stand-in for botocore.exceptions used by the benchmarks"""
+
+
+class ClientError(Exception):
+    """Exception raised by the stand-in S3 client, matching
+    the error response format of botocore"""
+
+    def __init__(self, error_response: dict, operation_name: str):
+        self.response = error_response
+        self.operation_name = operation_name
+        super().__init__('An error occurred ({}) when calling the {} operation'.format(
+            error_response.get('Error', {}).get('Code'), operation_name))
@@ -0,0 +1,276 @@
+"""Stand-in for pika used by the benchmarks. Exchanges,
+bindings and queues are spooled as files below the directory
+set in BENCH_AMQP_ROOT, so that messages published by the API
+process are delivered to the worker process. Messages are
+claimed by atomically renaming them into a per-queue in-flight
+directory, and consumers poll their queue for new messages"""
+
+import collections
+import os
+import threading
+import time
+import uuid
+from urllib.parse import quote
+
+from .exceptions import AMQPConnectionError, ChannelClosed
+
+
+POLL_INTERVAL = float(os.environ.get('BENCH_AMQP_POLL_MS', 2)) / 1000
+
+Method = collections.namedtuple('Method', ['queue', 'message_count', 'consumer_count'])
+Frame = collections.namedtuple('Frame', ['method'])
+Deliver = collections.namedtuple('Deliver', ['delivery_tag', 'exchange', 'routing_key', 'redelivered'])
+
+
+class BasicProperties:
+
+    def __init__(self, delivery_mode: int = None, **kwargs):
+        self.delivery_mode = delivery_mode
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+class URLParameters:
+
+    def __init__(self, url: str):
+        self.url = url
+
+
+class Spool:
+    """Filesystem layout shared by all processes
+
+    Arguments:
+        root: str root directory of spool
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def exchange(self, name: str) -> str:
+        return os.path.join(self.root, 'exchanges', quote(name, safe=''))
+
+    def bindings(self, exchange: str, routing_key: str = None) -> str:
+        path = os.path.join(self.root, 'bindings', quote(exchange, safe=''))
+        if routing_key is not None:
+            path = os.path.join(path, quote(routing_key, safe='') or '_')
+        return path
+
+    def queue(self, name: str) -> str:
+        return os.path.join(self.root, 'queues', quote(name, safe=''))
+
+    def inflight(self, name: str) -> str:
+        return os.path.join(self.root, 'inflight', quote(name, safe=''))
+
+    def route(self, exchange: str, routing_key: str) -> set:
+        try:
+            with open(self.exchange(exchange)) as handle:
+                exchange_type = handle.read()
+        except FileNotFoundError:
+            exchange_type = 'direct'
+
+        if exchange_type == 'fanout':
+            directories = [os.path.join(self.bindings(exchange), key) for key in _listdir(self.bindings(exchange))]
+        else:
+            directories = [self.bindings(exchange, routing_key or '')]
+        return {queue for directory in directories for queue in _listdir(directory)}
+
+    def publish(self, exchange: str, routing_key: str, body: bytes):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        name = '{:020d}-{}'.format(time.time_ns(), uuid.uuid4().hex)
+        for queue in self.route(exchange, routing_key):
+            directory = self.queue(queue)
+            tmp_path = os.path.join(directory, '.{}.tmp'.format(name))
+            with open(tmp_path, 'wb') as handle:
+                handle.write(body)
+            os.replace(tmp_path, os.path.join(directory, name))
+
+
+def _listdir(path: str) -> list:
+    try:
+        return sorted(name for name in os.listdir(path) if not name.startswith('.'))
+    except FileNotFoundError:
+        return []
+
+
+class _Consumer:
+
+    def __init__(self, queue: str, callback, auto_ack: bool):
+        self.queue = queue
+        self.callback = callback
+        self.auto_ack = auto_ack
+
+
+class BlockingChannel:
+    """Channel of a blocking connection
+
+    Arguments:
+        connection: BlockingConnection owning channel
+    """
+
+    def __init__(self, connection: 'BlockingConnection'):
+        self.connection = connection
+        self.spool = connection.spool
+        self.is_open = True
+
+        self._prefetch_count = 0
+        self._consumers = []
+        self._unacked = {}
+        self._delivery_tag = 0
+        self._consuming = False
+
+    @property
+    def is_closed(self) -> bool:
+        return not self.is_open
+
+    def _check(self):
+        if not self.is_open or self.connection.is_closed:
+            raise ChannelClosed('channel is closed')
+
+    def exchange_declare(self, exchange: str, exchange_type: str = 'direct', passive: bool = False, **kwargs):
+        self._check()
+        path = self.spool.exchange(exchange)
+        if passive or os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as handle:
+            handle.write(exchange_type)
+
+    def queue_declare(self, queue: str = '', passive: bool = False, **kwargs) -> Frame:
+        self._check()
+        queue = queue or 'amq.gen-{}'.format(uuid.uuid4().hex)
+        if not passive:
+            os.makedirs(self.spool.queue(queue), exist_ok=True)
+            os.makedirs(self.spool.inflight(queue), exist_ok=True)
+        message_count = len(_listdir(self.spool.queue(queue)))
+        return Frame(Method(queue, message_count, len(self._consumers)))
+
+    def queue_bind(self, queue: str, exchange: str, routing_key: str = None, **kwargs):
+        self._check()
+        directory = self.spool.bindings(exchange, routing_key or '')
+        os.makedirs(directory, exist_ok=True)
+        open(os.path.join(directory, quote(queue, safe='')), 'w').close()
+
+    def basic_qos(self, prefetch_count: int = 0, **kwargs):
+        self._prefetch_count = prefetch_count
+
+    def confirm_delivery(self):
+        self._check()
+
+    def tx_select(self):
+        self._check()
+
+    def tx_commit(self):
+        self._check()
+
+    def basic_publish(self, exchange: str, routing_key: str, body, properties: BasicProperties = None, **kwargs):
+        self._check()
+        self.spool.publish(exchange, routing_key, body)
+
+    def basic_consume(self, queue: str, on_message_callback, auto_ack: bool = False, **kwargs) -> str:
+        self._check()
+        self._consumers.append(_Consumer(queue, on_message_callback, auto_ack))
+        return 'ctag-{}'.format(len(self._consumers))
+
+    def basic_ack(self, delivery_tag: int = 0, **kwargs):
+        path = self._unacked.pop(delivery_tag, None)
+        if path is not None:
+            os.remove(path)
+
+    def _deliver(self, consumer: _Consumer) -> bool:
+        if self._prefetch_count and len(self._unacked) >= self._prefetch_count:
+            return False
+
+        for name in _listdir(self.spool.queue(consumer.queue)):
+            path = os.path.join(self.spool.inflight(consumer.queue), name)
+            try:
+                # messages are claimed by renaming them, meaning
+                # that each message is delivered to one consumer
+                os.rename(os.path.join(self.spool.queue(consumer.queue), name), path)
+            except FileNotFoundError:
+                continue
+            with open(path, 'rb') as handle:
+                body = handle.read()
+
+            self._delivery_tag += 1
+            if consumer.auto_ack:
+                os.remove(path)
+            else:
+                self._unacked[self._delivery_tag] = path
+            method = Deliver(self._delivery_tag, '', consumer.queue, False)
+            consumer.callback(self, method, BasicProperties(), body)
+            return True
+        return False
+
+    def start_consuming(self):
+        self._consuming = True
+        while self._consuming:
+            self.connection.process_data_events(time_limit=0)
+            if not any([self._deliver(consumer) for consumer in self._consumers]):
+                self.connection.process_data_events(time_limit=POLL_INTERVAL)
+
+    def stop_consuming(self):
+        self._consuming = False
+
+    def close(self):
+        self.is_open = False
+
+
+class BlockingConnection:
+    """Blocking connection to the filesystem spool
+
+    Arguments:
+        parameters: URLParameters connection parameters
+    """
+
+    def __init__(self, parameters: URLParameters = None):
+        root = os.environ.get('BENCH_AMQP_ROOT')
+        if not root or not os.path.isdir(root):
+            raise AMQPConnectionError('spool directory {} does not exist'.format(root))
+        self.spool = Spool(root)
+        self.is_open = True
+
+        self._callbacks = collections.deque()
+        self._timers = []
+        self._wakeup = threading.Event()
+
+    @property
+    def is_closed(self) -> bool:
+        return not self.is_open
+
+    def channel(self) -> BlockingChannel:
+        if self.is_closed:
+            raise AMQPConnectionError('connection is closed')
+        return BlockingChannel(self)
+
+    def add_callback_threadsafe(self, callback):
+        self._callbacks.append(callback)
+        self._wakeup.set()
+
+    def call_later(self, delay: float, callback):
+        self._timers.append((time.monotonic() + delay, callback))
+
+    def process_data_events(self, time_limit: float = 0):
+        if time_limit:
+            self._wakeup.wait(time_limit)
+        self._wakeup.clear()
+
+        while self._callbacks:
+            self._callbacks.popleft()()
+
+        now = time.monotonic()
+        due = [timer for timer in self._timers if timer[0] <= now]
+        if due:
+            self._timers = [timer for timer in self._timers if timer[0] > now]
+            for _, callback in due:
+                callback()
+
+    def close(self):
+        self.is_open = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,25 @@
+"""Stand-in for pika.exceptions"""
+
+
+class AMQPError(Exception):
+    pass
+
+
+class AMQPConnectionError(AMQPError):
+    pass
+
+
+class ConnectionClosed(AMQPConnectionError):
+    pass
+
+
+class StreamLostError(AMQPConnectionError):
+    pass
+
+
+class AMQPChannelError(AMQPError):
+    pass
+
+
+class ChannelClosed(AMQPChannelError):
+    pass
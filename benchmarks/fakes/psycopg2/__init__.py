@@ -0,0 +1,233 @@
+"""Stand-in for psycopg2 used by the benchmarks. Connections
+are opened against a sqlite database (BENCH_PG_PATH) shared by
+the API and worker processes, and the postgres specific SQL used
+by the services is translated before execution. Notifications are
+not delivered, meaning that metadata invalidation should be
+disabled when running against the stand-in"""
+
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+from uuid import UUID
+
+from .extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+
+class Error(Exception):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+class OperationalError(DatabaseError):
+    pass
+
+
+class IntegrityError(DatabaseError):
+    pass
+
+
+TRANSLATIONS = [
+    (re.compile(r"\(?now\(\) AT TIME ZONE 'UTC'\)?", re.IGNORECASE), 'CURRENT_TIMESTAMP'),
+    (re.compile(r'\bUUID\b'), 'TEXT'),
+    (re.compile(r'\bJSON\b'), 'TEXT'),
+    (re.compile(r'%s'), '?'),
+]
+# statements with no equivalent in sqlite. notifications
+# are only used to invalidate caches between processes
+NOOP_STATEMENTS = re.compile(r'^\s*(LISTEN\b|SELECT pg_notify\()', re.IGNORECASE)
+
+UUID_COLUMNS = {'model_id', 'job_id'}
+JSON_COLUMNS = {'model_schema'}
+TIMESTAMP_COLUMNS = {'created', 'last_updated', 'last_accessed'}
+
+
+def translate(sql: str) -> str:
+    for pattern, replacement in TRANSLATIONS:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def _adapt(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _convert(column: str, value):
+    if value is None:
+        return None
+    if column in UUID_COLUMNS:
+        return UUID(value)
+    if column in JSON_COLUMNS:
+        return json.loads(value)
+    if column in TIMESTAMP_COLUMNS and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+class cursor:
+    """Cursor returning rows as tuples. Subclasses
+    override _make_row to return other row types
+
+    Arguments:
+        connection: connection that created cursor
+    """
+
+    def __init__(self, connection: 'connection'):
+        self.connection = connection
+        self._cursor = connection._db.cursor()
+        self._columns = None
+        self._row_type = None
+
+    def _make_row(self, values: tuple):
+        return tuple(values)
+
+    def _convert_row(self, row):
+        if row is None:
+            return None
+        return self._make_row([_convert(c, v) for c, v in zip(self._columns, row)])
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def execute(self, sql: str, params: tuple = ()):
+        if NOOP_STATEMENTS.match(sql):
+            self._columns = None
+            return
+        try:
+            self._cursor.execute(translate(sql), [_adapt(p) for p in params or ()])
+        except sqlite3.IntegrityError as err:
+            raise IntegrityError(str(err)) from err
+        except sqlite3.Error as err:
+            raise OperationalError(str(err)) from err
+        description = self._cursor.description
+        self._columns = [d[0] for d in description] if description else None
+        self._row_type = None
+
+    def executemany(self, sql: str, params_seq):
+        try:
+            self._cursor.executemany(translate(sql), [[_adapt(p) for p in params] for params in params_seq])
+        except sqlite3.Error as err:
+            raise OperationalError(str(err)) from err
+        self._columns = None
+
+    def fetchone(self):
+        if self._columns is None:
+            return None
+        return self._convert_row(self._cursor.fetchone())
+
+    def fetchall(self) -> list:
+        if self._columns is None:
+            return []
+        return [self._convert_row(row) for row in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class connection:
+    """Connection to the sqlite database shared by all
+    benchmark processes
+
+    Arguments:
+        path: str path of sqlite database
+    """
+
+    def __init__(self, path: str):
+        try:
+            # connections are shared between threads by the
+            # services' connection pools, but only used by
+            # one thread at a time
+            self._db = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level='DEFERRED')
+        except sqlite3.Error as err:
+            raise OperationalError(str(err)) from err
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self.closed = 0
+        self.notifies = []
+        self._autocommit = False
+        self._pipe = None
+
+    @property
+    def autocommit(self) -> bool:
+        return self._autocommit
+
+    @autocommit.setter
+    def autocommit(self, value: bool):
+        self._autocommit = value
+        self._db.isolation_level = None if value else 'DEFERRED'
+
+    def cursor(self, cursor_factory=None) -> cursor:
+        if self.closed:
+            raise OperationalError('connection already closed')
+        return (cursor_factory or cursor)(self)
+
+    def commit(self):
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+    def get_transaction_status(self) -> int:
+        return TRANSACTION_STATUS_INTRANS if self._db.in_transaction else TRANSACTION_STATUS_IDLE
+
+    def poll(self):
+        pass
+
+    def fileno(self) -> int:
+        # notifications are never delivered, so listeners are
+        # given a descriptor that never becomes readable
+        if self._pipe is None:
+            self._pipe = os.pipe()
+        return self._pipe[0]
+
+    def close(self):
+        if self.closed:
+            return
+        self._db.close()
+        if self._pipe is not None:
+            for fd in self._pipe:
+                os.close(fd)
+        self.closed = 1
+
+
+def connect(**kwargs) -> connection:
+    return connection(os.environ['BENCH_PG_PATH'])
+
+
+def create_schema(path: str, schema_path: str):
+    """Function used to create the tables defined in
+    the postgres schema in a sqlite database
+
+    Args:
+        path (str): path of sqlite database
+        schema_path (str): path of postgres schema
+    """
+
+    with open(schema_path) as handle:
+        schema = translate(handle.read())
+    db = sqlite3.connect(path)
+    try:
+        db.executescript(schema)
+        db.commit()
+    finally:
+        db.close()
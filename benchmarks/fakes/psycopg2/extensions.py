@@ -0,0 +1,9 @@
+"""Stand-in for psycopg2.extensions"""
+
+TRANSACTION_STATUS_IDLE = 0
+TRANSACTION_STATUS_ACTIVE = 1
+TRANSACTION_STATUS_INTRANS = 2
+
+
+def quote_ident(name: str, scope=None) -> str:
+    return '"{}"'.format(name.replace('"', '""'))
@@ -0,0 +1,46 @@
+"""Stand-in for psycopg2.extras"""
+
+from collections import namedtuple
+
+from . import cursor
+
+
+def register_uuid(oids=None, conn_or_curs=None):
+    # UUIDs are always adapted by the stand-in
+    pass
+
+
+class DictRow(list):
+    """Row supporting access by index and by column name"""
+
+    def __init__(self, columns: list, values: list):
+        super().__init__(values)
+        self._index = {column: i for i, column in enumerate(columns)}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._index[key]
+        return super().__getitem__(key)
+
+    def keys(self):
+        return self._index.keys()
+
+    def items(self):
+        return ((column, self[i]) for column, i in self._index.items())
+
+    def get(self, key, default=None):
+        return self[key] if key in self._index else default
+
+
+class DictCursor(cursor):
+
+    def _make_row(self, values: list) -> DictRow:
+        return DictRow(self._columns, values)
+
+
+class NamedTupleCursor(cursor):
+
+    def _make_row(self, values: list) -> tuple:
+        if self._row_type is None:
+            self._row_type = namedtuple('Record', self._columns)
+        return self._row_type(*values)
@@ -0,0 +1,392 @@
+"""Load generator used to replay traffic against a running
+API. Valid payloads are synthesized from the schema stored
+against a model, and /tensor/run, /tensor/run/batch and
+/tensor/run/async requests are sent in a configurable mix at
+a fixed target rate. Requests are scheduled open loop, meaning
+that latencies are also reported from the time each request
+was due to be sent, so that a slow server is not hidden by
+a client that falls behind. Async jobs are polled until they
+complete to measure end to end latency. Exits with a non-zero
+status code if any request failed
+
+Usage (from the repository root):
+
+    python -m benchmarks.load --url http://localhost:10988 --user <user> --model-id <model-id> \\
+        --rps 50 --duration 60 --concurrency 32 --mix run=0.8,batch=0.15,async=0.05
+"""
+
+import argparse
+import base64
+import datetime
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Union
+
+import requests
+
+from benchmarks.scenarios import percentiles, COMPLETED_JOB_STATE, FAILED_JOB_STATE
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+REQUEST_KINDS = ('run', 'batch', 'async')
+PAYLOAD_POOL_SIZE = 64
+
+Sample = namedtuple('Sample', ['kind', 'status', 'latency', 'scheduled_latency', 'lag', 'error'])
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Function used to parse a request mix in the
+    kind=weight,kind=weight format. Weights are normalized
+
+    Args:
+        mix (str): request mix
+
+    Returns:
+        Dict[str, float]: normalized weight per request kind
+    """
+
+    weights = {}
+    for item in mix.split(','):
+        kind, _, weight = item.partition('=')
+        kind = kind.strip()
+        if kind not in REQUEST_KINDS:
+            raise ValueError('invalid request kind {}. must be one of {}'.format(kind, ', '.join(REQUEST_KINDS)))
+        weights[kind] = float(weight or 1)
+
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError('request mix must contain at least one positive weight')
+    return {kind: weight / total for kind, weight in weights.items() if weight > 0}
+
+
+class PayloadFactory:
+    """Class used to synthesize valid request payloads
+    from the input schema of a model. Columns are generated
+    in index order, and values are cast to the type of the
+    schema item
+
+    Arguments:
+        model_id: str ID of model
+        input_schema: Dict[str, dict] input schema of model
+        seed: int seed of random generator
+    """
+
+    def __init__(self, model_id: str, input_schema: Dict[str, dict], seed: int = 0):
+        self.model_id = model_id
+        self.columns = sorted(input_schema.items(), key=lambda item: item[1]['index'])
+        self._random = random.Random(seed)
+
+    def _value(self, var_type: str) -> Union[int, float]:
+        if var_type.upper() == 'INT':
+            return self._random.randint(0, 100)
+        return round(self._random.uniform(-1.0, 1.0), 6)
+
+    def vector(self) -> Dict[str, Union[int, float]]:
+        return {name: self._value(item['var_type']) for name, item in self.columns}
+
+    def run(self) -> dict:
+        return {'model_id': self.model_id, 'input_vector': self.vector()}
+
+    def batch(self, batch_size: int) -> dict:
+        return {'model_id': self.model_id, 'input_vectors': [self.vector() for _ in range(batch_size)]}
+
+    def csv(self, rows: int) -> bytes:
+        lines = [','.join(name for name, _ in self.columns)]
+        for _ in range(rows):
+            vector = self.vector()
+            lines.append(','.join(str(vector[name]) for name, _ in self.columns))
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+    def async_batch(self, rows: int) -> dict:
+        content = base64.b64encode(self.csv(rows)).decode('ascii')
+        return {'model_id': self.model_id, 'input_data': 'data:text/csv;base64,' + content}
+
+
+class JobPoller:
+    """Background thread used to poll submitted async jobs
+    until they have completed, failed or timed out
+
+    Arguments:
+        client: LoadGenerator used to send requests
+        interval: float seconds between polls of each job
+        timeout: float seconds after which jobs are abandoned
+    """
+
+    def __init__(self, client: 'LoadGenerator', interval: float, timeout: float):
+        self.client = client
+        self.interval = interval
+        self.timeout = timeout
+
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='job-poller', daemon=True)
+
+        self.submitted = 0
+        self.completed = []
+        self.failed = 0
+        self.timed_out = 0
+        self.poll_errors = 0
+
+    def add(self, job_id: str, scheduled: float):
+        with self._lock:
+            self._pending[job_id] = scheduled
+            self.submitted += 1
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _poll(self, job_id: str, scheduled: float):
+        now = time.perf_counter()
+        if now - scheduled > self.timeout:
+            self.timed_out += 1
+            return True
+
+        try:
+            response = self.client.session().get(self.client.url + '/jobs/{}/metadata'.format(job_id),
+                                                 timeout=self.client.timeout)
+            response.raise_for_status()
+            state = response.json()['job']['job_state']
+        except (requests.RequestException, ValueError, KeyError):
+            self.poll_errors += 1
+            return False
+
+        if state == COMPLETED_JOB_STATE:
+            self.completed.append(time.perf_counter() - scheduled)
+        elif state == FAILED_JOB_STATE:
+            self.failed += 1
+        return state in (COMPLETED_JOB_STATE, FAILED_JOB_STATE)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            with self._lock:
+                pending = list(self._pending.items())
+            for job_id, scheduled in pending:
+                if self._poll(job_id, scheduled):
+                    with self._lock:
+                        del self._pending[job_id]
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def report(self) -> dict:
+        report = {'submitted': self.submitted,
+                  'completed': len(self.completed),
+                  'failed': self.failed,
+                  'timed_out': self.timed_out,
+                  'pending': self.pending,
+                  'poll_errors': self.poll_errors}
+        if self.completed:
+            report['end_to_end'] = percentiles(self.completed)
+        return report
+
+
+class LoadGenerator:
+    """Class used to send a mix of requests to the tensor
+    endpoints at a target rate
+
+    Arguments:
+        url: str base URL of API
+        user: str user ID sent in authentication header
+        factory: PayloadFactory used to generate payloads
+        mix: Dict[str, float] weight per request kind
+        batch_size: int number of vectors per batch request
+        async_rows: int number of rows per async job
+        timeout: float request timeout in seconds
+        seed: int seed used to select request kinds
+    """
+
+    def __init__(self,
+                 url: str,
+                 user: str,
+                 factory: PayloadFactory,
+                 mix: Dict[str, float],
+                 batch_size: int = 100,
+                 async_rows: int = 1000,
+                 timeout: float = 30.0,
+                 seed: int = 0):
+        self.url = url.rstrip('/')
+        self.user = user
+        self.mix = mix
+        self.timeout = timeout
+
+        self._local = threading.local()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.samples: List[Sample] = []
+        self.poller = None
+        self.started = None
+        self.elapsed = 0.0
+
+        # payloads are generated upfront so that generating
+        # large batches does not delay the schedule
+        builders = {'run': factory.run,
+                    'batch': lambda: factory.batch(batch_size),
+                    'async': lambda: factory.async_batch(async_rows)}
+        self._payloads = {kind: [json.dumps(builders[kind]()).encode('utf-8') for _ in range(PAYLOAD_POOL_SIZE)]
+                          for kind in mix}
+
+    def session(self) -> requests.Session:
+        # sessions are not thread safe, so one
+        # session is created per sending thread
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers['X-Authenticated-Userid'] = self.user
+        return session
+
+    def _choose(self) -> str:
+        return self._random.choices(list(self.mix), weights=list(self.mix.values()))[0]
+
+    def _send(self, kind: str, index: int, scheduled: float):
+        path = {'run': '/tensor/run', 'batch': '/tensor/run/batch', 'async': '/tensor/run/async'}[kind]
+        body = self._payloads[kind][index % PAYLOAD_POOL_SIZE]
+
+        start = time.perf_counter()
+        status, error = None, None
+        try:
+            response = self.session().post(self.url + path,
+                                           data=body,
+                                           headers={'Content-Type': 'application/json'},
+                                           timeout=self.timeout)
+            status = response.status_code
+            if kind == 'async' and status == 201:
+                self.poller.add(response.json()['job_id'], scheduled)
+        except requests.RequestException as err:
+            error = type(err).__name__
+        end = time.perf_counter()
+
+        with self._lock:
+            self.samples.append(Sample(kind, status, end - start, end - scheduled, start - scheduled, error))
+
+    def run(self, rps: float, duration: float, concurrency: int, poll_interval: float = 0.5, job_timeout: float = 600.0):
+        """Function used to send requests at the target
+        rate for a given duration, and to wait for all
+        submitted async jobs to complete
+
+        Args:
+            rps (float): target requests per second
+            duration (float): seconds to send requests for
+            concurrency (int): maximum concurrent requests
+            poll_interval (float): seconds between job polls
+            job_timeout (float): seconds to wait for each job
+        """
+
+        self.poller = JobPoller(self, poll_interval, job_timeout)
+        self.poller.start()
+
+        total = int(rps * duration)
+        self.started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='load') as executor:
+            for i in range(total):
+                scheduled = self.started + i / rps
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._send, self._choose(), i, scheduled)
+        self.elapsed = time.perf_counter() - self.started
+
+        # jobs are abandoned by the poller once timed out, so the
+        # margin only covers the final round of polls
+        deadline = time.monotonic() + job_timeout + 2 * poll_interval
+        while self.poller.pending and time.monotonic() < deadline:
+            time.sleep(poll_interval)
+        self.poller.stop()
+
+    def report(self) -> dict:
+        """Function used to summarise latencies and errors
+        per request kind
+
+        Returns:
+            dict: report per request kind and of async jobs
+        """
+
+        kinds = {}
+        for kind in self.mix:
+            samples = [s for s in self.samples if s.kind == kind]
+            if not samples:
+                continue
+            errors = [s for s in samples if s.status is None or s.status >= 400]
+            kinds[kind] = {'count': len(samples),
+                           'errors': len(errors),
+                           'error_rate': len(errors) / len(samples),
+                           'status_codes': dict(Counter(str(s.status or s.error) for s in samples)),
+                           'latency': percentiles([s.latency for s in samples]),
+                           'scheduled_latency': percentiles([s.scheduled_latency for s in samples])}
+
+        report = {'requests': kinds,
+                  'achieved_rps': len(self.samples) / self.elapsed if self.elapsed else 0,
+                  'send_lag': percentiles([s.lag for s in self.samples]) if self.samples else {}}
+        if 'async' in self.mix:
+            report['async_jobs'] = self.poller.report()
+        return report
+
+
+def get_input_schema(url: str, user: str, model_id: str) -> Dict[str, dict]:
+    response = requests.get('{}/models/{}/metadata'.format(url.rstrip('/'), model_id),
+                            headers={'X-Authenticated-Userid': user}, timeout=30)
+    response.raise_for_status()
+    return response.json()['model']['model_schema']['input_schema']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='replay traffic against the tensor endpoints of a running API')
+    parser.add_argument('--url', default='http://localhost:10988')
+    parser.add_argument('--user', required=True, help='user ID sent in X-Authenticated-Userid header')
+    parser.add_argument('--model-id', required=True)
+    parser.add_argument('--rps', type=float, default=10.0)
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--mix', default='run=0.8,batch=0.15,async=0.05')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--async-rows', type=int, default=1000)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--poll-interval', type=float, default=0.5)
+    parser.add_argument('--job-timeout', type=float, default=600.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='path of JSON report. printed if not set')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as err:
+        parser.error(str(err))
+
+    factory = PayloadFactory(args.model_id, get_input_schema(args.url, args.user, args.model_id), args.seed)
+    generator = LoadGenerator(args.url, args.user, factory, mix, args.batch_size, args.async_rows,
+                              args.timeout, args.seed)
+    LOGGER.info('sending %s requests per second for %ss', args.rps, args.duration)
+    generator.run(args.rps, args.duration, args.concurrency, args.poll_interval, args.job_timeout)
+
+    report = {'meta': {'timestamp': datetime.datetime.utcnow().isoformat(),
+                       'config': dict(vars(args), mix=mix)},
+              **generator.report()}
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(rendered)
+    else:
+        print(rendered)
+
+    errors = sum(kind['errors'] for kind in report['requests'].values())
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""End to end benchmark of the API and worker, run against
+local stand-ins for S3, Postgres and RabbitMQ. Results are
+written as JSON, and can be compared against the results of a
+previous run, in which case the exit code is non-zero if any
+metric regressed by more than --tolerance
+
+Usage (from the repository root):
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --scenarios batch_throughput --compare baseline.json --tolerance 0.1
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+from benchmarks.harness import BenchEnvironment, ROOT_DIR
+from benchmarks.scenarios import SCENARIOS, build_model, upload_model, with_memory
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+# metrics are compared by the suffix of their name. all
+# other values (counts, sizes etc.) are not compared
+LOWER_IS_BETTER = ('_ms', '_seconds', 'peak_rss_bytes')
+HIGHER_IS_BETTER = ('_per_second',)
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def flatten(results: dict, prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = '{}.{}'.format(prefix, key) if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> List[dict]:
+    """Function used to compare the results of two runs.
+    A metric has regressed if it is worse than the baseline
+    by more than the relative tolerance
+
+    Args:
+        baseline (dict): scenario results of baseline run
+        current (dict): scenario results of current run
+        tolerance (float): relative tolerance (e.g. 0.1)
+
+    Returns:
+        List[dict]: regressed metrics
+    """
+
+    previous = flatten(baseline)
+    regressions = []
+    for name, value in flatten(current).items():
+        base = previous.get(name)
+        if not base:
+            continue
+        change = (value - base) / base
+        if name.endswith(LOWER_IS_BETTER):
+            regressed = change > tolerance
+        elif name.endswith(HIGHER_IS_BETTER):
+            regressed = change < -tolerance
+        else:
+            continue
+        if regressed:
+            regressions.append({'metric': name, 'baseline': base, 'current': value, 'change': change})
+    return regressions
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Function used to start the services and to run
+    the selected scenarios against a single benchmark
+    model
+
+    Args:
+        args (argparse.Namespace): command line arguments
+
+    Returns:
+        dict: results keyed by scenario
+    """
+
+    results = {}
+    with BenchEnvironment(s3_latency_ms=args.s3_latency_ms,
+                          worker_concurrency=args.worker_concurrency,
+                          keep=args.keep) as env:
+        results['startup'] = dict(env.startup, memory=env.memory())
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.h5')
+            build_model(path)
+            model_id = upload_model(env, 'benchmark', path)
+
+        options = {'model_id': model_id,
+                   'num_requests': args.requests,
+                   'concurrency': args.concurrency,
+                   'repeat': args.repeat,
+                   'max_rows': args.max_rows}
+        for name in args.scenarios:
+            LOGGER.info('running scenario %s', name)
+            results[name] = with_memory(env, lambda: SCENARIOS[name](env, **options))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='end to end benchmark of API and worker')
+    parser.add_argument('--scenarios', nargs='*', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--output', default=None, help='path of JSON results. printed if not set')
+    parser.add_argument('--compare', default=None, help='path of baseline JSON results')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--max-rows', type=int, default=10 ** 6)
+    parser.add_argument('--s3-latency-ms', type=float, default=0.0)
+    parser.add_argument('--worker-concurrency', type=int, default=2)
+    parser.add_argument('--keep', action='store_true', help='keep data directory and service logs')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    report = {'meta': {'commit': get_commit(),
+                       'timestamp': datetime.datetime.utcnow().isoformat(),
+                       'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'cpus': os.cpu_count(),
+                       'config': vars(args)},
+              'scenarios': run(args)}
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(rendered)
+    else:
+        print(rendered)
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        regressions = compare(baseline['scenarios'], report['scenarios'], args.tolerance)
+        for regression in regressions:
+            print('{metric} regressed by {change:.1%} ({baseline:.4g} -> {current:.4g})'.format(**regression),
+                  file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
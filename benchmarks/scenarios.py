@@ -0,0 +1,340 @@
+"""Module containing the end to end benchmark scenarios.
+Each scenario takes a running BenchEnvironment and returns
+a JSON serializable dict of results, including the peak
+resident memory of the API and worker during the scenario"""
+
+import io
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.harness import BenchEnvironment
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+INPUTS = 16
+OUTPUTS = 4
+HIDDEN_UNITS = 64
+UPLOAD_HIDDEN_UNITS = [64, 512, 2048]
+BATCH_SIZES = [1, 10, 100, 1000, 10000]
+JOB_ROWS = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+
+NPY_CONTENT_TYPE = 'application/x-npy'
+COMPLETED_JOB_STATE = 2
+FAILED_JOB_STATE = 3
+
+
+def percentiles(timings: List[float]) -> dict:
+    """Function used to summarise a list of timings
+    (in seconds) in milliseconds
+
+    Args:
+        timings (List[float]): timings in seconds
+
+    Returns:
+        dict: mean, percentiles and max in milliseconds
+    """
+
+    ordered = sorted(timings)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(round(p * len(ordered))) - 1))] * 1000
+
+    return {'count': len(ordered),
+            'mean_ms': statistics.mean(ordered) * 1000,
+            'p50_ms': rank(0.5),
+            'p90_ms': rank(0.9),
+            'p99_ms': rank(0.99),
+            'max_ms': ordered[-1] * 1000}
+
+
+def get_schema(inputs: int = INPUTS, outputs: int = OUTPUTS) -> dict:
+    return {'input_schema': {'x{}'.format(i): {'var_type': 'FLOAT', 'index': i} for i in range(inputs)},
+            'output_schema': {'y{}'.format(i): {'var_type': 'FLOAT', 'index': i} for i in range(outputs)}}
+
+
+def build_model(path: str, hidden_units: int = HIDDEN_UNITS, inputs: int = INPUTS, outputs: int = OUTPUTS):
+    """Function used to build a dense network with fixed
+    weights and save it in HD5 format
+
+    Args:
+        path (str): path of HD5 file
+        hidden_units (int): units per hidden layer
+        inputs (int): number of inputs
+        outputs (int): number of outputs
+    """
+
+    import tensorflow as tf
+    from tensorflow import keras
+
+    tf.random.set_seed(0)
+    network = keras.Sequential([
+        keras.layers.InputLayer(input_shape=(inputs,)),
+        keras.layers.Dense(hidden_units, activation='relu'),
+        keras.layers.Dense(hidden_units, activation='relu'),
+        keras.layers.Dense(outputs)
+    ])
+    network.compile(optimizer='adam', loss='mse')
+    network.save(path, save_format='h5')
+
+
+def upload_model(env: BenchEnvironment, name: str, path: str) -> str:
+    """Function used to upload a model as multipart
+    form data and to retrieve its ID
+
+    Args:
+        env (BenchEnvironment): running environment
+        name (str): name of model
+        path (str): path of HD5 file
+
+    Returns:
+        str: ID of model
+    """
+
+    metadata = {'model_name': name, 'model_description': 'benchmark model', 'model_schema': get_schema()}
+    with open(path, 'rb') as handle:
+        response = env.session.post(env.url + '/models/upload',
+                                    data={'metadata': json.dumps(metadata)},
+                                    files={'model_content': (os.path.basename(path), handle, 'application/octet-stream')})
+    response.raise_for_status()
+    return env.get_model_id(name)
+
+
+def with_memory(env: BenchEnvironment, scenario: Callable[[], dict]) -> dict:
+    """Function used to run a scenario and to record the
+    peak memory of both services during the scenario
+
+    Args:
+        env (BenchEnvironment): running environment
+        scenario (Callable[[], dict]): scenario to run
+
+    Returns:
+        dict: scenario results with memory usage
+    """
+
+    reset = env.reset_peak_memory()
+    results = scenario()
+    results['memory'] = env.memory()
+    # peak memory is measured since process start if
+    # the peak cannot be reset (e.g. on older kernels)
+    results['memory']['peak_since_start'] = not reset
+    return results
+
+
+def model_upload(env: BenchEnvironment, repeat: int = 3, **kwargs) -> dict:
+    """Scenario measuring the cost of uploading models
+    of increasing size, including validation and the
+    write to the object store
+
+    Args:
+        env (BenchEnvironment): running environment
+        repeat (int): uploads per model size
+
+    Returns:
+        dict: upload timings per model size
+    """
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for hidden_units in UPLOAD_HIDDEN_UNITS:
+            path = os.path.join(directory, 'model-{}.h5'.format(hidden_units))
+            build_model(path, hidden_units)
+            size = os.path.getsize(path)
+
+            timings = []
+            for i in range(repeat):
+                start = time.perf_counter()
+                upload_model(env, 'upload-{}-{}'.format(hidden_units, i), path)
+                timings.append(time.perf_counter() - start)
+
+            results[str(hidden_units)] = dict(percentiles(timings),
+                                              model_bytes=size,
+                                              mb_per_second=size / statistics.median(timings) / 1024 / 1024)
+    return results
+
+
+def single_vector_latency(env: BenchEnvironment,
+                          model_id: str,
+                          num_requests: int = 500,
+                          concurrency: int = 1,
+                          **kwargs) -> dict:
+    """Scenario measuring the latency of single vector
+    requests against a model that is already loaded
+
+    Args:
+        env (BenchEnvironment): running environment
+        model_id (str): ID of model
+        num_requests (int): number of requests
+        concurrency (int): number of concurrent clients
+
+    Returns:
+        dict: latency percentiles and throughput
+    """
+
+    rng = np.random.default_rng(0)
+    vectors = [{'x{}'.format(i): float(v) for i, v in enumerate(row)} for row in rng.random((num_requests, INPUTS))]
+
+    def send(vector: dict) -> float:
+        start = time.perf_counter()
+        response = env.session.post(env.url + '/tensor/run', json={'model_id': model_id, 'input_vector': vector})
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    # first request loads the model and is excluded
+    send(vectors[0])
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        timings = list(executor.map(send, vectors))
+    elapsed = time.perf_counter() - start
+    return dict(percentiles(timings), concurrency=concurrency, requests_per_second=num_requests / elapsed)
+
+
+def batch_throughput(env: BenchEnvironment, model_id: str, repeat: int = 10, **kwargs) -> dict:
+    """Scenario measuring the latency and throughput
+    of batch requests across batch sizes, for both JSON
+    and NPY request bodies
+
+    Args:
+        env (BenchEnvironment): running environment
+        model_id (str): ID of model
+        repeat (int): requests per batch size and format
+
+    Returns:
+        dict: timings per format and batch size
+    """
+
+    rng = np.random.default_rng(0)
+    results = {'json': {}, 'npy': {}}
+    for batch_size in BATCH_SIZES:
+        inputs = rng.random((batch_size, INPUTS), dtype=np.float32)
+
+        body = json.dumps({'model_id': model_id,
+                           'input_vectors': [{'x{}'.format(i): float(v) for i, v in enumerate(row)} for row in inputs]})
+        buffer = io.BytesIO()
+        np.save(buffer, inputs)
+        bodies = {'json': ({'Content-Type': 'application/json'}, body.encode('utf-8'), None),
+                  'npy': ({'Content-Type': NPY_CONTENT_TYPE, 'Accept': NPY_CONTENT_TYPE},
+                          buffer.getvalue(), {'model_id': model_id})}
+
+        for name, (headers, content, params) in bodies.items():
+            timings = []
+            for i in range(repeat + 1):
+                start = time.perf_counter()
+                response = env.session.post(env.url + '/tensor/run/batch', data=content, headers=headers, params=params)
+                response.raise_for_status()
+                # first request of each size is excluded
+                if i > 0:
+                    timings.append(time.perf_counter() - start)
+            summary = percentiles(timings)
+            results[name][str(batch_size)] = dict(summary,
+                                                  request_bytes=len(content),
+                                                  rows_per_second=batch_size / (summary['p50_ms'] / 1000))
+    return results
+
+
+def write_csv(path: str, rows: int, chunk_size: int = 100000):
+    rng = np.random.default_rng(0)
+    with open(path, 'w') as handle:
+        handle.write(','.join('x{}'.format(i) for i in range(INPUTS)) + '\n')
+        for start in range(0, rows, chunk_size):
+            np.savetxt(handle, rng.random((min(chunk_size, rows - start), INPUTS)), fmt='%.6f', delimiter=',')
+
+
+def wait_for_job(env: BenchEnvironment, job_id: str, timeout: float, interval: float = 0.05) -> int:
+    """Function used to poll the state of a job
+    until it has completed or failed
+
+    Args:
+        env (BenchEnvironment): running environment
+        job_id (str): ID of job
+        timeout (float): maximum seconds to wait
+        interval (float): seconds between polls
+
+    Returns:
+        int: final job state
+    """
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = env.session.get(env.url + '/jobs/{}/metadata'.format(job_id))
+        response.raise_for_status()
+        state = response.json()['job']['job_state']
+        if state in (COMPLETED_JOB_STATE, FAILED_JOB_STATE):
+            return state
+        time.sleep(interval)
+    raise TimeoutError('job {} not completed after {}s'.format(job_id, timeout))
+
+
+def async_job_throughput(env: BenchEnvironment,
+                         model_id: str,
+                         max_rows: int = 10 ** 6,
+                         job_timeout: float = 3600.0,
+                         **kwargs) -> dict:
+    """Scenario measuring the end to end throughput
+    of async CSV jobs, from the streamed upload through
+    processing by the worker to streaming of the results
+
+    Args:
+        env (BenchEnvironment): running environment
+        model_id (str): ID of model
+        max_rows (int): largest job size to run
+        job_timeout (float): maximum seconds per job
+
+    Returns:
+        dict: timings per job size
+    """
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in [r for r in JOB_ROWS if r <= max_rows]:
+            path = os.path.join(directory, 'input-{}.csv'.format(rows))
+            write_csv(path, rows)
+
+            start = time.perf_counter()
+            with open(path, 'rb') as handle:
+                response = env.session.post(env.url + '/tensor/run/async/upload',
+                                            params={'model_id': model_id},
+                                            data=handle,
+                                            headers={'Content-Type': 'text/csv'})
+            response.raise_for_status()
+            uploaded = time.perf_counter()
+
+            job_id = response.json()['job_id']
+            state = wait_for_job(env, job_id, job_timeout)
+            processed = time.perf_counter()
+
+            result = {'input_bytes': os.path.getsize(path),
+                      'state': state,
+                      'upload_seconds': uploaded - start,
+                      'processing_seconds': processed - uploaded}
+            if state == COMPLETED_JOB_STATE:
+                with env.session.get(env.url + '/jobs/{}/results/stream'.format(job_id), stream=True) as response:
+                    response.raise_for_status()
+                    output_rows = sum(1 for line in response.iter_lines() if line)
+                finished = time.perf_counter()
+                result.update(output_rows=output_rows,
+                              download_seconds=finished - processed,
+                              total_seconds=finished - start,
+                              rows_per_second=rows / (processed - uploaded))
+            else:
+                LOGGER.error('benchmark job %s with %s rows failed', job_id, rows)
+            results[str(rows)] = result
+            os.remove(path)
+    return results
+
+
+SCENARIOS: Dict[str, Callable[..., dict]] = {
+    'model_upload': model_upload,
+    'single_vector_latency': single_vector_latency,
+    'batch_throughput': batch_throughput,
+    'async_job_throughput': async_job_throughput
+}
@@ -7,6 +7,9 @@ CREATE TABLE models(
     size INT NOT NULL,
     input_shape INT,
     output_shape INT,
+    version INT NOT NULL DEFAULT 1,
+    access_count BIGINT NOT NULL DEFAULT 0,
+    last_accessed TIMESTAMP,
     created TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'UTC')
 );
 
@@ -15,6 +18,8 @@ CREATE TABLE async_jobs(
     model_id UUID NOT NULL,
     job_state INTEGER NOT NULL DEFAULT 0,
     upload_size INTEGER NOT NULL,
+    output_format TEXT,
     created TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'UTC'),
     last_updated TIMESTAMP
-);
\ No newline at end of file
+);
+CREATE INDEX models_access_count_idx ON models(access_count DESC);
@@ -0,0 +1,15 @@
+-- Migrations for existing deployments. docs/db.sql contains the
+-- full schema for new deployments, and the statements below bring
+-- databases created from earlier versions of the schema up to date.
+-- Statements are idempotent and should be applied in order.
+
+-- model versions, used to key cached models
+ALTER TABLE models ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 1;
+
+-- output format of async job results
+ALTER TABLE async_jobs ADD COLUMN IF NOT EXISTS output_format TEXT;
+
+-- model access statistics used to pre-warm models
+ALTER TABLE models ADD COLUMN IF NOT EXISTS access_count BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE models ADD COLUMN IF NOT EXISTS last_accessed TIMESTAMP;
+CREATE INDEX IF NOT EXISTS models_access_count_idx ON models(access_count DESC);
@@ -3,10 +3,28 @@
 import logging
 
 from src.worker import worker_factory
+from src.logic.tensor import prewarm_models, MODEL_LOADS
+from src.logic.cache import MODEL_CACHE
+from src.logic import rabbit
+from src.persistence.postgres import get_pool
+from src.metrics import start_metrics_server
+from src.config import PREWARM_ENABLED, PG_CREDENTIALS
 
 LOGGER = logging.getLogger(__name__)
 
 if __name__ == '__main__':
 
+    # the worker pool is created once the worker starts
+    # listening, meaning that stats are empty until then
+    start_metrics_server({'model_cache': MODEL_CACHE.stats,
+                          'model_loads': MODEL_LOADS.stats,
+                          'pool': lambda: rabbit.WORKER_POOL.stats() if rabbit.WORKER_POOL else {},
+                          'postgres_pool': lambda: get_pool(PG_CREDENTIALS).stats()})
+
+    # load frequently accessed models before consuming
+    # jobs so that the first jobs do not pay the load cost
+    if PREWARM_ENABLED:
+        prewarm_models()
+
     worker = worker_factory()
     worker()
\ No newline at end of file
@@ -57,13 +57,23 @@ POSTGRES_PORT = override_value('POSTGRES_PORT', 5432)
 POSTGRES_DB = override_value('POSTGRES_DB', 'tensor_trigger')
 POSTGRES_USER = override_value('POSTGRES_USER', 'tensor_trigger')
 POSTGRES_PASSWORD = override_value('POSTGRES_PASSWORD', '', secret=True)
+POSTGRES_POOL_MIN_SIZE = override_value('POSTGRES_POOL_MIN_SIZE', 1)
+POSTGRES_POOL_MAX_SIZE = override_value('POSTGRES_POOL_MAX_SIZE', 4)
+POSTGRES_POOL_TIMEOUT = override_value('POSTGRES_POOL_TIMEOUT', 30.0)
+POSTGRES_POOL_MAX_IDLE = override_value('POSTGRES_POOL_MAX_IDLE', 300.0)
+POSTGRES_POOL_HEALTH_CHECK_INTERVAL = override_value('POSTGRES_POOL_HEALTH_CHECK_INTERVAL', 30.0)
 
 PG_CREDENTIALS = PostgresCredentials(**{
     'PG_HOST': POSTGRES_HOST,
     'PG_DATABASE': POSTGRES_DB,
     'PG_PORT': POSTGRES_PORT,
     'PG_USER': POSTGRES_USER,
-    'PG_PASSWORD': POSTGRES_PASSWORD
+    'PG_PASSWORD': POSTGRES_PASSWORD,
+    'PG_POOL_MIN_SIZE': POSTGRES_POOL_MIN_SIZE,
+    'PG_POOL_MAX_SIZE': POSTGRES_POOL_MAX_SIZE,
+    'PG_POOL_TIMEOUT': POSTGRES_POOL_TIMEOUT,
+    'PG_POOL_MAX_IDLE': POSTGRES_POOL_MAX_IDLE,
+    'PG_POOL_HEALTH_CHECK_INTERVAL': POSTGRES_POOL_HEALTH_CHECK_INTERVAL
 })
 
 MESSAGE_BROKER_URL = override_value('MESSAGE_BROKER_URL', '', secret=True)
@@ -77,4 +87,31 @@ TENSOR_TRIGGER_API_URL = override_value('TENSOR_TRIGGER_API_URL', 'http://localh
 S3_REGION_NAME = override_value('S3_REGION_NAME', 'eu-west-1')
 S3_BUCKET_NAME = override_value('S3_BUCKET_NAME', 's3-tensor-trigger')
 S3_ACCESS_KEY_ID = override_value('S3_ACCESS_KEY_ID', '')
-S3_SECRET_ACCESS_KEY = override_value('S3_SECRET_ACCESS_KEY', '', secret=True)
\ No newline at end of file
+S3_SECRET_ACCESS_KEY = override_value('S3_SECRET_ACCESS_KEY', '', secret=True)
+
+WORKER_CONCURRENCY = override_value('WORKER_CONCURRENCY', 2)
+WORKER_PREFETCH_COUNT = override_value('WORKER_PREFETCH_COUNT', 0)
+WORKER_STATS_INTERVAL = override_value('WORKER_STATS_INTERVAL', 60)
+
+CSV_CHUNK_SIZE = override_value('CSV_CHUNK_SIZE', 10000)
+S3_MULTIPART_PART_SIZE = override_value('S3_MULTIPART_PART_SIZE', 8 * 1024 * 1024)
+OUTPUT_INDEX_INTERVAL = override_value('OUTPUT_INDEX_INTERVAL', 1000)
+OUTPUT_FORMAT = override_value('OUTPUT_FORMAT', 'npz')
+OUTPUT_COMPRESSION = override_value('OUTPUT_COMPRESSION', 'zstd')
+
+DIRECT_OBJECT_STORE_FETCH = override_value('DIRECT_OBJECT_STORE_FETCH', True)
+
+MODEL_CACHE_MAX_ENTRIES = override_value('MODEL_CACHE_MAX_ENTRIES', 8)
+MODEL_CACHE_MAX_BYTES = override_value('MODEL_CACHE_MAX_BYTES', 1024 * 1024 * 1024)
+MODEL_DISK_CACHE_DIR = override_value('MODEL_DISK_CACHE_DIR', '/tmp/tensor-trigger/models')
+MODEL_DISK_CACHE_MAX_BYTES = override_value('MODEL_DISK_CACHE_MAX_BYTES', 4 * 1024 * 1024 * 1024)
+
+METADATA_INVALIDATION_CHANNEL = override_value('METADATA_INVALIDATION_CHANNEL', 'tensor_trigger_invalidations')
+PREWARM_ENABLED = override_value('PREWARM_ENABLED', True)
+PREWARM_MAX_MODELS = override_value('PREWARM_MAX_MODELS', 4)
+PREWARM_MAX_BYTES = override_value('PREWARM_MAX_BYTES', MODEL_CACHE_MAX_BYTES // 2)
+
+METRICS_PORT = override_value('METRICS_PORT', 9100)
+PROFILING_ENABLED = override_value('PROFILING_ENABLED', True)
+PROFILER_INTERVAL_MS = override_value('PROFILER_INTERVAL_MS', 10.0)
+PROFILER_MAX_DEPTH = override_value('PROFILER_MAX_DEPTH', 64)
@@ -0,0 +1,230 @@
+"""Module containing two-tier cache used to store
+tensorflow models in memory and on local disk"""
+
+import logging
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict, namedtuple
+from typing import Any, BinaryIO, Callable, Union
+from uuid import UUID
+
+from src.config import MODEL_CACHE_MAX_ENTRIES, MODEL_CACHE_MAX_BYTES, \
+    MODEL_DISK_CACHE_DIR, MODEL_DISK_CACHE_MAX_BYTES
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+CacheEntry = namedtuple('CacheEntry', ['network', 'size'])
+
+
+class ModelCache:
+    """Two-tier cache used to store tensorflow models. The
+    memory tier stores loaded models, while the disk tier
+    stores raw model files. Both tiers are keyed by model ID
+    and the checksum (ETag) of the model file in the object
+    store, meaning that stale entries are never returned
+    once a model has been updated. Both tiers are evicted in
+    least recently used order once their budgets are exceeded
+
+    Arguments:
+        cache_dir: str directory used to store model files
+        max_entries: int maximum number of loaded models
+        max_bytes: int memory budget of loaded models
+        max_disk_bytes: int disk budget of model files
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int, max_bytes: int, max_disk_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.memory_misses = 0
+        self.disk_hits = 0
+        self.disk_misses = 0
+
+    @staticmethod
+    def _key(model_id: UUID, checksum: str) -> tuple:
+        return str(model_id), checksum
+
+    def _filename(self, model_id: UUID, checksum: str) -> str:
+        # strip quotes and separators from ETag before
+        # using it as part of the filename
+        checksum = re.sub(r'[^A-Za-z0-9]', '', checksum)
+        return os.path.join(self.cache_dir, '{}-{}.h5'.format(model_id, checksum))
+
+    def get(self, model_id: UUID, checksum: str) -> Union[Any, None]:
+        """Function used to retrieve loaded model from
+        the memory tier
+
+        Args:
+            model_id (UUID): ID of model
+            checksum (str): checksum of model file
+
+        Returns:
+            Union[Any, None]: loaded model if cached else None
+        """
+
+        key = self._key(model_id, checksum)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.memory_misses += 1
+                return None
+
+            self.memory_hits += 1
+            self._entries.move_to_end(key)
+            return entry.network
+
+    def put(self, model_id: UUID, checksum: str, network: Any, size: int):
+        """Function used to insert loaded model into the
+        memory tier. Other versions of the model are dropped
+
+        Args:
+            model_id (UUID): ID of model
+            checksum (str): checksum of model file
+            network (Any): loaded tensorflow model
+            size (int): estimated size of model in bytes
+        """
+
+        if size > self.max_bytes:
+            LOGGER.warning('unable to cache model %s: size %s exceeds memory budget', model_id, size)
+            return
+
+        with self._lock:
+            self._remove_model(str(model_id))
+            self._entries[self._key(model_id, checksum)] = CacheEntry(network=network, size=size)
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+
+    def _remove_model(self, model_id: str):
+        for key in [k for k in self._entries if k[0] == model_id]:
+            self._size -= self._entries.pop(key).size
+
+    def get_file(self, model_id: UUID, checksum: str) -> Union[BinaryIO, None]:
+        """Function used to open model file from the disk
+        tier. Files are opened while holding the cache lock,
+        meaning that the returned handle remains readable if
+        the file is evicted before it is loaded. The handle
+        must be closed by the caller
+
+        Args:
+            model_id (UUID): ID of model
+            checksum (str): checksum of model file
+
+        Returns:
+            Union[BinaryIO, None]: open model file if cached else None
+        """
+
+        filename = self._filename(model_id, checksum)
+        with self._lock:
+            if not os.path.exists(filename):
+                self.disk_misses += 1
+                return None
+            self.disk_hits += 1
+            # update modification time to track recency of use
+            os.utime(filename)
+            return open(filename, 'rb')
+
+    def put_file(self, model_id: UUID, checksum: str, download: Callable[[str], None]) -> BinaryIO:
+        """Function used to insert model file into the
+        disk tier. The file is downloaded to a temporary
+        file before being moved into place, meaning that
+        partial downloads are never visible. As with get_file,
+        an open handle is returned and must be closed by the caller
+
+        Args:
+            model_id (UUID): ID of model
+            checksum (str): checksum of model file
+            download (Callable[[str], None]): function used to
+                download model file to a given filename
+
+        Returns:
+            BinaryIO: open model file
+        """
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        filename = self._filename(model_id, checksum)
+        tmp_filename = '{}.{}.tmp'.format(filename, uuid.uuid4().hex)
+        try:
+            download(tmp_filename)
+            os.replace(tmp_filename, filename)
+        finally:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+
+        with self._lock:
+            handle = open(filename, 'rb')
+            # remove older versions of model from disk
+            prefix = str(model_id) + '-'
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                if name.startswith(prefix) and name.endswith('.h5') and path != filename:
+                    os.remove(path)
+            self._evict_files(keep=filename)
+        return handle
+
+    def _evict_files(self, keep: str):
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith('.h5') and os.path.isfile(path):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            if path == keep:
+                continue
+            LOGGER.debug('evicting model file %s from disk cache', path)
+            os.remove(path)
+            total -= size
+
+    def invalidate(self, model_id: UUID):
+        """Function used to remove all versions of a model
+        from both the memory and disk tiers
+
+        Args:
+            model_id (UUID): ID of model
+        """
+
+        with self._lock:
+            self._remove_model(str(model_id))
+            if os.path.isdir(self.cache_dir):
+                prefix = str(model_id) + '-'
+                for name in os.listdir(self.cache_dir):
+                    if name.startswith(prefix) and name.endswith('.h5'):
+                        os.remove(os.path.join(self.cache_dir, name))
+
+    def stats(self) -> dict:
+        """Function used to generate cache statistics
+
+        Returns:
+            dict: dict containing hit/miss counters of both tiers
+        """
+
+        with self._lock:
+            return {'memory_hits': self.memory_hits,
+                    'memory_misses': self.memory_misses,
+                    'memory_entries': len(self._entries),
+                    'memory_size': self._size,
+                    'disk_hits': self.disk_hits,
+                    'disk_misses': self.disk_misses}
+
+
+MODEL_CACHE = ModelCache(MODEL_DISK_CACHE_DIR,
+                         MODEL_CACHE_MAX_ENTRIES,
+                         MODEL_CACHE_MAX_BYTES,
+                         MODEL_DISK_CACHE_MAX_BYTES)
@@ -0,0 +1,128 @@
+"""Module containing codecs used to encode blocks of
+async job outputs before they are written to the object
+store"""
+
+import io
+import json
+import logging
+from typing import Callable
+
+import numpy as np
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+NDJSON_FORMAT = 'ndjson'
+NPZ_FORMAT = 'npz'
+PARQUET_FORMAT = 'parquet'
+ARROW_FORMAT = 'arrow'
+
+OUTPUT_FORMATS = [NDJSON_FORMAT, NPZ_FORMAT, PARQUET_FORMAT, ARROW_FORMAT]
+
+
+def encode_ndjson(results: np.ndarray) -> bytes:
+    """Function used to encode block of outputs as
+    newline delimited JSON, with one array per row
+
+    Args:
+        results (np.ndarray): 2 dimensional model outputs
+
+    Returns:
+        bytes: encoded block
+    """
+
+    return ''.join(json.dumps(row) + '\n' for row in results.tolist()).encode('utf-8')
+
+
+def encode_npz(results: np.ndarray) -> bytes:
+    """Function used to encode block of outputs as
+    compressed .npz file containing a single little-endian
+    float32 array named output
+
+    Args:
+        results (np.ndarray): 2 dimensional model outputs
+
+    Returns:
+        bytes: encoded block
+    """
+
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, output=np.ascontiguousarray(results, dtype='<f4'))
+    return buffer.getvalue()
+
+
+def _to_table(pyarrow, results: np.ndarray):
+    # columns are named by position, since output
+    # schemas are only known to the API
+    results = np.asarray(results, dtype=np.float32)
+    return pyarrow.Table.from_arrays([pyarrow.array(results[:, i]) for i in range(results.shape[1])],
+                                     names=[str(i) for i in range(results.shape[1])])
+
+
+def encode_parquet(results: np.ndarray, compression: str) -> bytes:
+    """Function used to encode block of outputs as
+    Parquet file with one float32 column per output
+
+    Args:
+        results (np.ndarray): 2 dimensional model outputs
+        compression (str): Parquet compression codec
+
+    Returns:
+        bytes: encoded block
+    """
+
+    import pyarrow
+    import pyarrow.parquet
+
+    sink = pyarrow.BufferOutputStream()
+    pyarrow.parquet.write_table(_to_table(pyarrow, results), sink, compression=compression)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_arrow(results: np.ndarray, compression: str) -> bytes:
+    """Function used to encode block of outputs as
+    compressed Arrow IPC stream with one float32 column
+    per output
+
+    Args:
+        results (np.ndarray): 2 dimensional model outputs
+        compression (str): Arrow IPC compression codec
+
+    Returns:
+        bytes: encoded block
+    """
+
+    import pyarrow
+    import pyarrow.ipc
+
+    table = _to_table(pyarrow, results)
+    sink = pyarrow.BufferOutputStream()
+    options = pyarrow.ipc.IpcWriteOptions(compression=compression)
+    with pyarrow.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def get_block_encoder(output_format: str, compression: str) -> Callable[[np.ndarray], bytes]:
+    """Function used to retrieve encoder used to write
+    blocks of outputs in the given format
+
+    Args:
+        output_format (str): one of ndjson, npz, parquet or arrow
+        compression (str): compression codec used by the
+            parquet and arrow formats
+
+    Returns:
+        Callable[[np.ndarray], bytes]: block encoder
+    """
+
+    if output_format == NDJSON_FORMAT:
+        return encode_ndjson
+    if output_format == NPZ_FORMAT:
+        return encode_npz
+    if output_format == PARQUET_FORMAT:
+        return lambda results: encode_parquet(results, compression)
+    if output_format == ARROW_FORMAT:
+        return lambda results: encode_arrow(results, compression)
+    raise ValueError('invalid output format {}'.format(output_format))
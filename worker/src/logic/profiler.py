@@ -0,0 +1,105 @@
+"""Module containing sampling profiler used to profile
+individual jobs. The stack of the thread processing the
+job is sampled at a fixed interval from a background thread,
+and samples are aggregated into the collapsed stack format
+used by flamegraph tools"""
+
+import io
+import logging
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from uuid import UUID
+
+from src.config import PROFILER_INTERVAL_MS, PROFILER_MAX_DEPTH
+from src.persistence.s3 import upload_s3_file
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """Profiler used to periodically sample the stack of
+    a given thread. Sampling only reads the frames of the
+    target thread, meaning that the profiled code is not
+    modified and overhead is limited to the sampling thread
+
+    Arguments:
+        thread_id: int ID of thread to profile
+        interval: float sampling interval in seconds
+        max_depth: int maximum number of frames per sample
+    """
+
+    def __init__(self, thread_id: int, interval: float, max_depth: int):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_depth = max_depth
+
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append('{}:{}:{}'.format(code.co_filename, code.co_name, frame.f_lineno))
+            frame = frame.f_back
+        if stack:
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='tt-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        """Function used to render samples in the collapsed
+        stack format (one line per unique stack, followed by
+        the number of samples)
+
+        Returns:
+            str: collapsed stacks
+        """
+
+        return '\n'.join('{} {}'.format(stack, count) for stack, count in self.samples.most_common())
+
+
+def get_profile_path(job_id: UUID) -> str:
+    return '/tensor-trigger/profiles/{}.folded'.format(job_id)
+
+
+@contextmanager
+def profile_job(job_id: UUID):
+    """Context manager used to profile the calling thread
+    for the duration of a job. The collapsed stacks are
+    uploaded to S3 once the job has completed. Failures to
+    upload the profile do not fail the job
+
+    Args:
+        job_id (UUID): ID of job
+    """
+
+    profiler = SamplingProfiler(threading.get_ident(), PROFILER_INTERVAL_MS / 1000, PROFILER_MAX_DEPTH)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        try:
+            path = get_profile_path(job_id)
+            upload_s3_file(io.BytesIO(profiler.collapsed().encode('utf-8')), path)
+            LOGGER.info('uploaded profile of job %s (%s samples) to %s',
+                        job_id, sum(profiler.samples.values()), path)
+        except Exception:
+            LOGGER.exception('unable to upload profile of job %s', job_id)
@@ -5,7 +5,8 @@ import logging
 import time
 import threading
 import functools
-from typing import Callable, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Union
 
 import pika
 from pika.exceptions import ConnectionClosed, StreamLostError, \
@@ -14,7 +15,6 @@ from pydantic import BaseModel
 
 
 LOGGER = logging.getLogger(__name__)
-WORKER_THREADS = []
 
 
 class AMQPExchangeConfig(BaseModel):
@@ -33,7 +33,11 @@ class AMQPExchangeConfig(BaseModel):
         durable: bool exchange is created as durable if set
             to true. default is false
         prefetch_count: int number of messages to pre-fetch.
-            defaults to 1
+            defaults to the concurrency of the worker pool
+        concurrency: int number of messages processed
+            concurrently. defaults to 1
+        stats_interval: int number of seconds between
+            logging of worker pool statistics. defaults to 60
         reconnection_interval: int number of seconds to
             wait between reconnections. defaults to 15
         auto_ack: bool messages are auto-acknowledged
@@ -46,7 +50,9 @@ class AMQPExchangeConfig(BaseModel):
     exchange_type: str = 'fanout'
     routing_keys: List[str] = [None]
     durable: bool = False
-    prefetch_count: int = 1
+    prefetch_count: Union[int, None] = None
+    concurrency: int = 1
+    stats_interval: int = 60
     reconnection_interval: int = 15
     auto_ack: bool = True
 
@@ -67,23 +73,119 @@ def ack_message(connection: object, channel: object, delivery_tag: object):
     connection.add_callback_threadsafe(cb)
 
 
+class WorkerPool:
+    """Bounded pool used to process messages concurrently.
+    Threads are reused between messages, and gauges for the
+    number of queued and active jobs, broker queue depth and
+    per-job latency are tracked
+
+    Arguments:
+        concurrency: int maximum number of concurrent jobs
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='tt-worker')
+        self._lock = threading.Lock()
+
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.queue_depth = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_last = 0.0
+
+    def submit(self, func: Callable, *args):
+        """Function used to submit job to pool. Jobs are
+        queued if all workers are busy
+
+        Args:
+            func (Callable): function used to process job
+        """
+
+        with self._lock:
+            self.queued += 1
+        self._executor.submit(self._run, time.monotonic(), func, *args)
+
+    def _run(self, submitted: float, func: Callable, *args):
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+
+        failed = False
+        try:
+            func(*args)
+        except Exception:
+            LOGGER.exception('unhandled exception in worker job')
+            failed = True
+        finally:
+            latency = time.monotonic() - submitted
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+                self.failed += failed
+                self.latency_total += latency
+                self.latency_max = max(self.latency_max, latency)
+                self.latency_last = latency
+
+    def stats(self) -> dict:
+        """Function used to generate pool statistics
+
+        Returns:
+            dict: dict containing job gauges and latencies
+        """
+
+        with self._lock:
+            return {'concurrency': self.concurrency,
+                    'queued': self.queued,
+                    'active': self.active,
+                    'queue_depth': self.queue_depth,
+                    'completed': self.completed,
+                    'failed': self.failed,
+                    'latency_last': self.latency_last,
+                    'latency_max': self.latency_max,
+                    'latency_mean': self.latency_total / self.completed if self.completed else 0}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+WORKER_POOL: Union[WorkerPool, None] = None
+
+
 def on_message(handler: Callable,
                channel: object,
                method_frame: object,
                properties: object,
                body: str,
                args: tuple):
-    """Function called to handle rabbitMQ messages. An instance
-    of the process_payload function is added to the global thread
-    count and processed on a separate thread to prevent the RabbitMQ
-    server from ejecting connection"""
+    """Function called to handle rabbitMQ messages. Messages are
+    submitted to the bounded worker pool and processed on a
+    separate thread to prevent the RabbitMQ server from ejecting
+    connection"""
 
-    (connection, WORKER_THREADS) = args
+    (connection, pool) = args
     delivery_tag = method_frame.delivery_tag
-    t = threading.Thread(target=handler,
-                         args=(channel, body, connection, delivery_tag, properties, args))
-    t.start()
-    WORKER_THREADS.append(t)
+    pool.submit(handler, channel, body, connection, delivery_tag, properties, args)
+
+
+def log_pool_stats(connection: object, channel: object, queue_name: str, pool: WorkerPool, interval: int):
+    """Function used to periodically refresh the broker
+    queue depth and log worker pool statistics. The
+    function re-schedules itself on the connection, including
+    when the queue depth cannot be retrieved"""
+
+    try:
+        result = channel.queue_declare(queue=queue_name, passive=True)
+        pool.queue_depth = result.method.message_count
+        LOGGER.info('worker pool stats: %s', pool.stats())
+    except Exception:
+        LOGGER.exception('unable to retrieve depth of queue %s', queue_name)
+    finally:
+        connection.call_later(interval, functools.partial(log_pool_stats, connection, channel,
+                                                          queue_name, pool, interval))
 
 
 def listen_on_exchange(handler: Callable,
@@ -104,6 +206,10 @@ def listen_on_exchange(handler: Callable,
             by listener if set to true
     """
 
+    global WORKER_POOL
+    if WORKER_POOL is None:
+        WORKER_POOL = WorkerPool(config.concurrency)
+
     while True:
         try:
             with pika.BlockingConnection(parameters=pika.URLParameters(config.queue_url)) as connection:
@@ -130,13 +236,19 @@ def listen_on_exchange(handler: Callable,
                                        queue=queue_name,
                                        routing_key=key)
 
-                # set prefetch count to 1 to avoid clearing all message from queue
-                channel.basic_qos(prefetch_count=config.prefetch_count)
+                # match prefetch count to pool capacity so that the broker
+                # never delivers more messages than can be processed
+                prefetch_count = config.prefetch_count or config.concurrency
+                channel.basic_qos(prefetch_count=prefetch_count)
                 # define message callback and start listening on queue
-                on_message_callback = functools.partial(on_message, handler, args=(connection, WORKER_THREADS))
+                on_message_callback = functools.partial(on_message, handler, args=(connection, WORKER_POOL))
                 channel.basic_consume(on_message_callback=on_message_callback,
                                       queue=queue_name,
                                       auto_ack=config.auto_ack)
+                if config.stats_interval > 0:
+                    connection.call_later(config.stats_interval,
+                                          functools.partial(log_pool_stats, connection, channel, queue_name,
+                                                            WORKER_POOL, config.stats_interval))
                 channel.start_consuming()
 
         # catch connection errors
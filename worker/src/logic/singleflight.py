@@ -0,0 +1,107 @@
+"""Module containing code used to coalesce concurrent
+calls of expensive operations (e.g. model loads) for the
+same key into a single call, the result of which is shared
+between all calling threads"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread safe class used to ensure that only one call
+    per key is in flight at any time. Threads arriving while
+    a call is in flight block until the existing call has
+    completed and share its result. Exceptions raised by
+    the call are re-raised in all waiting threads
+
+    Arguments:
+        name: str name of operation used in log messages
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+        self._calls = {}
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.duration_total = 0.0
+        self.duration_max = 0.0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Function used to run a call for a given key, or
+        to wait for the result of the call already in flight
+
+        Args:
+            key (Hashable): key used to coalesce calls
+            func (Callable[[], Any]): function run if no call
+                is in flight
+
+        Returns:
+            Any: result of call
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            LOGGER.debug('waiting for in-flight %s of %s', self.name, key)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        start = time.perf_counter()
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                del self._calls[key]
+                self.calls += 1
+                self.failures += call.error is not None
+                self.duration_total += duration
+                self.duration_max = max(self.duration_max, duration)
+            call.done.set()
+            LOGGER.info('completed %s of %s in %.3fs', self.name, key, duration)
+
+    def stats(self) -> dict:
+        """Function used to generate statistics of
+        coalesced calls
+
+        Returns:
+            dict: dict containing call counters and timings
+        """
+
+        with self._lock:
+            return {'calls': self.calls,
+                    'coalesced': self.coalesced,
+                    'failures': self.failures,
+                    'in_flight': len(self._calls),
+                    'duration_total': self.duration_total,
+                    'duration_max': self.duration_max,
+                    'duration_mean': self.duration_total / self.calls if self.calls else 0}
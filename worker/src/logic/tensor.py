@@ -2,8 +2,9 @@
 
 import logging
 import io
+import functools
 from uuid import UUID
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Iterator, BinaryIO
 
 import h5py
 import numpy as np
@@ -13,95 +14,311 @@ from tensorflow.python.keras.saving import hdf5_format
 
 from src.services import tensor
 from src.logic.utils import parse_base64_file, timer
+from src.persistence.postgres import get_user_model, get_user_job, get_hot_models
+from src.persistence.s3 import open_s3_stream, get_s3_etag, download_s3_file
+from src.logic.cache import MODEL_CACHE
+from src.logic.formats import get_block_encoder
+from src.logic.singleflight import SingleFlight
+from src.metrics import JobTimings, FETCH_MODEL_SPAN, FETCH_INPUT_SPAN, PARSE_SPAN, \
+    PREDICT_SPAN, TRAIN_SPAN, SERIALIZE_SPAN, UPLOAD_SPAN
+from src.config import CSV_CHUNK_SIZE, DIRECT_OBJECT_STORE_FETCH, PG_CREDENTIALS, \
+    OUTPUT_INDEX_INTERVAL, OUTPUT_FORMAT, OUTPUT_COMPRESSION, PREWARM_MAX_MODELS, \
+    PREWARM_MAX_BYTES, MODEL_CACHE_MAX_ENTRIES
 
 LOGGER = logging.getLogger(__name__)
 
 
-@timer
-def get_tensorflow_model(model_id: UUID, user: str) -> Union[io.BytesIO, None]:
-    """Function used to retrieve and parse
-    tensorflow model from Tensor Trigger API
+def _get_model_file_from_api(model_id: UUID, user: str) -> Union[BinaryIO, None]:
+    """Function used to retrieve model file from the
+    Tensor Trigger API
 
     Args:
         model_id (UUID): ID of model to retrieve
         user (str): user ID
 
     Returns:
-        Union[io.BytesIO, None]: BytesIO instance containing
+        Union[BinaryIO, None]: seekable file containing
             model data or None
     """
 
     # retrieve base64 encoded model data from API
     model = tensor.get_model(model_id, user)
     if model is None:
-        LOGGER.error('unable to retrieve model %s', model_id)
         return
     # parse base64 model data into BytesIO instance
-    # and attempt to load h5file
     _, buffer = parse_base64_file(model)
+    return buffer
+
+
+def _load_network(model_file: Union[str, BinaryIO]):
+    with h5py.File(model_file, 'r') as h5file:
+        return load_model(h5file)
+
+
+def _get_network_size(network) -> int:
     try:
-        with h5py.File(buffer, 'r') as h5file:
-            network = load_model(h5file)
-        return network
+        return sum(w.nbytes for w in network.get_weights())
     except Exception:
-        LOGGER.exception('unable to load tensor flow model')
+        LOGGER.exception('unable to determine size of model')
+    return 0
+
+
+MODEL_LOADS = SingleFlight('model load')
+
+
+def _load_cached_network(model_id: UUID, checksum: str, path: str):
+    # model files are opened by the cache, meaning that they
+    # remain readable if evicted by a concurrent download
+    model_file = MODEL_CACHE.get_file(model_id, checksum)
+    if model_file is None:
+        model_file = MODEL_CACHE.put_file(model_id, checksum, functools.partial(download_s3_file, path))
+    with model_file:
+        return _load_network(model_file)
+
+
+def _get_cached_network(model_id: UUID, use_memory_cache: bool):
+    """Function used to retrieve model via the two-tier
+    model cache. The checksum of the model file in the object
+    store is used to validate cached entries, and the model
+    file is only downloaded if not present on local disk.
+    Concurrent loads of the same shared model are coalesced
+    into a single download and load
+
+    Args:
+        model_id (UUID): ID of model to retrieve
+        use_memory_cache (bool): loaded models are read from
+            and inserted into the memory tier if True
+
+    Returns:
+        loaded tensorflow model
+    """
+
+    path = '/tensor-trigger/' + str(model_id)
+    checksum = get_s3_etag(path)
+    if not use_memory_cache:
+        # private copies are never shared between callers
+        return _load_cached_network(model_id, checksum, path)
+
+    network = MODEL_CACHE.get(model_id, checksum)
+    if network is not None:
+        return network
+
+    def load():
+        network = _load_cached_network(model_id, checksum, path)
+        MODEL_CACHE.put(model_id, checksum, network, _get_network_size(network))
+        return network
+
+    return MODEL_LOADS.do((str(model_id), checksum), load)
 
 
 @timer
-def get_job_csv_data(job_id: UUID, user: str) -> Union[np.ndarray, None]:
-    """Function used to retrieve CSV input
-    data used to run model(s)
+def prewarm_models(limit: int = PREWARM_MAX_MODELS, max_bytes: int = PREWARM_MAX_BYTES) -> int:
+    """Function used to load the most frequently accessed
+    models into both tiers of the model cache and run a
+    dummy inference on each before the worker starts
+    consuming jobs. Models are loaded in order of access
+    count until the memory budget is exhausted
+
+    Args:
+        limit (int): maximum number of models to load
+        max_bytes (int): memory budget of pre-warmed models
+
+    Returns:
+        int: number of pre-warmed models
+    """
+
+    try:
+        models = get_hot_models(PG_CREDENTIALS, min(limit, MODEL_CACHE_MAX_ENTRIES))
+    except Exception:
+        LOGGER.exception('unable to retrieve models to pre-warm')
+        return 0
+
+    loaded, used = 0, 0
+    for model_meta in models:
+        # the stored file size is used as an estimate of
+        # the model size before the model is loaded
+        if used + model_meta.size > max_bytes:
+            LOGGER.info('skipping pre-warm of model %s: memory budget exhausted', model_meta.model_id)
+            continue
+        try:
+            network = _get_cached_network(model_meta.model_id, True)
+            if model_meta.input_shape:
+                network.predict(np.zeros((1, model_meta.input_shape), dtype=np.float32))
+        except Exception:
+            LOGGER.exception('unable to pre-warm model %s', model_meta.model_id)
+            continue
+        used += _get_network_size(network) or model_meta.size
+        loaded += 1
+        LOGGER.info('pre-warmed model %s', model_meta.model_id)
+    return loaded
+
+
+def _get_job_input_file(job_id: UUID, user: str) -> Union[BinaryIO, None]:
+    """Function used to retrieve job input data. The data
+    is streamed directly from the object store once ownership
+    has been verified, falling back to the Tensor Trigger API
+    if the object store cannot be reached
 
     Args:
         job_id (UUID): ID of job
         user (str): user ID
 
     Returns:
-        Union[np.ndarray, None]: numpy array containing data
-            else None
+        Union[BinaryIO, None]: readable stream containing
+            input data or None
     """
 
-    # retrieve base64 encoded model data from API
+    if DIRECT_OBJECT_STORE_FETCH:
+        try:
+            if get_user_job(PG_CREDENTIALS, user, job_id) is None:
+                LOGGER.error('unable to find job %s for user %s', job_id, user)
+                return
+            return open_s3_stream('/tensor-trigger/input-data' + str(job_id))
+        except Exception:
+            LOGGER.exception('unable to read input data for job %s from object store. falling back to API', job_id)
+
+    # retrieve base64 encoded input data from API
     raw_data = tensor.get_job_input_data(job_id, user)
     if raw_data is None:
-        LOGGER.error('unable to retrieve input data for job %s', job_id)
         return
-    # parse base64 model data into BytesIO instance
-    # and attempt to load h5file
+    # parse base64 input data into BytesIO instance
     _, buffer = parse_base64_file(raw_data)
+    return buffer
+
+
+@timer
+def get_tensorflow_model(model_id: UUID, user: str, use_memory_cache: bool = True):
+    """Function used to retrieve and parse
+    tensorflow model. Models are read from the local
+    model cache, and are read directly from the object
+    store on cache miss. The Tensor Trigger API is used
+    if the object store cannot be reached
+
+    Args:
+        model_id (UUID): ID of model to retrieve
+        user (str): user ID
+        use_memory_cache (bool): shared loaded models are
+            returned if True. Set to False if the returned
+            model is modified (e.g. during training)
+
+    Returns:
+        loaded tensorflow model or None
+    """
+
+    if DIRECT_OBJECT_STORE_FETCH:
+        try:
+            if get_user_model(PG_CREDENTIALS, user, model_id) is None:
+                LOGGER.error('unable to find model %s for user %s', model_id, user)
+                return
+            return _get_cached_network(model_id, use_memory_cache)
+        except Exception:
+            LOGGER.exception('unable to read model %s from object store. falling back to API', model_id)
+
+    buffer = _get_model_file_from_api(model_id, user)
+    if buffer is None:
+        LOGGER.error('unable to retrieve model %s', model_id)
+        return
+    # attempt to load h5file from model data
     try:
-        df = pd.read_csv(buffer, header=0)
-        return df.values
+        return _load_network(buffer)
     except Exception:
         LOGGER.exception('unable to load tensor flow model')
 
 
 @timer
-def run_tensorflow_model(model_id: UUID, job_id: UUID, user: str):
-    """Function used to run tensorflow models
+def get_job_csv_data(job_id: UUID, user: str, chunk_size: int = CSV_CHUNK_SIZE) -> Union[Iterator[np.ndarray], None]:
+    """Function used to retrieve CSV input
+    data used to run model(s). The data is
+    parsed lazily in chunks of rows
+
+    Args:
+        job_id (UUID): ID of job
+        user (str): user ID
+        chunk_size (int): number of rows per chunk
+
+    Returns:
+        Union[Iterator[np.ndarray], None]: iterator of numpy
+            arrays containing data else None
+    """
+
+    stream = _get_job_input_file(job_id, user)
+    if stream is None:
+        LOGGER.error('unable to retrieve input data for job %s', job_id)
+        return
+    try:
+        reader = pd.read_csv(stream, header=0, chunksize=chunk_size)
+        return (chunk.values for chunk in reader)
+    except Exception:
+        LOGGER.exception('unable to parse CSV input data')
+
+
+@timer
+def run_tensorflow_model(model_id: UUID,
+                         job_id: UUID,
+                         user: str,
+                         output: BinaryIO,
+                         timings: JobTimings = None) -> Union[dict, None]:
+    """Function used to run tensorflow models. Input
+    data is processed in chunks and the results of each
+    chunk are written to the output stream as soon as they
+    are available. Rows are written in independently encoded
+    blocks (see OUTPUT_FORMAT), and the byte offset of each
+    block is recorded in an index so that ranges of rows can
+    be read without downloading the full output
 
     Args:
         model_id (UUID): [description]
         job_id (UUID): [description]
         user (str): [description]
+        output (BinaryIO): writable stream used for results
+        timings (JobTimings, optional): used to time spans of job
+
+    Returns:
+        Union[dict, None]: index of output blocks else None
     """
 
+    timings = timings or JobTimings(job_id, 'model_run')
     # get tensorflow model from tensor trigger API
-    model = get_tensorflow_model(model_id, user)
+    with timings.span(FETCH_MODEL_SPAN):
+        model = get_tensorflow_model(model_id, user)
     if model is None:
         LOGGER.error('unable to retrieve tensorflow model')
         return
 
     # get input data from tensor trigger API
-    input_data = get_job_csv_data(job_id, user)
-    if input_data is None:
+    with timings.span(FETCH_INPUT_SPAN):
+        input_chunks = get_job_csv_data(job_id, user)
+    if input_chunks is None:
         LOGGER.error('unable to retrieve input data')
         return
 
     try:
-        # run model with provided input data
-        results = model.predict(input_data)
-        return results.tolist()
+        encoder = get_block_encoder(OUTPUT_FORMAT, OUTPUT_COMPRESSION)
+        index = {'format': OUTPUT_FORMAT, 'rows': 0, 'blocks': []}
+        offset = 0
+        while True:
+            # input data is streamed and parsed lazily, meaning
+            # that the parse span includes reading the input
+            with timings.span(PARSE_SPAN):
+                chunk = next(input_chunks, None)
+            if chunk is None:
+                break
+
+            # run model with chunk of input data and append
+            # results to output stream in indexed blocks
+            with timings.span(PREDICT_SPAN):
+                results = model.predict(chunk)
+            for start in range(0, len(results), OUTPUT_INDEX_INTERVAL):
+                block = results[start:start + OUTPUT_INDEX_INTERVAL]
+                with timings.span(SERIALIZE_SPAN):
+                    data = encoder(block)
+                with timings.span(UPLOAD_SPAN):
+                    output.write(data)
+                index['blocks'].append({'start': index['rows'], 'rows': len(block), 'offset': offset, 'length': len(data)})
+                index['rows'] += len(block)
+                offset += len(data)
+            timings.add_rows(len(results))
+        return index
     except Exception:
         LOGGER.exception('unable to run tensorflow model')
 
@@ -111,17 +328,22 @@ def train_tensorflow_model(model_id: UUID,
                            user: str,
                            epochs: int,
                            input_vectors: List[Dict[str, float]],
-                           output_vectors: List[Dict[str, float]]):
+                           output_vectors: List[Dict[str, float]],
+                           timings: JobTimings = None):
     """Function used to run tensorflow models
 
     Args:
         model_id (UUID): [description]
         job_id (UUID): [description]
         user (str): [description]
+        timings (JobTimings, optional): used to time spans of job
     """
 
-    # get tensorflow model from tensor trigger API
-    model = get_tensorflow_model(model_id, user)
+    timings = timings or JobTimings(model_id, 'model_train')
+    # get private copy of tensorflow model, since the
+    # model weights are updated in place during training
+    with timings.span(FETCH_MODEL_SPAN):
+        model = get_tensorflow_model(model_id, user, use_memory_cache=False)
     if model is None:
         LOGGER.error('unable to retrieve tensorflow model')
         return
@@ -137,12 +359,15 @@ def train_tensorflow_model(model_id: UUID,
     output_data = output_data.reshape(-1, len(output_data[0]))
     try:
         # run model with provided input data
-        model.fit(input_data, output_data, epochs=epochs)
+        with timings.span(TRAIN_SPAN):
+            model.fit(input_data, output_data, epochs=epochs)
+        timings.add_rows(len(input_data) * epochs)
         # generate new instance of BytesIO
         # and save model to byes data
-        buffer = io.BytesIO()
-        with h5py.File(buffer, 'w') as f:
-            model.save(f)
+        with timings.span(SERIALIZE_SPAN):
+            buffer = io.BytesIO()
+            with h5py.File(buffer, 'w') as f:
+                model.save(f)
         return buffer
     except Exception:
         LOGGER.exception('unable to update tensorflow model')
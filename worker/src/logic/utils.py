@@ -8,22 +8,29 @@ import time
 from functools import wraps
 from collections import namedtuple
 
+from src.metrics import FUNCTION_SECONDS
+
 LOGGER = logging.getLogger(__name__)
 DATA_REGEX = r'^data:(.*);base64,(.*)'
 
 
 def timer(func):
-    """Decorator used to log execution time of
-    a particular function"""
+    """Decorator used to record execution time of
+    a particular function. Times are measured with a
+    monotonic high resolution clock and recorded in
+    the function duration histogram"""
+
+    histogram = FUNCTION_SECONDS.labels(func.__name__)
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start_ts = time.time()
-        results = func(*args, **kwargs)
-        # get execution time of function and log before
-        # returning output
-        exec_time = round(time.time() - start_ts, 2)
-        LOGGER.info('%s - exec in %s seconds', func.__name__, exec_time)
-        return results
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            exec_time = time.perf_counter() - start
+            histogram.observe(exec_time)
+            LOGGER.debug('%s - exec in %.6f seconds', func.__name__, exec_time)
     return wrapper
 
 
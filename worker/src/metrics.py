@@ -0,0 +1,205 @@
+"""Module containing prometheus metrics used to instrument
+the worker. Jobs are broken down into spans (fetch, parse,
+predict, serialize and upload) timed with a monotonic high
+resolution clock, and per-job throughput is recorded once
+each job has completed. Metrics are served over HTTP from a
+background thread"""
+
+import json
+import logging
+import time
+from typing import Callable, Dict, Union
+from uuid import UUID
+
+from prometheus_client import Counter, Histogram, REGISTRY, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from src.config import METRICS_PORT
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+DURATION_BUCKETS = (.001, .005, .01, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+THROUGHPUT_BUCKETS = tuple(10 ** (i / 2) for i in range(2, 15))
+
+FUNCTION_SECONDS = Histogram('tensor_trigger_worker_function_seconds',
+                             'Execution time of instrumented functions',
+                             ['function'],
+                             buckets=DURATION_BUCKETS)
+SPAN_SECONDS = Histogram('tensor_trigger_worker_span_seconds',
+                         'Time spent per job in each span',
+                         ['event_type', 'span'],
+                         buckets=DURATION_BUCKETS)
+JOB_SECONDS = Histogram('tensor_trigger_worker_job_seconds',
+                        'Total execution time of jobs',
+                        ['event_type', 'status'],
+                        buckets=DURATION_BUCKETS)
+JOB_ROWS = Counter('tensor_trigger_worker_rows',
+                   'Number of rows processed by jobs',
+                   ['event_type'])
+JOB_THROUGHPUT = Histogram('tensor_trigger_worker_rows_per_second',
+                           'Rows processed per second of job execution time',
+                           ['event_type'],
+                           buckets=THROUGHPUT_BUCKETS)
+
+FETCH_MODEL_SPAN = 'fetch_model'
+FETCH_INPUT_SPAN = 'fetch_input'
+PARSE_SPAN = 'parse'
+PREDICT_SPAN = 'predict'
+TRAIN_SPAN = 'train'
+SERIALIZE_SPAN = 'serialize'
+UPLOAD_SPAN = 'upload'
+
+
+class _Span:
+
+    __slots__ = ('_timings', '_name', '_start')
+
+    def __init__(self, timings: 'JobTimings', name: str):
+        self._timings = timings
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._timings.add(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class JobTimings:
+    """Class used to accumulate the time spent in each
+    span of a job. Spans entered multiple times (e.g. once
+    per chunk of input data) are summed, and the totals are
+    recorded once the job has finished. Not thread safe,
+    since each job is processed by a single thread
+
+    Arguments:
+        job_id: UUID ID of job
+        event_type: str type of job event
+    """
+
+    def __init__(self, job_id: UUID, event_type: str):
+        self.job_id = job_id
+        self.event_type = event_type
+
+        self.spans = {}
+        self.rows = 0
+        self._start = time.perf_counter()
+        self._finished = False
+
+    def span(self, name: str) -> _Span:
+        """Function used to time a span of the job
+
+        Args:
+            name (str): name of span
+
+        Returns:
+            _Span: context manager used to time span
+        """
+
+        return _Span(self, name)
+
+    def add(self, name: str, duration: float):
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    def add_rows(self, rows: int):
+        self.rows += rows
+
+    def finish(self, status: str) -> Union[dict, None]:
+        """Function used to record span totals and job
+        throughput, and to log a summary of the job. Only
+        the first call has any effect
+
+        Args:
+            status (str): completed or failed
+
+        Returns:
+            Union[dict, None]: job summary
+        """
+
+        if self._finished:
+            return None
+        self._finished = True
+
+        duration = time.perf_counter() - self._start
+        for name, total in self.spans.items():
+            SPAN_SECONDS.labels(self.event_type, name).observe(total)
+        JOB_SECONDS.labels(self.event_type, status).observe(duration)
+
+        summary = {'job_id': str(self.job_id),
+                   'event_type': self.event_type,
+                   'status': status,
+                   'seconds': round(duration, 6),
+                   'spans': {name: round(total, 6) for name, total in self.spans.items()},
+                   'rows': self.rows}
+        if self.rows:
+            JOB_ROWS.labels(self.event_type).inc(self.rows)
+            if duration > 0:
+                JOB_THROUGHPUT.labels(self.event_type).observe(self.rows / duration)
+                summary['rows_per_second'] = round(self.rows / duration, 2)
+
+        LOGGER.info('job timings: %s', json.dumps(summary))
+        return summary
+
+
+# statistics that only ever increase are exported as
+# counters. all other statistics are exported as gauges
+COUNTER_STATS = {'completed', 'failed', 'memory_hits', 'memory_misses', 'disk_hits', 'disk_misses',
+                 'calls', 'coalesced', 'failures', 'acquired', 'timeouts', 'recycled',
+                 'duration_total', 'wait_time_total'}
+
+
+class StatsCollector:
+    """Prometheus collector used to export the statistics
+    of caches and pools at scrape time
+
+    Arguments:
+        sources: Dict[str, Callable[[], dict]] functions used
+            to generate statistics keyed by source name
+    """
+
+    def __init__(self, sources: Dict[str, Callable[[], dict]]):
+        self.sources = sources
+
+    def collect(self):
+        for source, get_stats in self.sources.items():
+            try:
+                stats = get_stats()
+            except Exception:
+                LOGGER.exception('unable to collect %s stats', source)
+                continue
+
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = 'tensor_trigger_worker_{}_{}'.format(source, key)
+                if key in COUNTER_STATS:
+                    yield CounterMetricFamily(name, '{} {}'.format(source, key), value=value)
+                else:
+                    yield GaugeMetricFamily(name, '{} {}'.format(source, key), value=value)
+
+
+def start_metrics_server(sources: Dict[str, Callable[[], dict]], port: int = METRICS_PORT) -> bool:
+    """Function used to export statistics via the default
+    prometheus registry and to serve all metrics over HTTP
+    from a background thread
+
+    Args:
+        sources (Dict[str, Callable[[], dict]]): functions used
+            to generate statistics keyed by source name
+        port (int): port of metrics server. disabled if 0
+
+    Returns:
+        bool: True if the server was started else False
+    """
+
+    if port <= 0:
+        return False
+
+    REGISTRY.register(StatsCollector(sources))
+    start_http_server(port)
+    LOGGER.info('serving worker metrics on port %s', port)
+    return True
@@ -32,6 +32,8 @@ class TensorTriggerPayload(BaseModel):
     job_id: UUID
     event_type: str
     event: Union[ModelTrainEvent, ModelRunEvent]
+    # enables sampling profiler while the job is processed
+    profile: bool = False
 
     @validator('event_type')
     def validate_event_type(cls, v):
@@ -1,11 +1,15 @@
 import logging
 import json
+import threading
+import time
+from collections import deque
 from contextlib import contextmanager
 from enum import Enum
 from typing import NamedTuple, List, Union
 from uuid import UUID, uuid4
 
 import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
 from psycopg2.extras import register_uuid, DictCursor, NamedTupleCursor
 from pydantic import BaseModel, SecretStr
 
@@ -27,6 +31,217 @@ class PostgresCredentials(BaseModel):
     PG_USER: str
     PG_PASSWORD: SecretStr
     PG_PORT: int = 5432
+    PG_POOL_MIN_SIZE: int = 1
+    PG_POOL_MAX_SIZE: int = 10
+    PG_POOL_TIMEOUT: float = 30.0
+    PG_POOL_MAX_IDLE: float = 300.0
+    PG_POOL_HEALTH_CHECK_INTERVAL: float = 30.0
+
+
+class PoolTimeoutError(Exception):
+    """Exception raised when no pooled connection
+    becomes available within the pool timeout"""
+
+
+class ConnectionPool:
+    """Thread safe pool of postgres connections. Connections
+    are health checked before being handed out if they have
+    been idle for longer than the health check interval, and
+    are recycled once idle for longer than the maximum idle time.
+    Callers block (up to the pool timeout) if all connections
+    are in use
+
+    Arguments:
+        credentials: PostgresCredentials connection and pool settings
+    """
+
+    def __init__(self, credentials: PostgresCredentials):
+        self.credentials = credentials
+        self.min_size = credentials.PG_POOL_MIN_SIZE
+        self.max_size = credentials.PG_POOL_MAX_SIZE
+
+        self._idle = deque()
+        self._condition = threading.Condition()
+        self._total = 0
+        self._in_use = 0
+
+        self.acquired = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+        for _ in range(self.min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._total += 1
+
+    def _connect(self):
+        connection = psycopg2.connect(
+            dbname=self.credentials.PG_DATABASE,
+            user=self.credentials.PG_USER,
+            host=self.credentials.PG_HOST,
+            password=self.credentials.PG_PASSWORD.get_secret_value(),
+            port=self.credentials.PG_PORT
+        )
+        register_uuid(conn_or_curs=connection)
+        return connection
+
+    def _is_healthy(self, connection, idle_time: float) -> bool:
+        if connection.closed:
+            return False
+        if idle_time < self.credentials.PG_POOL_HEALTH_CHECK_INTERVAL:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            LOGGER.warning('pooled postgres connection failed health check')
+            return False
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            LOGGER.exception('unable to close postgres connection')
+
+    def acquire(self):
+        """Function used to acquire connection from pool.
+        A new connection is opened if no idle connection is
+        available and the pool has not reached its max size
+
+        Returns:
+            psycopg2 connection
+        """
+
+        start = time.monotonic()
+        deadline = start + self.credentials.PG_POOL_TIMEOUT
+        with self._condition:
+            while not self._idle and self._total >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeoutError('no postgres connection available after {}s'.format(
+                        self.credentials.PG_POOL_TIMEOUT))
+                self._condition.wait(remaining)
+
+            if self._idle:
+                connection, last_used = self._idle.pop()
+            else:
+                connection, last_used = None, None
+                self._total += 1
+            self._in_use += 1
+
+            wait_time = time.monotonic() - start
+            self.acquired += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+        try:
+            if connection is not None:
+                idle_time = time.monotonic() - last_used
+                # recycle connections that have been idle for too long
+                # or that no longer respond to health checks
+                if idle_time > self.credentials.PG_POOL_MAX_IDLE or not self._is_healthy(connection, idle_time):
+                    self.recycled += 1
+                    self._discard(connection)
+                    connection = None
+
+            if connection is None:
+                connection = self._connect()
+            return connection
+        except Exception:
+            if connection is not None:
+                self._discard(connection)
+            # the slot was counted against the pool size, but no
+            # connection is handed out, meaning that it is released
+            with self._condition:
+                self._in_use -= 1
+                self._total -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, connection):
+        """Function used to return connection to pool. Any
+        open transaction is rolled back before the connection
+        is made available to other callers
+
+        Args:
+            connection: psycopg2 connection acquired from pool
+        """
+
+        healthy = not connection.closed
+        if healthy and connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                healthy = False
+
+        if not healthy:
+            self._discard(connection)
+
+        with self._condition:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._total -= 1
+            self._condition.notify()
+
+    def close(self):
+        """Function used to close all idle connections"""
+
+        with self._condition:
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._discard(connection)
+                self._total -= 1
+
+    def stats(self) -> dict:
+        """Function used to generate pool statistics
+
+        Returns:
+            dict: dict containing pool size, saturation
+                and wait time metrics
+        """
+
+        with self._condition:
+            return {'size': self._total,
+                    'in_use': self._in_use,
+                    'idle': len(self._idle),
+                    'max_size': self.max_size,
+                    'saturation': self._in_use / self.max_size if self.max_size else 0,
+                    'acquired': self.acquired,
+                    'timeouts': self.timeouts,
+                    'recycled': self.recycled,
+                    'wait_time_total': self.wait_time_total,
+                    'wait_time_max': self.wait_time_max,
+                    'wait_time_mean': self.wait_time_total / self.acquired if self.acquired else 0}
+
+
+POOLS = {}
+POOLS_LOCK = threading.Lock()
+
+def get_pool(credentials: PostgresCredentials) -> ConnectionPool:
+    """Function used to retrieve the shared connection
+    pool for a given set of credentials. Pools are
+    created on first use
+
+    Args:
+        credentials (PostgresCredentials): postgres credentials
+
+    Returns:
+        ConnectionPool: shared connection pool
+    """
+
+    key = (credentials.PG_HOST, credentials.PG_PORT, credentials.PG_DATABASE, credentials.PG_USER)
+    with POOLS_LOCK:
+        pool = POOLS.get(key)
+        if pool is None:
+            LOGGER.info('creating postgres connection pool for %s:%s/%s', *key[:3])
+            pool = POOLS[key] = ConnectionPool(credentials)
+    return pool
 
 
 @contextmanager
@@ -54,28 +269,117 @@ def get_cursor(credentials: PostgresCredentials, cursor_factory: CursorFactory =
 
 @contextmanager
 def get_connection(credentials: PostgresCredentials):
-    connection = psycopg2.connect(
-        dbname=credentials.PG_DATABASE,
-        user=credentials.PG_USER,
-        host=credentials.PG_HOST,
-        password=credentials.PG_PASSWORD.get_secret_value(),
-        port=credentials.PG_PORT
-    )
-    register_uuid(conn_or_curs=connection)
+    pool = get_pool(credentials)
+    connection = pool.acquire()
 
     try:
         yield connection
     finally:
-        connection.close()
+        pool.release(connection)
 
 
-def update_job_state(creds: PostgresCredentials, job_id: UUID, state: int):
+def update_job_state(creds: PostgresCredentials, job_id: UUID, state: int, output_format: str = None):
     """Function used to update job state
 
     Args:
         job_id (UUID): [description]
         state (int): [description]
+        output_format (str, optional): format of job outputs
+    """
+
+    with get_cursor(creds) as db:
+        if output_format is None:
+            db.execute('UPDATE async_jobs SET job_state = %s WHERE job_id = %s', (state, job_id))
+        else:
+            db.execute('UPDATE async_jobs SET job_state = %s, output_format = %s WHERE job_id = %s',
+                       (state, output_format, job_id))
+
+def increment_model_version(creds: PostgresCredentials, model_id: UUID, channel: str = None):
+    """Function used to increment the version of a
+    model once new model weights have been uploaded.
+    API replicas use the version to invalidate any
+    cached copies of the model. If a channel is given,
+    API replicas are notified once the update has been
+    committed
+
+    Args:
+        model_id (UUID): ID of model
+        channel (str, optional): notification channel
+    """
+
+    with get_cursor(creds) as db:
+        db.execute('UPDATE models SET version = version + 1 WHERE model_id = %s', (model_id,))
+        if channel is not None:
+            db.execute('SELECT pg_notify(%s, %s)', (channel, 'model:{}'.format(model_id)))
+
+
+def record_model_access(creds: PostgresCredentials, model_id: UUID):
+    """Function used to increment the access counter of
+    a model. Access counts are used to select the models
+    that are pre-warmed on startup
+
+    Args:
+        model_id (UUID): ID of model
+    """
+
+    with get_cursor(creds) as db:
+        db.execute("UPDATE models SET access_count = access_count + 1, "
+                   "last_accessed = (now() AT TIME ZONE 'UTC') WHERE model_id = %s", (model_id,))
+
+
+def get_hot_models(creds: PostgresCredentials, limit: int) -> List[NamedTuple]:
+    """Function used to retrieve the most frequently
+    accessed models across all users
+
+    Args:
+        limit (int): maximum number of models to return
+
+    Returns:
+        List[NamedTuple]: models ordered by access count
+    """
+
+    with get_cursor(creds) as db:
+        db.execute('SELECT model_id,size,input_shape FROM models WHERE access_count > 0 '
+                   'ORDER BY access_count DESC, last_accessed DESC NULLS LAST LIMIT %s', (limit,))
+        results = db.fetchall()
+    return list(results) if results else []
+
+
+def get_user_model(creds: PostgresCredentials, uid: str, model_id: UUID) -> Union[NamedTuple, None]:
+    """Function used to retrieve model by username
+    and model ID. Used to verify that a user owns a
+    model before it is read from the object store
+
+    Args:
+        uid (str): user ID
+        model_id (UUID): ID of model
+
+    Returns:
+        Union[NamedTuple, None]: model if owned by user else None
+    """
+
+    with get_cursor(creds) as db:
+        db.execute('SELECT model_id,version FROM models WHERE username=%s AND model_id=%s', (uid, model_id))
+        result = db.fetchone()
+    return result if result else None
+
+
+def get_user_job(creds: PostgresCredentials, uid: str, job_id: UUID) -> Union[NamedTuple, None]:
+    """Function used to retrieve job by username
+    and job ID. Used to verify that a user owns a
+    job before its input is read from the object store
+
+    Args:
+        uid (str): user ID
+        job_id (UUID): ID of job
+
+    Returns:
+        Union[NamedTuple, None]: job if owned by user else None
     """
 
     with get_cursor(creds) as db:
-        db.execute('UPDATE async_jobs SET job_state = %s WHERE job_id = %s', (state, job_id))
\ No newline at end of file
+        db.execute('SELECT j.job_id,j.model_id FROM async_jobs AS j '
+                   'INNER JOIN models ON models.model_id = j.model_id '
+                   'WHERE models.username = %s AND j.job_id = %s', (uid, job_id))
+        result = db.fetchone()
+    return result if result else None
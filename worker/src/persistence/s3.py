@@ -3,14 +3,19 @@ layer"""
 
 import logging
 import io
+from typing import BinaryIO, Dict
 
 import boto3
 
 from src.config import S3_REGION_NAME, S3_ACCESS_KEY_ID, S3_SECRET_ACCESS_KEY, \
-    S3_BUCKET_NAME
+    S3_BUCKET_NAME, S3_MULTIPART_PART_SIZE
 
 LOGGER = logging.getLogger(__name__)
 
+# user metadata key of model files containing the version
+# of the model that the file is served under
+MODEL_VERSION_METADATA = 'model-version'
+
 # generate new AWS client with credentials
 # and region to interface with S3
 CLIENT = boto3.client(
@@ -36,12 +41,125 @@ def retrieve_s3_file(path: str) -> io.BytesIO:
     return content
 
 
-def upload_s3_file(content: io.BytesIO, path: str):
+def open_s3_stream(path: str) -> BinaryIO:
+    """Function used to open a streaming, file-like
+    handle on a file in an S3 bucket. Data is only
+    downloaded as it is read from the stream
+
+    Returns:
+        BinaryIO: readable stream of file contents
+    """
+
+    response = CLIENT.get_object(Bucket=S3_BUCKET_NAME, Key=path)
+    return response['Body']
+
+
+def get_s3_etag(path: str) -> str:
+    """Function used to retrieve the ETag (checksum)
+    of a file in an S3 bucket without downloading it
+
+    Returns:
+        str: ETag of file
+    """
+
+    response = CLIENT.head_object(Bucket=S3_BUCKET_NAME, Key=path)
+    return response['ETag']
+
+
+def download_s3_file(path: str, filename: str):
+    """Function used to download file from an
+    S3 bucket to the local filesystem
+
+    Args:
+        path (str): Path of S3 file
+        filename (str): local filename to write to
+    """
+
+    CLIENT.download_file(S3_BUCKET_NAME, path, filename)
+
+
+def upload_s3_file(content: io.BytesIO, path: str, metadata: Dict[str, str] = None):
     """Function used to upload file to
     S3 bucket
 
+    Args:
+        metadata (Dict[str, str], optional): user
+            metadata stored with the file
+
     Returns:
         io.BytesIO: [description]
     """
 
-    CLIENT.upload_fileobj(content, S3_BUCKET_NAME, path)
+    extra_args = {'Metadata': metadata} if metadata else None
+    CLIENT.upload_fileobj(content, S3_BUCKET_NAME, path, ExtraArgs=extra_args)
+
+
+class S3MultipartWriter:
+    """Writable file-like object used to stream data into
+    an S3 object via multipart upload. Data is buffered until
+    the part size is reached, meaning that memory usage is
+    bounded by the part size rather than the object size.
+    Objects smaller than a single part are uploaded with a
+    single put request
+
+    Arguments:
+        path: str key of S3 object
+        part_size: int size of upload parts in bytes. note
+            that S3 requires parts of at least 5MB
+    """
+
+    def __init__(self, path: str, part_size: int = S3_MULTIPART_PART_SIZE):
+        self.path = path
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        self.bytes_written = 0
+
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+
+    def write(self, data: bytes) -> int:
+        self._buffer.extend(data)
+        self.bytes_written += len(data)
+        if len(self._buffer) >= self.part_size:
+            self._upload_part()
+        return len(data)
+
+    def _upload_part(self):
+        if self._upload_id is None:
+            response = CLIENT.create_multipart_upload(Bucket=S3_BUCKET_NAME, Key=self.path)
+            self._upload_id = response['UploadId']
+
+        part_number = len(self._parts) + 1
+        response = CLIENT.upload_part(Bucket=S3_BUCKET_NAME,
+                                      Key=self.path,
+                                      UploadId=self._upload_id,
+                                      PartNumber=part_number,
+                                      Body=bytes(self._buffer))
+        self._parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+        self._buffer.clear()
+
+    def close(self):
+        """Function used to upload any remaining buffered
+        data and complete the upload"""
+
+        if self._upload_id is None:
+            CLIENT.put_object(Bucket=S3_BUCKET_NAME, Key=self.path, Body=bytes(self._buffer))
+        else:
+            if self._buffer:
+                self._upload_part()
+            CLIENT.complete_multipart_upload(Bucket=S3_BUCKET_NAME,
+                                             Key=self.path,
+                                             UploadId=self._upload_id,
+                                             MultipartUpload={'Parts': self._parts})
+        self._buffer.clear()
+
+    def abort(self):
+        """Function used to abort upload and discard
+        any uploaded parts"""
+
+        if self._upload_id is not None:
+            try:
+                CLIENT.abort_multipart_upload(Bucket=S3_BUCKET_NAME, Key=self.path, UploadId=self._upload_id)
+            except Exception:
+                LOGGER.exception('unable to abort multipart upload for %s', self.path)
+        self._buffer.clear()
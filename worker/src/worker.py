@@ -1,8 +1,8 @@
 """Module containing code for tensor trigger worker process"""
 
 import logging
-import json
 import io
+import json
 import functools
 from uuid import UUID
 from typing import Callable
@@ -12,12 +12,18 @@ from pydantic import ValidationError
 from src.models.events import TensorTriggerPayload, ModelRunEvent, \
     ModelTrainEvent
 from src.logic.tensor import run_tensorflow_model, train_tensorflow_model
+from src.logic.cache import MODEL_CACHE
 from src.logic.rabbit import AMQPExchangeConfig, \
     listen_on_exchange, ack_message
+from src.logic.profiler import profile_job
+from src.metrics import JobTimings, UPLOAD_SPAN
 from src.config import MESSAGE_BROKER_URL, EXCHANGE_NAME, \
-    EXCHANGE_TYPE, ROUTING_KEY, PG_CREDENTIALS
-from src.persistence.postgres import update_job_state
-from src.persistence.s3 import upload_s3_file
+    EXCHANGE_TYPE, ROUTING_KEY, PG_CREDENTIALS, WORKER_CONCURRENCY, \
+    WORKER_PREFETCH_COUNT, WORKER_STATS_INTERVAL, METADATA_INVALIDATION_CHANNEL, \
+    PROFILING_ENABLED
+from src.persistence.postgres import update_job_state, increment_model_version, \
+    record_model_access, get_user_model
+from src.persistence.s3 import upload_s3_file, S3MultipartWriter, MODEL_VERSION_METADATA
 
 
 LOGGER = logging.getLogger(__name__)
@@ -33,24 +39,38 @@ def handle_model_run(job_id: UUID, e: ModelRunEvent):
             event details
     """
 
-    # run tensorflow model with specified values
-    results = run_tensorflow_model(e.model_id, job_id, e.user)
-    if results is None:
-        LOGGER.exception('unable to complete tensorflow job')
-        update_job_state(PG_CREDENTIALS, job_id, 3)
+    try:
+        record_model_access(PG_CREDENTIALS, e.model_id)
+    except Exception:
+        LOGGER.exception('unable to record access of model %s', e.model_id)
 
-    else:
-        LOGGER.info('successfully completed job %s', job_id)
-        output = json.dumps({'output': results})
-        # convert json output to BytesIO instance
-        # and upload to s3 server for API
-        bytes_data = io.BytesIO()
-        bytes_data.write(output.encode('utf-8'))
-        bytes_data.seek(0)
-        upload_s3_file(bytes_data, '/tensor-trigger/output-data' + str(job_id))
+    # run tensorflow model with specified values and stream
+    # results to s3 server for API via multipart upload
+    timings = JobTimings(job_id, 'model_run')
+    writer = S3MultipartWriter('/tensor-trigger/output-data' + str(job_id))
+    try:
+        index = run_tensorflow_model(e.model_id, job_id, e.user, writer, timings)
+        if index is None:
+            LOGGER.error('unable to complete tensorflow job')
+            writer.abort()
+            update_job_state(PG_CREDENTIALS, job_id, 3)
+            timings.finish('failed')
+            return
+
+        with timings.span(UPLOAD_SPAN):
+            writer.close()
+            # upload index of output blocks, used by the API
+            # to read ranges of rows from the output data
+            upload_s3_file(io.BytesIO(json.dumps(index).encode('utf-8')), '/tensor-trigger/output-index' + str(job_id))
+    except Exception:
+        writer.abort()
+        timings.finish('failed')
+        raise
 
-        # update job state in database with success
-        update_job_state(PG_CREDENTIALS, job_id, 2)
+    LOGGER.info('successfully completed job %s with %s rows', job_id, index['rows'])
+    # update job state in database with success
+    update_job_state(PG_CREDENTIALS, job_id, 2, index['format'])
+    timings.finish('completed')
 
 
 def handle_model_update(job_id: UUID, e: ModelTrainEvent):
@@ -64,17 +84,28 @@ def handle_model_update(job_id: UUID, e: ModelTrainEvent):
     """
 
     # run tensorflow model with specified values
-    new_model = train_tensorflow_model(e.model_id, e.user, e.epochs, e.input_vectors, e.output_vectors)
+    timings = JobTimings(job_id, 'model_train')
+    new_model = train_tensorflow_model(e.model_id, e.user, e.epochs, e.input_vectors, e.output_vectors, timings)
     if new_model is None:
         LOGGER.exception('unable to complete tensorflow job')
         update_job_state(PG_CREDENTIALS, job_id, 3)
+        timings.finish('failed')
     else:
         LOGGER.info('successfully completed job %s', job_id)
         new_model.seek(0)
-        # upload new model to S3 bucket
-        upload_s3_file(new_model, '/tensor-trigger/' + str(e.model_id))
+        # upload new model to S3 bucket. the file is labelled with the
+        # version it is served under, since it is replaced before the
+        # version is incremented
+        model = get_user_model(PG_CREDENTIALS, e.user, e.model_id)
+        metadata = {MODEL_VERSION_METADATA: str(model.version + 1)} if model is not None else None
+        with timings.span(UPLOAD_SPAN):
+            upload_s3_file(new_model, '/tensor-trigger/' + str(e.model_id), metadata)
+        # bump model version to invalidate cached models
+        increment_model_version(PG_CREDENTIALS, e.model_id, METADATA_INVALIDATION_CHANNEL)
+        MODEL_CACHE.invalidate(e.model_id)
         # update job state in database with success
         update_job_state(PG_CREDENTIALS, job_id, 2)
+        timings.finish('completed')
 
 
 EVENT_HANDLERS = {
@@ -110,7 +141,13 @@ def message_handler(channel: object,
         # retrieve event handler based on event
         # type and execute
         handler = EVENT_HANDLERS.get(e.event_type)
-        handler(e.job_id, e.event)
+        if e.profile and PROFILING_ENABLED:
+            # sample stacks of the current thread while the
+            # job is processed and upload the profile to S3
+            with profile_job(e.job_id):
+                handler(e.job_id, e.event)
+        else:
+            handler(e.job_id, e.event)
 
         # acknowledge message with RabbitMQ server
         ack_message(connection, channel, tag)
@@ -122,6 +159,9 @@ def message_handler(channel: object,
     except Exception:
         LOGGER.exception('unable to process payload')
         update_job_state(PG_CREDENTIALS, e.job_id, 3)
+        # failed jobs are acknowledged so that they do not
+        # permanently occupy a slot of the prefetch window
+        ack_message(connection, channel, tag)
 
 
 def worker_factory() -> Callable:
@@ -141,6 +181,9 @@ def worker_factory() -> Callable:
         'exchange_type': EXCHANGE_TYPE,
         'exchange_name': EXCHANGE_NAME,
         'routing_keys': [ROUTING_KEY],
-        'auto_ack': False
+        'auto_ack': False,
+        'concurrency': WORKER_CONCURRENCY,
+        'prefetch_count': WORKER_PREFETCH_COUNT or None,
+        'stats_interval': WORKER_STATS_INTERVAL
     })
     return functools.partial(listen_on_exchange, message_handler, exchange_config)
@@ -0,0 +1,138 @@
+import os
+import tempfile
+import threading
+import unittest
+from uuid import uuid4
+
+from src.logic.cache import ModelCache
+
+
+def write(content: bytes):
+    def download(filename: str):
+        with open(filename, 'wb') as handle:
+            handle.write(content)
+    return download
+
+
+class TestMemoryTier(unittest.TestCase):
+
+    def test_evicted_by_entries(self):
+        cache = ModelCache(tempfile.gettempdir(), max_entries=2, max_bytes=100, max_disk_bytes=0)
+        first, second, third = uuid4(), uuid4(), uuid4()
+        cache.put(first, 'a', 'first', 1)
+        cache.put(second, 'a', 'second', 1)
+        # access moves first model to end of LRU order
+        self.assertEqual(cache.get(first, 'a'), 'first')
+        cache.put(third, 'a', 'third', 1)
+
+        self.assertEqual(cache.get(first, 'a'), 'first')
+        self.assertIsNone(cache.get(second, 'a'))
+        self.assertEqual(cache.get(third, 'a'), 'third')
+        self.assertEqual(cache.stats()['memory_entries'], 2)
+
+    def test_evicted_by_bytes(self):
+        cache = ModelCache(tempfile.gettempdir(), max_entries=10, max_bytes=100, max_disk_bytes=0)
+        first, second = uuid4(), uuid4()
+        cache.put(first, 'a', 'first', 60)
+        cache.put(second, 'a', 'second', 60)
+
+        self.assertIsNone(cache.get(first, 'a'))
+        self.assertEqual(cache.get(second, 'a'), 'second')
+        self.assertEqual(cache.stats()['memory_size'], 60)
+
+        # models larger than the budget are never cached
+        cache.put(first, 'a', 'first', 101)
+        self.assertIsNone(cache.get(first, 'a'))
+        self.assertEqual(cache.get(second, 'a'), 'second')
+
+    def test_keyed_by_checksum(self):
+        cache = ModelCache(tempfile.gettempdir(), max_entries=10, max_bytes=100, max_disk_bytes=0)
+        model_id = uuid4()
+        cache.put(model_id, 'a', 'old', 1)
+        cache.put(model_id, 'b', 'new', 1)
+        self.assertIsNone(cache.get(model_id, 'a'))
+        self.assertEqual(cache.get(model_id, 'b'), 'new')
+        self.assertEqual(cache.stats()['memory_entries'], 1)
+
+
+class TestDiskTier(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = directory.name
+
+    def cached_files(self) -> list:
+        return sorted(name for name in os.listdir(self.cache_dir) if name.endswith('.h5'))
+
+    def test_put_and_get_file(self):
+        cache = ModelCache(self.cache_dir, max_entries=10, max_bytes=100, max_disk_bytes=100)
+        model_id = uuid4()
+        self.assertIsNone(cache.get_file(model_id, '"abc"'))
+
+        with cache.put_file(model_id, '"abc"', write(b'model')) as handle:
+            self.assertEqual(handle.read(), b'model')
+        with cache.get_file(model_id, '"abc"') as handle:
+            self.assertEqual(handle.read(), b'model')
+        self.assertEqual(self.cached_files(), ['{}-abc.h5'.format(model_id)])
+
+        stats = cache.stats()
+        self.assertEqual((stats['disk_hits'], stats['disk_misses']), (1, 1))
+
+    def test_evicted_by_bytes(self):
+        cache = ModelCache(self.cache_dir, max_entries=10, max_bytes=100, max_disk_bytes=25)
+        first, second, third = uuid4(), uuid4(), uuid4()
+        cache.put_file(first, 'a', write(b'x' * 10)).close()
+        os.utime(os.path.join(self.cache_dir, '{}-a.h5'.format(first)), (1, 1))
+        cache.put_file(second, 'a', write(b'x' * 10)).close()
+        os.utime(os.path.join(self.cache_dir, '{}-a.h5'.format(second)), (2, 2))
+        # least recently used file is evicted once budget is exceeded
+        cache.put_file(third, 'a', write(b'x' * 10)).close()
+
+        self.assertIsNone(cache.get_file(first, 'a'))
+        self.assertEqual(self.cached_files(), sorted(['{}-a.h5'.format(second), '{}-a.h5'.format(third)]))
+
+    def test_new_file_never_evicted(self):
+        cache = ModelCache(self.cache_dir, max_entries=10, max_bytes=100, max_disk_bytes=5)
+        model_id = uuid4()
+        with cache.put_file(model_id, 'a', write(b'x' * 10)) as handle:
+            self.assertEqual(len(handle.read()), 10)
+        self.assertEqual(self.cached_files(), ['{}-a.h5'.format(model_id)])
+
+    def test_older_versions_removed(self):
+        cache = ModelCache(self.cache_dir, max_entries=10, max_bytes=100, max_disk_bytes=100)
+        model_id = uuid4()
+        cache.put_file(model_id, 'a', write(b'old')).close()
+        cache.put_file(model_id, 'b', write(b'new')).close()
+        self.assertEqual(self.cached_files(), ['{}-b.h5'.format(model_id)])
+
+    def test_failed_download_not_cached(self):
+        cache = ModelCache(self.cache_dir, max_entries=10, max_bytes=100, max_disk_bytes=100)
+
+        def download(filename: str):
+            with open(filename, 'wb') as handle:
+                handle.write(b'partial')
+            raise IOError
+
+        with self.assertRaises(IOError):
+            cache.put_file(uuid4(), 'a', download)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_file_readable_after_eviction(self):
+        cache = ModelCache(self.cache_dir, max_entries=10, max_bytes=100, max_disk_bytes=15)
+        first, second = uuid4(), uuid4()
+        cache.put_file(first, 'a', write(b'first model')).close()
+        handle = cache.get_file(first, 'a')
+
+        # concurrent download evicts the file before it is loaded
+        thread = threading.Thread(target=lambda: cache.put_file(second, 'a', write(b'second model')).close())
+        thread.start()
+        thread.join()
+        self.assertIsNone(cache.get_file(first, 'a'))
+
+        with handle:
+            self.assertEqual(handle.read(), b'first model')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.logic.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight('test')
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def run_concurrently(self, func, callers: int = 4) -> list:
+        with ThreadPoolExecutor(max_workers=callers) as executor:
+            leader = executor.submit(self.flight.do, 'key', func)
+            self.assertTrue(self.started.wait(5))
+            waiters = [executor.submit(self.flight.do, 'key', func) for _ in range(callers - 1)]
+            # wait until all callers are blocked on the call in flight
+            while self.flight.stats()['coalesced'] < callers - 1:
+                time.sleep(0.001)
+            self.release.set()
+            return [leader] + waiters
+
+    def test_calls_coalesced(self):
+        calls = []
+
+        def load():
+            calls.append(1)
+            self.started.set()
+            self.release.wait(5)
+            return object()
+
+        results = [f.result() for f in self.run_concurrently(load)]
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+        stats = self.flight.stats()
+        self.assertEqual((stats['calls'], stats['coalesced'], stats['in_flight']), (1, 3, 0))
+
+    def test_error_propagated(self):
+        def load():
+            self.started.set()
+            self.release.wait(5)
+            raise ValueError('load failed')
+
+        for future in self.run_concurrently(load):
+            with self.assertRaises(ValueError):
+                future.result()
+        self.assertEqual(self.flight.stats()['failures'], 1)
+
+        # failed calls are not cached
+        self.assertEqual(self.flight.do('key', lambda: 'loaded'), 'loaded')
+
+    def test_keys_independent(self):
+        self.assertEqual(self.flight.do('a', lambda: 1), 1)
+        self.assertEqual(self.flight.do('b', lambda: 2), 2)
+        self.assertEqual(self.flight.stats()['calls'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()